@@ -1,15 +1,46 @@
-from flask import Flask, request, jsonify, send_file, send_from_directory, redirect
+from flask import Flask, Request, request, jsonify, send_file, send_from_directory, redirect, Response, g
 from flask_cors import CORS
 import os
 import json
+import time
 from datetime import datetime, timedelta
 import shutil
 import tempfile
 import zipfile
 import uuid
+import csv
+import io
+from urllib.parse import quote, unquote
+from datastore import JsonRepository, parse_deadline
+from sqlite_store import SqliteStore
+from upload_sessions import UploadSessionManager
+from zip_stream import ZipStream
+from jobs import JobRunner
+from filename_formats import compile_formats, normalize_formats
+from blob_store import BlobStore
+from file_storage import LocalStorage, S3Storage, join_key
+from response_cache import ResponseCache
+from static_assets import StaticAssets
+from listing import ListQuery
+from submission_report import SubmissionMatrix
+from media import MediaPipeline, IMAGE_VARIANTS
+from metrics import registry, RequestProfiler
+from upload_integrity import DigestingFile, UploadTooLarge, normalize_sha256, format_size
+from rate_limit import (TokenBucketLimiter, RedisTokenBucketLimiter, ConcurrencyLimiter, connect_redis,
+                        retry_after_seconds, BUSY_RETRY_AFTER)
+
+class UploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # 上传文件边接收边计算 SHA-256；路由已确定大小上限时超限立即中止
+        return DigestingFile(g.get('upload_file_limit'))
+
 
 app = Flask(__name__, static_folder='font_end')
-CORS(app, resources={r"/*": {"origins": "*"}})
+app.request_class = UploadRequest
+# 跨域由 flask_cors 统一处理：上传时带的身份和校验请求头要允许，限流响应的 Retry-After 要让前端读到
+CORS_ALLOW_HEADERS = ['Content-Type', 'X-Student-Id', 'X-Student-Name', 'X-Homework-Id', 'X-Chunk-Sha256']
+CORS_EXPOSE_HEADERS = ['Retry-After']
+CORS(app, resources={r"/*": {"origins": "*"}}, allow_headers=CORS_ALLOW_HEADERS, expose_headers=CORS_EXPOSE_HEADERS)
 
 # 取消文件大小限制
 app.config['MAX_CONTENT_LENGTH'] = None
@@ -19,9 +50,6 @@ app.config['MAX_CONTENT_LENGTH'] = None
 def add_security_headers(response):
     response.headers['X-Content-Type-Options'] = 'nosniff'
     response.headers['X-Frame-Options'] = 'ALLOW-FROM *'
-    response.headers['Access-Control-Allow-Origin'] = '*'
-    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
     return response
 
 # 配置文件存储路径
@@ -35,6 +63,64 @@ HOMEWORK_DATA_FILE = 'homework_data.json'
 STUDENTS_DATA_FILE = 'students_data.json'
 # 请假数据文件路径
 LEAVE_DATA_FILE = 'leave_data.json'
+# 作业提交索引文件路径
+SUBMISSION_INDEX_FILE = 'submission_index.json'
+# 分片上传会话文件路径
+UPLOAD_SESSIONS_FILE = 'upload_sessions.json'
+# 去重存储（按 SHA-256 保存文件内容，学生目录中为硬链接），BLOB_STORE=1 时开启
+BLOB_STORE_ENABLED = os.environ.get('BLOB_STORE', '0') == '1'
+BLOB_FOLDER = os.path.join(UPLOAD_FOLDER, 'blobs')
+BLOB_REFS_FILE = 'blob_refs.json'
+# 上传文件的存储：local（默认，保存在 UPLOAD_FOLDER）或 s3（S3 兼容的对象存储，如 MinIO）。
+# 使用 s3 时文件内容保存在存储桶中，下载通过带签名的临时链接直接从对象存储获取；
+# 提交记录（学生目录下的 submissions.jsonl）仍保存在 UPLOAD_FOLDER
+FILE_STORAGE = os.environ.get('FILE_STORAGE', 'local')
+S3_BUCKET = os.environ.get('S3_BUCKET', 'homework')
+S3_PREFIX = os.environ.get('S3_PREFIX', 'uploads')
+# 例如本地 MinIO：http://127.0.0.1:9000，不设置时使用 AWS S3
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')
+S3_REGION = os.environ.get('S3_REGION')
+# 单个上传文件的默认大小上限（字节），0 表示不限制；作业可以单独设置 maxFileSize
+MAX_UPLOAD_FILE_SIZE = int(os.environ.get('MAX_UPLOAD_FILE_SIZE', 0))
+# 请假图片目录（存储中的前缀；缩略图缓存在本机的同名目录下）
+LEAVE_IMAGE_PREFIX = 'leave_images'
+LEAVE_IMAGE_FOLDER = os.path.join(UPLOAD_FOLDER, LEAVE_IMAGE_PREFIX)
+# 请假图片文件名带时间戳，内容不会变化，浏览器可以缓存较长时间
+LEAVE_IMAGE_MAX_AGE = 7 * 24 * 60 * 60
+
+# 更新公告文件路径
+UPDATE_NOTICE_FILE = 'update_notice.txt'
+
+# 前端文件目录
+FRONTEND_FOLDER = 'font_end'
+# 静态资源模式：dev（默认，每次从磁盘读取）或 production（启动时载入内存并预压缩）
+STATIC_MODE = os.environ.get('STATIC_MODE', 'dev')
+# 带内容摘要的 js/css 文件名可以长期缓存
+STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+static_assets = StaticAssets(FRONTEND_FOLDER) if STATIC_MODE == 'production' else None
+
+def serve_static(folder, filename):
+    asset = static_assets.get(folder, filename) if static_assets else None
+    if asset is None:
+        return send_from_directory(os.path.join(FRONTEND_FOLDER, folder), filename)
+
+    encoding, body = static_assets.choose_encoding(asset, request.accept_encodings)
+    response = Response(body, mimetype=asset.mimetype)
+    if encoding:
+        response.content_encoding = encoding
+    if asset.encoded:
+        response.vary.add('Accept-Encoding')
+    # 不同编码的内容不同，ETag 也要区分
+    response.set_etag(f"{asset.etag}-{encoding}" if encoding else asset.etag)
+    response.last_modified = asset.mtime
+    if static_assets.is_fingerprinted(folder, filename):
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 # 添加路由处理前端页面请求
 @app.route('/')
@@ -43,63 +129,296 @@ def index():
 
 @app.route('/index.html')
 def index_html():
-    return send_from_directory('font_end/pages', 'index.html')
+    return serve_static('pages', 'index.html')
 
 @app.route('/login.html')
 def login_html():
-    return send_from_directory('font_end/pages', 'login.html')
+    return serve_static('pages', 'login.html')
 
 @app.route('/admin.html')
 def admin_html():
-    return send_from_directory('font_end/pages', 'admin.html')
+    return serve_static('pages', 'admin.html')
 
 @app.route('/pages/<path:filename>')
 def serve_pages(filename):
-    return send_from_directory('font_end/pages', filename)
+    return serve_static('pages', filename)
 
 @app.route('/js/<path:filename>')
 def serve_js(filename):
-    return send_from_directory('font_end/js', filename)
+    return serve_static('js', filename)
 
 @app.route('/css/<path:filename>')
 def serve_css(filename):
-    return send_from_directory('font_end/css', filename)
+    return serve_static('css', filename)
+
+# 存储引擎：json（默认，数据集常驻内存并延迟写回）或 sqlite（单库 WAL 模式）
+STORAGE_ENGINE = os.environ.get('STORAGE_ENGINE', 'json')
+# SQLite 数据库文件路径
+SQLITE_DB_FILE = os.environ.get('SQLITE_DB_FILE', 'homework.db')
+
+DATA_FLUSH_INTERVAL = 2  # 秒
+DATA_FLUSH_THRESHOLD = 20  # 累计修改次数
+# 多进程部署（gunicorn 多 worker 等）时设为 1：JSON 文件的读-改-写加跨进程文件锁，
+# 修改立即落盘，其他进程读取时发现文件变化后重新加载
+MULTI_WORKER = os.environ.get('MULTI_WORKER') == '1'
+# 多进程部署时后台任务状态保存到这个文件
+JOBS_FILE = 'jobs.json'
+
+if STORAGE_ENGINE == 'sqlite':
+    repo = SqliteStore(SQLITE_DB_FILE)
+else:
+    repo = JsonRepository(HOMEWORK_DATA_FILE, STUDENTS_DATA_FILE, LEAVE_DATA_FILE, UPLOAD_FOLDER,
+                          SUBMISSION_INDEX_FILE, DATA_FLUSH_INTERVAL, DATA_FLUSH_THRESHOLD, MULTI_WORKER)
+
+upload_sessions = UploadSessionManager(UPLOAD_SESSIONS_FILE, shared=MULTI_WORKER)
+
+# 后台任务队列，耗时的管理操作在这里执行
+JOB_WORKERS = 2
+jobs = JobRunner(JOB_WORKERS, path=JOBS_FILE if MULTI_WORKER else None, shared=MULTI_WORKER)
+
+if FILE_STORAGE == 's3':
+    storage = S3Storage(S3_BUCKET, S3_PREFIX, S3_ENDPOINT_URL, S3_REGION)
+else:
+    storage = LocalStorage(UPLOAD_FOLDER)
+
+# 去重存储依赖本机硬链接，只在本地存储时启用
+blob_store = BlobStore(BLOB_FOLDER, BLOB_REFS_FILE, MULTI_WORKER) if BLOB_STORE_ENABLED and storage.is_local else None
+
+# 请假图片的缩略图和网页版
+media = MediaPipeline(storage, LEAVE_IMAGE_PREFIX, LEAVE_IMAGE_FOLDER)
+
+# 运行指标：/metrics 以 Prometheus 文本格式输出，默认只允许本机访问，METRICS_PUBLIC=1 时不限制
+METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC') == '1'
+# PROFILE_REQUESTS=1 时，本机请求带 X-Profile: cprofile（或 pyinstrument）头会被分析，结果保存到 PROFILE_FOLDER
+PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS') == '1'
+PROFILE_FOLDER = 'profiles'
+UPLOAD_ENDPOINTS = ('upload_homework', 'put_upload_chunk', 'commit_chunked_upload')
+
+request_seconds = registry.histogram('homework_http_request_seconds', '请求处理耗时（不含流式响应的发送）',
+                                     ('method', 'route', 'status'))
+received_bytes = registry.counter('homework_http_received_bytes_total', '收到的请求体字节数', ('route',))
+sent_bytes = registry.counter('homework_http_sent_bytes_total', '发送的响应体字节数', ('route',))
+uploads_in_progress = registry.gauge('homework_uploads_in_progress', '正在处理的上传请求数')
+registry.gauge('homework_jobs_pending', '本进程排队或运行中的后台任务数', fn=jobs.pending)
+profiler = RequestProfiler(PROFILE_FOLDER)
+
+def is_local_request():
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+def metrics_route():
+    # 按路由规则而不是实际路径统计，未匹配的路径合并为一项
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+def count_sent_bytes(chunks, route):
+    for chunk in chunks:
+        sent_bytes.inc(len(chunk), route=route)
+        yield chunk
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    if request.endpoint in UPLOAD_ENDPOINTS:
+        uploads_in_progress.inc()
+        g.upload_counted = True
+    profile_kind = request.headers.get('X-Profile')
+    if profile_kind and PROFILE_REQUESTS and is_local_request():
+        g.profile = profiler.start(profile_kind.lower())
 
-def load_homework_data():
-    if os.path.exists(HOMEWORK_DATA_FILE):
-        with open(HOMEWORK_DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {'homework': []}
+@app.after_request
+def record_request_metrics(response):
+    route = metrics_route()
+    session = g.pop('profile', None)
+    if session is not None:
+        response.headers['X-Profile-File'] = profiler.stop(session, request.endpoint or 'unmatched')
+    request_seconds.observe(time.perf_counter() - g.request_start, method=request.method,
+                            route=route, status=response.status_code)
+    if request.content_length:
+        received_bytes.inc(request.content_length, route=route)
+    if response.content_length is not None:
+        sent_bytes.inc(response.content_length, route=route)
+    elif response.is_streamed and not response.direct_passthrough:
+        # 长度未知的流式响应（CSV 导出等）在发送时累计
+        response.response = count_sent_bytes(response.response, route)
+    return response
 
-def save_homework_data(data):
-    with open(HOMEWORK_DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+@app.teardown_request
+def finish_request_metrics(exc):
+    if g.pop('upload_counted', False):
+        uploads_in_progress.dec()
+
+# 提交接口的限流：按学号和客户端 IP 各用一个令牌桶，每分钟允许的次数即桶的容量，0 表示不限制。
+# 同一教室的学生可能共用出口 IP，IP 的额度要比学号宽松得多
+RATE_LIMIT_STUDENT_PER_MINUTE = int(os.environ.get('RATE_LIMIT_STUDENT_PER_MINUTE', 10))
+RATE_LIMIT_IP_PER_MINUTE = int(os.environ.get('RATE_LIMIT_IP_PER_MINUTE', 120))
+# 多进程部署时设置（如 redis://127.0.0.1:6379/0），所有 worker 共用限流状态；不设置时每个进程各自计数
+RATE_LIMIT_REDIS_URL = os.environ.get('RATE_LIMIT_REDIS_URL')
+# 每个进程同时处理的上传请求数上限（含分片和请假），超过时直接返回 503，0 表示不限制
+MAX_CONCURRENT_UPLOADS = int(os.environ.get('MAX_CONCURRENT_UPLOADS', 16))
+RATE_LIMITED_ENDPOINTS = ('preflight_upload', 'upload_homework', 'init_chunked_upload', 'submit_leave')
+ADMISSION_ENDPOINTS = UPLOAD_ENDPOINTS + ('submit_leave',)
+
+rate_limit_redis = connect_redis(RATE_LIMIT_REDIS_URL) if RATE_LIMIT_REDIS_URL else None
+
+def make_rate_limiter(name, per_minute):
+    if per_minute <= 0:
+        return None
+    if rate_limit_redis is not None:
+        return RedisTokenBucketLimiter(rate_limit_redis, name, per_minute / 60, per_minute)
+    return TokenBucketLimiter(per_minute / 60, per_minute)
+
+student_limiter = make_rate_limiter('student', RATE_LIMIT_STUDENT_PER_MINUTE)
+ip_limiter = make_rate_limiter('ip', RATE_LIMIT_IP_PER_MINUTE)
+upload_slots = ConcurrencyLimiter(MAX_CONCURRENT_UPLOADS) if MAX_CONCURRENT_UPLOADS > 0 else None
+rejected_requests = registry.counter('homework_rejected_requests_total', '被限流或并发上限拒绝的请求数',
+                                     ('route', 'reason'))
+
+def reject_request(status, message, retry_after, reason):
+    rejected_requests.inc(route=metrics_route(), reason=reason)
+    response = jsonify({'success': False, 'message': message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    return response
 
-def load_students_data():
-    if os.path.exists(STUDENTS_DATA_FILE):
-        with open(STUDENTS_DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {'students': []}
+def check_student_rate(student_id):
+    """按学号限流，超过时返回 429 响应；同一请求只计一次"""
+    # before_request 已按 X-Student-Id 头计数，路由中读到的学号必须与之相同，
+    # 否则随便填写请求头就能绕过按学号限流
+    header_id = request.headers.get('X-Student-Id')
+    if header_id and student_id and header_id != str(student_id):
+        return jsonify({'success': False, 'message': '请求头与表单中的学号不一致'}), 400
+    if student_limiter is None or not student_id or g.get('student_rate_checked'):
+        return None
+    g.student_rate_checked = True
+    wait = student_limiter.acquire(str(student_id))
+    if wait:
+        seconds = retry_after_seconds(wait)
+        return reject_request(429, f'提交过于频繁，请 {seconds} 秒后再试', seconds, 'student')
+    return None
+
+@app.before_request
+def admit_request():
+    # 在解析请求体之前拒绝，被拒绝的重试不会再做加载、校验和接收文件
+    if request.method == 'OPTIONS':
+        return None
+    if request.endpoint in RATE_LIMITED_ENDPOINTS:
+        if ip_limiter is not None:
+            wait = ip_limiter.acquire(request.remote_addr)
+            if wait:
+                seconds = retry_after_seconds(wait)
+                return reject_request(429, f'提交过于频繁，请 {seconds} 秒后再试', seconds, 'ip')
+        # 带 X-Student-Id 头的请求在这里就按学号限流，其余的在路由中读到学号后再检查
+        error = check_student_rate(request.headers.get('X-Student-Id'))
+        if error:
+            return error
+    if request.endpoint in ADMISSION_ENDPOINTS and upload_slots is not None:
+        if not upload_slots.try_acquire():
+            return reject_request(503, '服务器繁忙，请稍后再试', BUSY_RETRY_AFTER, 'busy')
+        g.upload_slot = True
+
+@app.teardown_request
+def release_upload_slot(exc):
+    if g.pop('upload_slot', False):
+        upload_slots.release()
+
+def submission_key(homework_id, student_id, student_name, filename=None):
+    # 存储键与本地目录结构一致：homework_<作业 id>/<学号>_<姓名>/<文件名>
+    return join_key(f"homework_{homework_id}", f"{student_id}_{student_name}", filename)
+
+def store_uploaded_file(key, stream, digest=None):
+    storage.put(key, stream)
+    # 开启去重存储时，内容相同的文件只保留一份
+    if blob_store:
+        blob_store.adopt(storage.local_path(key), digest)
+
+def remove_stored_dir(prefix):
+    """删除作业或学生目录：本机的提交记录和存储中的文件，返回本机目录是否存在"""
+    directory = os.path.join(UPLOAD_FOLDER, *prefix.split('/'))
+    existed = os.path.exists(directory)
+    if existed:
+        shutil.rmtree(directory)
+        # 目录删除后回收不再被引用的文件内容
+        if blob_store:
+            blob_store.release(directory)
+    if not storage.is_local:
+        storage.delete_prefix(prefix)
+    return existed
+
+def send_stored_file(key, download_name=None, max_age=None):
+    """发送存储中的文件：对象存储重定向到临时链接，本地文件由 send_file 发送（支持 ETag 和 Range）"""
+    url = storage.download_url(key, download_name)
+    if url:
+        return redirect(url)
+    path = storage.local_path(key)
+    if not os.path.isfile(path):
+        return jsonify({'success': False, 'message': '文件不存在'}), 404
+    return send_file(os.path.abspath(path), as_attachment=download_name is not None,
+                     download_name=download_name, conditional=True, max_age=max_age)
 
-def save_students_data(data):
-    with open(STUDENTS_DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def load_homework_data():
+    return repo.load_homework()
 
-def load_leave_data():
-    if os.path.exists(LEAVE_DATA_FILE):
-        with open(LEAVE_DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {'leaves': []}
+def load_students_data():
+    return repo.load_students()
 
-def save_leave_data(data):
-    with open(LEAVE_DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def load_leave_data():
+    return repo.load_leaves()
+
+# 列表接口允许排序的字段
+STUDENT_SORT_FIELDS = ('id', 'studentId', 'name')
+SUBMISSION_SORT_FIELDS = ('student_id', 'student_name', 'submit_time')
+LEAVE_SORT_FIELDS = ('id', 'studentId', 'studentName', 'submitTime', 'status')
+
+def parse_date_arg(name):
+    """读取 YYYY-MM-DD 格式的日期参数，未提供时返回 None"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise ValueError('日期格式错误')
+
+def list_response(key, query, total, page, **extra):
+    # 请求中带有分页参数时附加分页信息
+    result = dict(extra, **{key: [query.project(r) for r in page]})
+    if ListQuery.requested(request.args):
+        result.update(query.meta(total))
+    return jsonify(result)
+
+# 读多写少的接口缓存序列化结果，数据版本号变化时失效
+response_cache = ResponseCache()
+
+def cached_json_response(key, version, build):
+    """返回带 ETag / Last-Modified 的 JSON 响应，客户端缓存仍有效时返回 304"""
+    body, etag, last_modified = response_cache.get(
+        key, version, lambda: f"{app.json.dumps(build())}\n".encode('utf-8'))
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # 浏览器每次都带上 ETag 来验证，数据没变时只返回 304
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.cli.command('rebuild-submission-index')
+def rebuild_submission_index():
+    """根据 uploads/ 目录重建作业提交索引"""
+    if STORAGE_ENGINE == 'sqlite':
+        print('SQLite 存储引擎的提交记录保存在数据库中，无需重建索引')
+        return
+    count = repo.submission_index.rebuild()
+    print(f'提交索引重建完成，共 {count} 个学生提交目录')
 
 # 学生管理 API
 @app.route('/api/students', methods=['GET'])
 def get_students():
-    data = load_students_data()
-    return jsonify(data)
+    if not ListQuery.requested(request.args):
+        return cached_json_response('students', repo.version('students'), load_students_data)
+    try:
+        query = ListQuery.from_args(request.args, STUDENT_SORT_FIELDS)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    total, page = query.page(load_students_data()['students'])
+    return list_response('students', query, total, page)
 
 @app.route('/api/students', methods=['POST'])
 def add_student():
@@ -108,26 +427,75 @@ def add_student():
         if not all([student_data.get('studentId'), student_data.get('name')]):
             return jsonify({'success': False, 'message': '缺少必要信息'}), 400
         
-        data = load_students_data()
-        # 检查学号是否已存在
-        if any(s['studentId'] == student_data['studentId'] for s in data['students']):
+        # 学号已存在时不添加，查重和写入由仓库原子完成
+        if repo.insert_student({
+            'studentId': student_data['studentId'],
+            'name': student_data['name']
+        }) is None:
             return jsonify({'success': False, 'message': '该学号已存在'}), 400
         
-        # 生成唯一ID
-        student_id = 1
-        if data['students']:
-            student_id = max(s['id'] for s in data['students']) + 1
+        return jsonify({'success': True, 'message': '添加学生成功'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+def parse_roster_csv(text):
+    """解析名单 CSV：第一行为表头（学号,姓名 或 studentId,name）时按表头取列，否则前两列为学号和姓名"""
+    rows = list(csv.reader(io.StringIO(text)))
+    if not rows:
+        return []
+    header = [c.strip() for c in rows[0]]
+    id_col = next((header.index(k) for k in ('学号', 'studentId') if k in header), None)
+    name_col = next((header.index(k) for k in ('姓名', 'name') if k in header), None)
+    if id_col is None or name_col is None:
+        id_col, name_col = 0, 1
+    else:
+        rows = rows[1:]
+    return [{'studentId': row[id_col] if len(row) > id_col else '',
+             'name': row[name_col] if len(row) > name_col else ''} for row in rows if any(c.strip() for c in row)]
+
+@app.route('/api/students/import', methods=['POST'])
+def import_students():
+    try:
+        # 支持上传 CSV 文件（字段 file），或 JSON：{"students": [{"studentId": ..., "name": ...}]}
+        if 'file' in request.files:
+            records = parse_roster_csv(request.files['file'].read().decode('utf-8-sig'))
+        else:
+            records = (request.get_json(silent=True) or {}).get('students')
+            if not isinstance(records, list):
+                return jsonify({'success': False, 'message': '请上传 CSV 文件或提供 students 列表'}), 400
         
-        new_student = {
-            'id': student_id,
-            'studentId': student_data['studentId'],
-            'name': student_data['name']
-        }
+        # 一次遍历完成校验和查重，每条记录都返回处理结果
+        results = []
+        valid = []
+        seen = set()
+        for row, record in enumerate(records, start=1):
+            record = record if isinstance(record, dict) else {}
+            student_id = str(record.get('studentId') or '').strip()
+            name = str(record.get('name') or '').strip()
+            result = {'row': row, 'studentId': student_id, 'name': name}
+            if not student_id or not name:
+                result.update(status='error', message='缺少学号或姓名')
+            elif student_id in seen:
+                result.update(status='skipped', message='与前面的记录学号重复')
+            elif repo.find_student(student_id):
+                result.update(status='skipped', message='该学号已存在')
+            else:
+                result.update(status='imported')
+                valid.append((result, {'studentId': student_id, 'name': name}))
+            seen.add(student_id)
+            results.append(result)
         
-        data['students'].append(new_student)
-        save_students_data(data)
+        # 查重之后其他请求可能已经添加了相同学号，以仓库写入时的结果为准
+        inserted = repo.insert_students([record for _, record in valid])
+        for (result, _), student in zip(valid, inserted):
+            if student is None:
+                result.update(status='skipped', message='该学号已存在')
+        imported = sum(1 for student in inserted if student is not None)
         
-        return jsonify({'success': True, 'message': '添加学生成功'})
+        return jsonify({'success': True, 'message': f'成功导入 {imported} 名学生',
+                        'imported': imported, 'results': results})
+    except UnicodeDecodeError:
+        return jsonify({'success': False, 'message': 'CSV 文件需要使用 UTF-8 编码'}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -138,19 +506,16 @@ def update_student(student_id):
         if not all([student_data.get('studentId'), student_data.get('name')]):
             return jsonify({'success': False, 'message': '缺少必要信息'}), 400
         
-        data = load_students_data()
-        student_index = next((i for i, s in enumerate(data['students']) if s['id'] == student_id), None)
-        
-        if student_index is None:
-            return jsonify({'success': False, 'message': '学生不存在'}), 404
-            
         # 检查新学号是否与其他学生重复
-        if any(s['studentId'] == student_data['studentId'] and s['id'] != student_id for s in data['students']):
+        existing = repo.find_student(student_data['studentId'])
+        if existing and existing['id'] != student_id:
             return jsonify({'success': False, 'message': '该学号已存在'}), 400
         
-        data['students'][student_index]['studentId'] = student_data['studentId']
-        data['students'][student_index]['name'] = student_data['name']
-        save_students_data(data)
+        if not repo.update_student(student_id, {
+            'studentId': student_data['studentId'],
+            'name': student_data['name']
+        }):
+            return jsonify({'success': False, 'message': '学生不存在'}), 404
         
         return jsonify({'success': True, 'message': '更新学生信息成功'})
     except Exception as e:
@@ -159,9 +524,7 @@ def update_student(student_id):
 @app.route('/api/students/<int:student_id>', methods=['DELETE'])
 def delete_student(student_id):
     try:
-        data = load_students_data()
-        data['students'] = [s for s in data['students'] if s['id'] != student_id]
-        save_students_data(data)
+        repo.delete_student(student_id)
         return jsonify({'success': True, 'message': '删除学生成功'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -169,8 +532,7 @@ def delete_student(student_id):
 # 作业管理 API
 @app.route('/api/homework', methods=['GET'])
 def get_homework_list():
-    data = load_homework_data()
-    return jsonify(data)
+    return cached_json_response('homework', repo.version('homework'), load_homework_data)
 
 @app.route('/api/homework', methods=['POST'])
 def add_homework():
@@ -180,27 +542,26 @@ def add_homework():
                    homework_data.get('deadline'), homework_data.get('requirements')]):
             return jsonify({'success': False, 'message': '缺少必要信息'}), 400
         
-        data = load_homework_data()
-        # 生成唯一ID
-        homework_id = 1
-        if data['homework']:
-            homework_id = max(h['id'] for h in data['homework']) + 1
+        message = compile_file_name_formats(homework_data)
+        if message:
+            return jsonify({'success': False, 'message': message}), 400
+        try:
+            max_file_size = parse_max_file_size(homework_data)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
         
-        new_homework = {
-            'id': homework_id,
+        new_homework = repo.insert_homework({
             'course_name': homework_data['courseName'],
             'title': homework_data['title'],
             'description': homework_data['requirements'],
             'deadline': homework_data['deadline'],
             'fileNameFormats': homework_data.get('fileNameFormats', ['{学号}_{姓名}_实验{作业编号}.docx']),
+            'maxFileSize': max_file_size,
             'status': 'active'
-        }
-        
-        data['homework'].append(new_homework)
-        save_homework_data(data)
+        })
         
         # 创建作业目录
-        homework_dir = os.path.join(UPLOAD_FOLDER, f"homework_{homework_id}")
+        homework_dir = os.path.join(UPLOAD_FOLDER, f"homework_{new_homework['id']}")
         if not os.path.exists(homework_dir):
             os.makedirs(homework_dir)
         
@@ -211,16 +572,12 @@ def add_homework():
 @app.route('/api/homework/<int:homework_id>', methods=['DELETE'])
 def delete_homework(homework_id):
     try:
-        data = load_homework_data()
-        data['homework'] = [h for h in data['homework'] if h['id'] != homework_id]
-        save_homework_data(data)
+        repo.delete_homework(homework_id)
         
-        # 删除作业目录
-        homework_dir = os.path.join(UPLOAD_FOLDER, f"homework_{homework_id}")
-        if os.path.exists(homework_dir):
-            shutil.rmtree(homework_dir)
+        # 作业目录在后台删除
+        job = jobs.submit('删除作业目录', purge_homework_dirs_job, [homework_id])
         
-        return jsonify({'success': True, 'message': '删除作业成功'})
+        return jsonify({'success': True, 'message': '删除作业成功', 'jobId': job['id']})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -232,29 +589,193 @@ def update_homework(homework_id):
                    homework_data.get('deadline'), homework_data.get('requirements')]):
             return jsonify({'success': False, 'message': '缺少必要信息'}), 400
         
-        data = load_homework_data()
-        homework_index = next((i for i, h in enumerate(data['homework']) if h['id'] == homework_id), None)
-        
-        if homework_index is None:
-            return jsonify({'success': False, 'message': '作业不存在'}), 404
+        message = compile_file_name_formats(homework_data)
+        if message:
+            return jsonify({'success': False, 'message': message}), 400
+        try:
+            max_file_size = parse_max_file_size(homework_data)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
         
-        data['homework'][homework_index].update({
+        if not repo.update_homework(homework_id, {
             'course_name': homework_data['courseName'],
             'title': homework_data['title'],
             'description': homework_data['requirements'],
             'deadline': homework_data['deadline'],
-            'fileNameFormats': homework_data.get('fileNameFormats', ['{学号}_{姓名}_实验{作业编号}.docx'])
-        })
+            'fileNameFormats': homework_data.get('fileNameFormats', ['{学号}_{姓名}_实验{作业编号}.docx']),
+            'maxFileSize': max_file_size
+        }):
+            return jsonify({'success': False, 'message': '作业不存在'}), 404
         
-        save_homework_data(data)
         return jsonify({'success': True, 'message': '更新作业成功'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+def already_submitted():
+    return jsonify({'success': False, 'message': '您已经提交过该作业，如需重新提交，请联系聪明的学委'}), 400
+
+def check_submission_allowed(student_name, student_id, homework_id):
+    """校验学生身份、作业是否存在、是否截止以及是否已提交，返回 (作业, 错误响应)"""
+    # 验证学生信息
+    student = repo.find_student(student_id, student_name)
+    
+    if not student:
+        return None, (jsonify({'success': False, 'message': '学生信息不存在或姓名与学号不匹配'}), 400)
+
+    # 获取作业信息
+    homework = repo.get_homework(homework_id)
+    
+    if not homework:
+        return None, (jsonify({'success': False, 'message': '作业不存在'}), 404)
+
+    # 检查是否已截止
+    deadline = parse_deadline(homework['deadline'])
+    if deadline is None:
+        return None, (jsonify({'success': False, 'message': '作业截止日期格式错误'}), 400)
+
+    if datetime.now() > deadline:
+        return None, (jsonify({'success': False, 'message': '作业已截止'}), 400)
+
+    # 检查是否已经提交过（保存时在锁内还会再检查一次）
+    if repo.get_submissions(homework_id, student_id, student_name):  # 如果已经有提交记录
+        return None, already_submitted()
+
+    return homework, None
+
+def check_file_name(homework, student_id, student_name, homework_id, filename):
+    """校验文件名是否符合作业要求的命名格式，不符合时返回错误提示"""
+    # 通配符和正则格式可能匹配到带路径的文件名，统一拒绝
+    if not filename or filename != os.path.basename(filename) or '\\' in filename or filename in ('.', '..'):
+        return '文件名不能包含路径'
+    matcher = compile_formats(normalize_formats(homework.get('fileNameFormats')))
+    matched, format_examples = matcher.match(filename, student_id, student_name, homework_id)
+    if matched:
+        return None
+    
+    if format_examples:
+        return f'文件名格式不正确，请按照以下任一格式命名：\n' + '\n'.join(format_examples)
+    return '文件名格式不正确，请检查作业要求中的文件命名格式'
+
+def parse_max_file_size(homework_data):
+    """作业的单个文件大小上限（字节），为空表示使用默认上限"""
+    value = homework_data.get('maxFileSize')
+    if value in (None, ''):
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        value = 0
+    if value <= 0:
+        raise ValueError('文件大小上限必须是正整数（字节）')
+    return value
+
+def homework_file_limit(homework):
+    # 作业单独设置的上限优先，否则使用默认上限；返回 None 表示不限制
+    return homework.get('maxFileSize') or MAX_UPLOAD_FILE_SIZE or None
+
+def check_upload_files(homework, student_id, student_name, homework_id, files):
+    """上传前检查文件名和大小，files 为 [{'filename', 'size'}]，不符合时返回 (错误提示, 状态码)"""
+    limit = homework_file_limit(homework)
+    for f in files:
+        message = check_file_name(homework, student_id, student_name, homework_id, f.get('filename'))
+        if message:
+            return message, 400
+        size = f.get('size')
+        if limit and size is not None and int(size) > limit:
+            return f"{f['filename']} 超过文件大小上限 {format_size(limit)}", 413
+    return None, None
+
+def compile_file_name_formats(homework_data):
+    """作业创建或修改时编译文件命名格式，格式有误时返回错误提示"""
+    matcher = compile_formats(normalize_formats(homework_data.get('fileNameFormats')))
+    if matcher.errors:
+        return '文件命名格式有误：\n' + '\n'.join(matcher.errors)
+    return None
+
+def student_submission_dir(homework_id, student_id, student_name):
+    # 学生提交目录（使用学号_姓名命名）
+    return os.path.join(UPLOAD_FOLDER, f"homework_{homework_id}", f"{student_id}_{student_name}")
+
+def record_submission(homework_id, student_id, student_name, description, saved_files):
+    """在保存文件之前登记提交记录，已经提交过时返回 False。
+
+    检查和登记在同一把锁（SQLite 为同一个事务）内完成，多个 worker 同时处理同一学生的
+    提交时只有一个能继续保存文件，不会互相覆盖。
+    """
+    submission = {
+        # 与原来首次提交后统计学生目录得到的编号一致（目录中只有本次提交的文件），不再遍历目录
+        'id': len(saved_files),
+        'student_name': student_name,
+        'student_id': student_id,
+        'homework_id': homework_id,
+        'description': description,
+        'filenames': saved_files,
+        'submit_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'status': '已提交'
+    }
+
+    return repo.add_submission(homework_id, student_id, student_name, submission)
+
+def discard_submission(homework_id, student_id, student_name):
+    # 登记之后保存文件失败：撤销提交记录，删除已经保存的部分文件，学生可以重新提交
+    repo.delete_submissions(homework_id, student_id, student_name)
+    remove_stored_dir(submission_key(homework_id, student_id, student_name))
+
+def upload_identity_from_headers():
+    """读取 X-Student-Id、X-Student-Name（URL 编码）和 X-Homework-Id 请求头，不完整时返回 None"""
+    student_id = request.headers.get('X-Student-Id')
+    student_name = request.headers.get('X-Student-Name')
+    homework_id = request.headers.get('X-Homework-Id')
+    if not all([student_id, student_name, homework_id]):
+        return None
+    return unquote(student_name), student_id, homework_id
+
+@app.route('/api/homework/upload/preflight', methods=['POST'])
+def preflight_upload():
+    """上传前检查：身份、截止时间、是否已提交、文件名和大小，全部通过后再上传文件内容"""
+    try:
+        data = request.json or {}
+        student_name = data.get('studentName')
+        student_id = data.get('studentId')
+        homework_id = str(data.get('homeworkId') or '')
+        files = data.get('files') or []
+
+        if not all([student_name, student_id, homework_id, files]):
+            return jsonify({'success': False, 'message': '缺少必要信息'}), 400
+        error = check_student_rate(student_id)
+        if error:
+            return error
+
+        homework, error = check_submission_allowed(student_name, student_id, homework_id)
+        if error:
+            return error
+
+        message, status = check_upload_files(homework, student_id, student_name, homework_id, files)
+        if message:
+            return jsonify({'success': False, 'message': message}), status
+
+        return jsonify({'success': True, 'message': '可以提交', 'maxFileSize': homework_file_limit(homework)})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @app.route('/api/homework/upload', methods=['POST'])
 def upload_homework():
     try:
-        student_name = request.form.get('studentName')
+        # 请求头带有身份信息时，在读取请求体之前完成校验，迟交或重复提交不必等整个文件上传完
+        identity = upload_identity_from_headers()
+        if identity:
+            homework, error = check_submission_allowed(*identity)
+            if error:
+                return error
+            # 解析表单时超过大小上限的文件立即中止
+            g.upload_file_limit = homework_file_limit(homework)
+
+        try:
+            student_name = request.form.get('studentName')
+        except UploadTooLarge as e:
+            return jsonify({'success': False, 'message': str(e)}), 413
         student_id = request.form.get('studentId')
         homework_id = request.form.get('homeworkId')
         description = request.form.get('description')
@@ -262,141 +783,188 @@ def upload_homework():
 
         if not all([student_name, student_id, homework_id]):
             return jsonify({'success': False, 'message': '缺少必要信息'}), 400
+        if identity and identity != (student_name, student_id, homework_id):
+            return jsonify({'success': False, 'message': '请求头与表单中的学生或作业信息不一致'}), 400
+        error = check_student_rate(student_id)
+        if error:
+            return error
+
+        homework, error = check_submission_allowed(student_name, student_id, homework_id)
+        if error:
+            return error
+
+        # 先检查全部文件（文件名、大小、客户端提供的 SHA-256），都通过后再保存
+        uploads = []
+        for i in range(file_count):
+            file = request.files.get(f'file{i}')
+            if file:
+                message, status = check_upload_files(homework, student_id, student_name, homework_id,
+                                                     [{'filename': file.filename, 'size': file.stream.size}])
+                if message:
+                    return jsonify({'success': False, 'message': message}), status
+                # 摘要在接收文件时已经算好
+                digest = file.stream.hexdigest()
+                try:
+                    expected = normalize_sha256(request.form.get(f'file{i}Sha256'))
+                except ValueError as e:
+                    return jsonify({'success': False, 'message': str(e)}), 400
+                if expected and expected != digest:
+                    return jsonify({'success': False, 'message': f'{file.filename} 校验失败，文件在上传过程中损坏，请重新提交'}), 400
+                uploads.append((file, digest))
+
+        if not uploads:
+            return jsonify({'success': False, 'message': '没有文件被上传'}), 400
 
-        # 验证学生信息
-        students_data = load_students_data()
-        student = next((s for s in students_data['students'] 
-                       if s['studentId'] == student_id and s['name'] == student_name), None)
-        
-        if not student:
-            return jsonify({'success': False, 'message': '学生信息不存在或姓名与学号不匹配'}), 400
-
-        # 获取作业信息
-        homework_data = load_homework_data()
-        homework = next((h for h in homework_data['homework'] if str(h['id']) == str(homework_id)), None)
+        # 创建学生提交目录（如果不存在）
+        student_dir = student_submission_dir(homework_id, student_id, student_name)
+        os.makedirs(student_dir, exist_ok=True)
         
-        if not homework:
-            return jsonify({'success': False, 'message': '作业不存在'}), 404
+        # 先登记提交记录，同一学生同时提交的请求只有一个能继续保存文件
+        saved_files = [file.filename for file, _ in uploads]
+        if not record_submission(homework_id, student_id, student_name, description, saved_files):
+            return already_submitted()
 
-        # 检查是否已截止
+        # 保存所有文件
         try:
-            deadline = datetime.fromisoformat(homework['deadline'].replace('Z', '+00:00'))
-        except ValueError:
-            try:
-                deadline = datetime.strptime(homework['deadline'], '%Y-%m-%d %H:%M')
-            except ValueError:
-                return jsonify({'success': False, 'message': '作业截止日期格式错误'}), 400
+            for file, digest in uploads:
+                store_uploaded_file(submission_key(homework_id, student_id, student_name, file.filename),
+                                    file.stream, digest)
+        except Exception:
+            discard_submission(homework_id, student_id, student_name)
+            raise
 
-        if datetime.now() > deadline:
-            return jsonify({'success': False, 'message': '作业已截止'}), 400
+        return jsonify({'success': True, 'message': '作业提交成功'})
 
-        # 检查是否已经提交过
+    except Exception as e:
+        print(e)
+        return jsonify({'success': False, 'message': str("你已经提交过该作业，如需重新提交，联系学委")}), 500
 
-        homework_dir = os.path.join(UPLOAD_FOLDER, f"homework_{homework_id}")
-        student_dir = os.path.join(homework_dir, f"{student_id}_{student_name}")
-        submissions_file = os.path.join(student_dir, 'submissions.json')
-        
-        if os.path.exists(submissions_file):
-            with open(submissions_file, 'r', encoding='utf-8') as f:
-                submissions = json.load(f)
-                if submissions:  # 如果已经有提交记录
-                    return jsonify({'success': False, 'message': '您已经提交过该作业，如需重新提交，请联系聪明的学委'}), 400
+# 分片续传上传 API：初始化会话 -> 上传分片（可并行、可断点续传）-> 提交
+@app.route('/api/homework/upload/init', methods=['POST'])
+def init_chunked_upload():
+    try:
+        data = request.json or {}
+        student_name = data.get('studentName')
+        student_id = data.get('studentId')
+        homework_id = str(data.get('homeworkId') or '')
+        files = data.get('files') or []
 
-        # 创建作业目录（如果不存在）
-        if not os.path.exists(homework_dir):
-            os.makedirs(homework_dir)
+        if not all([student_name, student_id, homework_id, files]):
+            return jsonify({'success': False, 'message': '缺少必要信息'}), 400
+        error = check_student_rate(student_id)
+        if error:
+            return error
 
-        # 创建学生提交目录（使用学号_姓名命名）
-        if not os.path.exists(student_dir):
-            os.makedirs(student_dir)
+        homework, error = check_submission_allowed(student_name, student_id, homework_id)
+        if error:
+            return error
 
-        # 获取文件命名格式
-        fileNameFormats = homework.get('fileNameFormats', ['{学号}_{姓名}_实验{作业编号}.docx'])
-        if isinstance(fileNameFormats, str):
-            fileNameFormats = [fileNameFormats]
-        
-        # 保存所有文件
-        saved_files = []
-        for i in range(file_count):
-            file = request.files.get(f'file{i}')
-            if file:
-                # 验证文件名格式
-                filename = file.filename
-                valid_format = False
-                for format_str in fileNameFormats:
-                    try:
-                        expectedFileName = format_str.format(
-                            学号=student_id,
-                            姓名=student_name,
-                            作业编号=homework_id
-                        )
-                        if filename == expectedFileName:
-                            valid_format = True
-                            break
-                    except KeyError as e:
-                        # 如果格式字符串中包含不支持的占位符，跳过该格式
-                        continue
-                
-                if not valid_format:
-                    # 生成格式示例
-                    format_examples = []
-                    for f in fileNameFormats:
-                        try:
-                            example = f.format(
-                                学号=student_id,
-                                姓名=student_name,
-                                作业编号=homework_id
-                            )
-                            format_examples.append(example)
-                        except KeyError:
-                            continue
-                    
-                    if format_examples:
-                        return jsonify({
-                            'success': False, 
-                            'message': f'文件名格式不正确，请按照以下任一格式命名：\n' + 
-                                     '\n'.join(format_examples)
-                        }), 400
-                    else:
-                        return jsonify({
-                            'success': False, 
-                            'message': '文件名格式不正确，请检查作业要求中的文件命名格式'
-                        }), 400
-                
-                file_path = os.path.join(student_dir, filename)
-                file.save(file_path)
-                saved_files.append(filename)
-
-        if not saved_files:
-            return jsonify({'success': False, 'message': '没有文件被上传'}), 400
+        message, status = check_upload_files(homework, student_id, student_name, homework_id, files)
+        if message:
+            return jsonify({'success': False, 'message': message}), status
 
-        # 保存提交记录
-        submission = {
-            'id': len(os.listdir(student_dir)),
-            'student_name': student_name,
-            'student_id': student_id,
+        student_dir = student_submission_dir(homework_id, student_id, student_name)
+        os.makedirs(student_dir, exist_ok=True)
+        session = upload_sessions.create(student_dir, {
             'homework_id': homework_id,
-            'description': description,
-            'filenames': saved_files,
-            'submit_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'status': '已提交'
-        }
+            'student_id': student_id,
+            'student_name': student_name,
+            'description': data.get('description')
+        }, files)
 
-        submissions = []
-        if os.path.exists(submissions_file):
-            with open(submissions_file, 'r', encoding='utf-8') as f:
-                submissions = json.load(f)
-        
-        submissions.append(submission)
-        
-        with open(submissions_file, 'w', encoding='utf-8') as f:
-            json.dump(submissions, f, ensure_ascii=False, indent=2)
+        return jsonify({
+            'success': True,
+            'uploadId': session['id'],
+            'chunkSize': session['chunk_size'],
+            'files': [{'filename': f['filename'], 'totalChunks': f['total_chunks']} for f in session['files']]
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        print(f"初始化分片上传错误: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
 
-        return jsonify({'success': True, 'message': '作业提交成功'})
+@app.route('/api/homework/upload/<upload_id>', methods=['GET'])
+def get_chunked_upload(upload_id):
+    session = upload_sessions.get(upload_id)
+    if not session:
+        return jsonify({'success': False, 'message': '上传会话不存在或已过期'}), 404
+    return jsonify({
+        'success': True,
+        'uploadId': upload_id,
+        'chunkSize': session['chunk_size'],
+        'missing': upload_sessions.missing_chunks(session)
+    })
+
+@app.route('/api/homework/upload/<upload_id>/<int:file_index>/<int:chunk_index>', methods=['PUT'])
+def put_upload_chunk(upload_id, file_index, chunk_index):
+    try:
+        if not upload_sessions.get(upload_id):
+            return jsonify({'success': False, 'message': '上传会话不存在或已过期'}), 404
+        # X-Chunk-Sha256 为该分片的 SHA-256，写入时一并校验
+        upload_sessions.write_chunk(upload_id, file_index, chunk_index, request.stream, request.content_length,
+                                    normalize_sha256(request.headers.get('X-Chunk-Sha256')))
+        return jsonify({'success': True})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        print(f"上传分片错误: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/homework/upload/<upload_id>/commit', methods=['POST'])
+def commit_chunked_upload(upload_id):
+    try:
+        session = upload_sessions.get(upload_id)
+        if not session:
+            return jsonify({'success': False, 'message': '上传会话不存在或已过期'}), 404
+
+        homework_id = session['homework_id']
+        student_id = session['student_id']
+        student_name = session['student_name']
+
+        homework, error = check_submission_allowed(student_name, student_id, homework_id)
+        if error:
+            upload_sessions.abort(upload_id)
+            return error
+
+        for f in session['files']:
+            message = check_file_name(homework, student_id, student_name, homework_id, f['filename'])
+            if message:
+                upload_sessions.abort(upload_id)
+                return jsonify({'success': False, 'message': message}), 400
+
+        if upload_sessions.missing_chunks(session):
+            return jsonify({'success': False, 'message': '还有分片未上传完成',
+                            'missing': upload_sessions.missing_chunks(session)}), 409
+
+        # 先登记提交记录再把分片拼成正式文件，并发提交的另一个请求不会覆盖已提交的文件。
+        # 登记失败时不取消会话：可能是同一会话重复提交，另一个请求正在完成它，会话过期后自动清理
+        if not record_submission(homework_id, student_id, student_name, session['description'],
+                                 [f['filename'] for f in session['files']]):
+            return already_submitted()
+        try:
+            saved_files = upload_sessions.finish(upload_id)
+            for filename in saved_files:
+                # 分片先在本机拼成完整文件，再放入存储
+                key = submission_key(homework_id, student_id, student_name, filename)
+                storage.put_file(key, os.path.join(session['student_dir'], filename))
+                if blob_store:
+                    blob_store.adopt(storage.local_path(key))
+        except Exception:
+            discard_submission(homework_id, student_id, student_name)
+            raise
 
+        return jsonify({'success': True, 'message': '作业提交成功'})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
-        print(e)
-        return jsonify({'success': False, 'message': str("你已经提交过该作业，如需重新提交，联系学委")}), 500
+        print(f"提交分片上传错误: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/homework/upload/<upload_id>', methods=['DELETE'])
+def abort_chunked_upload(upload_id):
+    upload_sessions.abort(upload_id)
+    return jsonify({'success': True, 'message': '上传已取消'})
 
 # 作业提交情况 API
 @app.route('/api/submissions', methods=['GET'])
@@ -406,52 +974,36 @@ def get_submissions():
         student_id = request.args.get('studentId')
         student_name = request.args.get('studentName')
         course = request.args.get('course', '')
+        homework_id = request.args.get('homeworkId', '')
+        try:
+            date_from = parse_date_arg('dateFrom')
+            date_to = parse_date_arg('dateTo')
+            query = ListQuery.from_args(request.args, SUBMISSION_SORT_FIELDS)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
         
         # 获取所有作业
         homework_data = load_homework_data()
         homework_list = homework_data['homework']
         
-        # 如果指定了课程，则过滤作业
+        # 如果指定了课程或作业，则过滤作业
         if course:
             homework_list = [h for h in homework_list if h['course_name'] == course]
+        if homework_id:
+            homework_list = [h for h in homework_list if str(h['id']) == homework_id]
+        homework_by_id = {str(h['id']): h for h in homework_list}
         
-        # 获取所有提交
-        submissions = []
-        for homework in homework_list:
-            homework_id = homework['id']
-            homework_dir = os.path.join(UPLOAD_FOLDER, f"homework_{homework_id}")
-            
-            if not os.path.exists(homework_dir):
-                continue
-                
-            # 查找该作业的所有学生提交目录
-            for student_dir_name in os.listdir(homework_dir):
-                student_dir = os.path.join(homework_dir, student_dir_name)
-                if not os.path.isdir(student_dir):
-                    continue
-                    
-                submissions_file = os.path.join(student_dir, 'submissions.json')
-                
-                if os.path.exists(submissions_file):
-                    with open(submissions_file, 'r', encoding='utf-8') as f:
-                        student_submissions = json.load(f)
-                        for submission in student_submissions:
-                            # 添加作业标题和课程名称
-                            submission['homeworkTitle'] = homework['title']
-                            submission['courseName'] = homework['course_name']
-                            submissions.append(submission)
-        
-        # 新增过滤逻辑
-        if student_id or student_name:
-            filtered = []
-            for submission in submissions:
-                match_id = not student_id or (submission['student_id'] == student_id)
-                match_name = not student_name or (submission['student_name'].lower() == student_name.lower())
-                if match_id and match_name:
-                    filtered.append(submission)
-            return jsonify({'submissions': filtered})
-            
-        return jsonify({'submissions': submissions})
+        # 学生和日期条件在索引/数据库中过滤，只取出命中的提交记录
+        submissions = repo.query_submissions(list(homework_by_id), student_id, student_name, date_from, date_to)
+        total, page = query.page(submissions)
+        
+        # 只为当前页添加作业标题和课程名称
+        for submission in page:
+            homework = homework_by_id[str(submission['homework_id'])]
+            submission['homeworkTitle'] = homework['title']
+            submission['courseName'] = homework['course_name']
+        
+        return list_response('submissions', query, total, page)
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -459,12 +1011,14 @@ def get_submissions():
 @app.route('/api/submissions/<int:homework_id>/<string:student_id>/<string:filename>', methods=['GET'])
 def download_submission(homework_id, student_id, filename):
     try:
-        file_path = os.path.join(UPLOAD_FOLDER, f"homework_{homework_id}", f"student_{student_id}", filename)
-        
-        if not os.path.exists(file_path):
+        # 文件保存在 学号_姓名 目录下，姓名从提交记录中获取
+        submission = next((s for s in repo.list_submissions(homework_id, student_id)
+                           if filename in s['filenames']), None)
+        if submission is None:
             return jsonify({'success': False, 'message': '文件不存在'}), 404
-            
-        return send_file(file_path, as_attachment=True)
+
+        return send_stored_file(submission_key(homework_id, student_id, submission['student_name'], filename),
+                                download_name=filename)
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -480,21 +1034,18 @@ def submit_leave():
 
         if not all([student_name, student_id, leave_type, reason]):
             return jsonify({'success': False, 'message': '缺少必要信息'}), 400
+        error = check_student_rate(student_id)
+        if error:
+            return error
 
         # 验证学生信息
-        students_data = load_students_data()
-        student = next((s for s in students_data['students'] 
-                       if s['studentId'] == student_id and s['name'] == student_name), None)
+        student = repo.find_student(student_id, student_name)
         
         if not student:
             return jsonify({'success': False, 'message': '学生信息不存在或姓名与学号不匹配'}), 400
 
         # 检查是否已经提交过今天的请假申请
-        data = load_leave_data()
-        today = datetime.now().date()
-        existing_leave = next((leave for leave in data['leaves'] 
-                             if leave['studentId'] == student_id and 
-                             datetime.strptime(leave['submitTime'], '%Y-%m-%d %H:%M:%S').date() == today), None)
+        existing_leave = repo.find_leave(student_id, datetime.now().strftime('%Y-%m-%d'))
         
         if existing_leave:
             return jsonify({'success': False, 'message': '您今天已经提交过请假申请，不能重复提交'}), 400
@@ -506,23 +1057,15 @@ def submit_leave():
             images = request.files.getlist('leaveImages')
             for image in images:
                 if image.filename:  # 确保文件存在
-                    # 生成唯一的文件名
+                    # 生成唯一的文件名；同一秒内的重复提交会被拒绝并删除图片，不能与已保存的图片同名
                     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    filename = f"{student_name}_{student_id}_{timestamp}_{image.filename}"
-                    # 确保上传目录存在
-                    os.makedirs('uploads/leave_images', exist_ok=True)
+                    filename = f"{student_name}_{student_id}_{timestamp}_{uuid.uuid4().hex[:8]}_{image.filename}"
                     # 保存文件
-                    file_path = os.path.join('uploads/leave_images', filename)
-                    image.save(file_path)
+                    storage.put(media.source_key(filename), image.stream)
                     image_filenames.append(filename)
 
-        # 生成请假记录
-        leave_id = 1
-        if data['leaves']:
-            leave_id = max(l['id'] for l in data['leaves']) + 1
-
-        new_leave = {
-            'id': leave_id,
+        # 生成请假记录；同时提交的请求在写入时再查重一次
+        leave = repo.insert_leave({
             'studentName': student_name,
             'studentId': student_id,
             'leaveType': leave_type,
@@ -530,10 +1073,15 @@ def submit_leave():
             'leaveImages': image_filenames,  # 存储所有图片文件名
             'submitTime': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'status': '待审核'
-        }
+        })
+        if leave is None:
+            for filename in image_filenames:
+                storage.delete(media.source_key(filename))
+            return jsonify({'success': False, 'message': '您今天已经提交过请假申请，不能重复提交'}), 400
 
-        data['leaves'].append(new_leave)
-        save_leave_data(data)
+        # 后台生成缩略图，审核页面只需加载缩略图
+        if image_filenames:
+            jobs.submit('生成请假图片缩略图', media.generate, image_filenames)
 
         return jsonify({'success': True, 'message': '请假申请提交成功'})
     except Exception as e:
@@ -543,34 +1091,59 @@ def submit_leave():
 @app.route('/api/leave/list', methods=['GET'])
 def get_leave_list():
     try:
-        date = request.args.get('date')
-        data = load_leave_data()
-        
-        if date:
-            # 如果指定了日期，只返回该日期的请假记录
-            filtered_leaves = []
-            for leave in data['leaves']:
-                leave_date = datetime.strptime(leave['submitTime'], '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d')
-                if leave_date == date:
-                    filtered_leaves.append(leave)
-            return jsonify({'success': True, 'leaves': filtered_leaves})
-        
-        return jsonify({'success': True, 'leaves': data['leaves']})
+        try:
+            # date 为单日查询，dateFrom/dateTo 为日期区间
+            date = parse_date_arg('date')
+            date_from = date or parse_date_arg('dateFrom')
+            date_to = date or parse_date_arg('dateTo')
+            query = ListQuery.from_args(request.args, LEAVE_SORT_FIELDS)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        status = request.args.get('status') or None
+        student_id = request.args.get('studentId') or None
+        leaves = repo.query_leaves(date_from, date_to, status, student_id)
+        total, page = query.page(leaves)
+        page = [with_leave_image_urls(leave) for leave in page]
+        return list_response('leaves', query, total, page, success=True)
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+def leave_image_url(filename, size):
+    return f"/api/leave/images/{quote(filename)}?size={size}"
+
+def with_leave_image_urls(leave):
+    # 返回副本，列表中引用缩略图，点击后再加载网页版或原图
+    images = leave.get('leaveImages') or []
+    return dict(leave, leaveImageUrls=[{
+        'name': filename,
+        'thumb': leave_image_url(filename, 'thumb'),
+        'web': leave_image_url(filename, 'web'),
+        'original': leave_image_url(filename, 'original')
+    } for filename in images])
+
+@app.route('/api/leave/images/<path:filename>', methods=['GET'])
+def get_leave_image(filename):
+    size = request.args.get('size', 'thumb')
+    if size != 'original' and size not in IMAGE_VARIANTS:
+        return jsonify({'success': False, 'message': f"size 只能是 original 或 {'/'.join(IMAGE_VARIANTS)}"}), 400
+    # 只允许访问图片目录下的文件
+    if os.path.basename(filename) != filename or filename.startswith('.') \
+            or storage.stat(media.source_key(filename)) is None:
+        return jsonify({'success': False, 'message': '图片不存在'}), 404
+
+    # 还没有生成的规格在这里按需生成，无法生成时返回原图；send_file 支持 ETag 和 Range
+    path = media.get(filename, size) if size != 'original' else None
+    if path is None:
+        return send_stored_file(media.source_key(filename), max_age=LEAVE_IMAGE_MAX_AGE)
+    return send_file(os.path.abspath(path), conditional=True, max_age=LEAVE_IMAGE_MAX_AGE)
+
 @app.route('/api/leave/approve/<int:leave_id>', methods=['POST'])
 def approve_leave(leave_id):
     try:
-        data = load_leave_data()
-        leave_index = next((i for i, l in enumerate(data['leaves']) if l['id'] == leave_id), None)
-        
-        if leave_index is None:
+        if not repo.set_leave_status(leave_id, '已批准'):
             return jsonify({'success': False, 'message': '请假记录不存在'}), 404
         
-        data['leaves'][leave_index]['status'] = '已批准'
-        save_leave_data(data)
-        
         return jsonify({'success': True, 'message': '已批准请假申请'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -578,19 +1151,63 @@ def approve_leave(leave_id):
 @app.route('/api/leave/reject/<int:leave_id>', methods=['POST'])
 def reject_leave(leave_id):
     try:
-        data = load_leave_data()
-        leave_index = next((i for i, l in enumerate(data['leaves']) if l['id'] == leave_id), None)
-        
-        if leave_index is None:
+        if not repo.set_leave_status(leave_id, '已拒绝'):
             return jsonify({'success': False, 'message': '请假记录不存在'}), 404
         
-        data['leaves'][leave_index]['status'] = '已拒绝'
-        save_leave_data(data)
-        
         return jsonify({'success': True, 'message': '已拒绝请假申请'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/leave/batch', methods=['POST'])
+def batch_update_leaves():
+    try:
+        # {"action": "approve" | "reject", "ids": [1, 2, 3]}
+        data = request.get_json(silent=True) or {}
+        status = {'approve': '已批准', 'reject': '已拒绝'}.get(data.get('action'))
+        if status is None:
+            return jsonify({'success': False, 'message': 'action 只能是 approve 或 reject'}), 400
+        ids = data.get('ids')
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return jsonify({'success': False, 'message': 'ids 必须是请假记录 id 列表'}), 400
+        
+        updated = set(repo.set_leave_statuses(ids, status))
+        results = [{'id': i, 'status': status if i in updated else None,
+                    'success': i in updated, 'message': '' if i in updated else '请假记录不存在'}
+                   for i in ids]
+        return jsonify({'success': True, 'message': f'{status} {len(updated)} 条请假申请',
+                        'updated': len(updated), 'results': results})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+def purge_homework_dirs_job(progress, homework_ids):
+    # 删除作业目录
+    for i, homework_id in enumerate(homework_ids):
+        remove_stored_dir(f"homework_{homework_id}")
+        progress(i + 1, len(homework_ids))
+    return {'deleted': len(homework_ids)}
+
+def copy_submissions_job(progress, homework_id, save_path):
+    # 复制所有文件
+    submissions = repo.list_submissions(homework_id)
+    copied_files = []
+    for i, submission in enumerate(submissions):
+        for filename in submission['filenames']:
+            key = submission_key(homework_id, submission['student_id'], submission['student_name'], filename)
+            if storage.stat(key) is not None:
+                # 直接复制文件，保持原始文件名
+                dst_file = os.path.join(save_path, filename)
+                if blob_store:
+                    blob_store.export(storage.local_path(key), dst_file)
+                else:
+                    storage.copy_to(key, dst_file)
+                copied_files.append(filename)
+        progress(i + 1, len(submissions))
+
+    if not copied_files:
+        raise ValueError('没有找到任何提交的文件')
+    progress(len(submissions), len(submissions), f'已复制 {len(copied_files)} 个文件到目录: {save_path}')
+    return {'files': copied_files}
+
 @app.route('/api/homework/<int:homework_id>/download-all', methods=['POST'])
 def download_all_submissions(homework_id):
     try:
@@ -607,184 +1224,232 @@ def download_all_submissions(homework_id):
         if not os.path.exists(homework_dir):
             return jsonify({'message': '作业目录不存在'}), 404
 
-        # 复制所有文件
-        copied_files = []
-        for student_dir_name in os.listdir(homework_dir):
-            student_dir = os.path.join(homework_dir, student_dir_name)
-            if not os.path.isdir(student_dir):
-                continue
-
-            # 读取学生的提交记录
-            submissions_file = os.path.join(student_dir, 'submissions.json')
-            if not os.path.exists(submissions_file):
-                continue
-
-            with open(submissions_file, 'r', encoding='utf-8') as f:
-                submissions = json.load(f)
-                for submission in submissions:
-                    for filename in submission['filenames']:
-                        src_file = os.path.join(student_dir, filename)
-                        if os.path.exists(src_file):
-                            # 直接复制文件，保持原始文件名
-                            dst_file = os.path.join(save_path, filename)
-                            shutil.copy2(src_file, dst_file)
-                            copied_files.append(filename)
-
-        if not copied_files:
-            return jsonify({'message': '没有找到任何提交的文件'}), 404
+        job = jobs.submit('复制作业文件', copy_submissions_job, homework_id, save_path)
 
         return jsonify({
             'success': True,
-            'message': f'已复制 {len(copied_files)} 个文件到目录: {save_path}',
-            'files': copied_files
-        })
+            'message': '复制任务已提交，可在任务状态中查看进度',
+            'jobId': job['id']
+        }), 202
         
     except Exception as e:
         print(f"复制文件错误: {str(e)}")  # 添加错误日志
         return jsonify({'message': str(e)}), 500
 
+def submission_zip_entries(homework_id, per_student=False):
+    """列出某作业所有已提交文件，返回 [(归档内路径, 存储键, (大小, 修改时间)), ...]"""
+    entries = []
+    seen_keys = set()
+    seen_names = set()
+    for submission in repo.list_submissions(homework_id):
+        student_dir_name = f"{submission['student_id']}_{submission['student_name']}"
+        for filename in submission['filenames']:
+            key = submission_key(homework_id, submission['student_id'], submission['student_name'], filename)
+            if key in seen_keys:
+                continue
+            stat = storage.stat(key)
+            if stat is None:
+                continue
+            seen_keys.add(key)
+            arcname = f"{student_dir_name}/{filename}" if per_student else filename
+            if arcname in seen_names:
+                # 不分目录时不同学生可能交了同名文件，加上学号姓名区分，不能丢掉
+                stem, ext = os.path.splitext(arcname)
+                arcname = f"{stem}_{student_dir_name}{ext}"
+                counter = 2
+                while arcname in seen_names:
+                    arcname = f"{stem}_{student_dir_name}_{counter}{ext}"
+                    counter += 1
+            seen_names.add(arcname)
+            entries.append((arcname, key, stat))
+    return entries
+
+@app.route('/api/homework/<int:homework_id>/download-all.zip', methods=['GET'])
+def download_all_zip(homework_id):
+    try:
+        homework = repo.get_homework(homework_id)
+        if not homework:
+            return jsonify({'success': False, 'message': '作业不存在'}), 404
+
+        # folders=1 时每个学生的文件放在 学号_姓名/ 子目录下
+        per_student = request.args.get('folders') in ('1', 'true')
+        entries = submission_zip_entries(homework_id, per_student)
+        if not entries:
+            return jsonify({'success': False, 'message': '没有找到任何提交的文件'}), 404
+
+        try:
+            archive = ZipStream(entries, storage)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 413
+
+        etag = archive.etag()
+        start, stop, status = 0, archive.size, 200
+        # 支持 Range 断点续传；If-Range 不匹配或请求多个区间时返回完整归档（RFC 9110 允许忽略 Range）
+        if_range = request.if_range
+        if request.range and len(request.range.ranges) == 1 and \
+                (if_range.etag is None and if_range.date is None or if_range.etag == etag):
+            byte_range = request.range.range_for_length(archive.size)
+            if byte_range is None:
+                return Response(status=416, headers={'Content-Range': f'bytes */{archive.size}'})
+            start, stop = byte_range
+            status = 206
+
+        archive_name = f"{homework['course_name']}_{homework['title']}.zip"
+        response = Response(archive.iter_range(start, stop), status=status, mimetype='application/zip',
+                            direct_passthrough=True)
+        response.headers['Content-Length'] = str(stop - start)
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.headers['ETag'] = f'"{etag}"'
+        response.headers['Content-Disposition'] = (
+            f"attachment; filename=homework_{homework_id}.zip; filename*=UTF-8''{quote(archive_name)}")
+        if status == 206:
+            response.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{archive.size}'
+        return response
+    except Exception as e:
+        print(f"打包下载错误: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+def clear_cache_job(progress):
+    today = datetime.now().date()
+    two_days_ago = today - timedelta(days=2)
+    
+    # 清理今天之前的请假记录
+    repo.delete_leaves_before(today.strftime('%Y-%m-%d'))
+    
+    # 找出已截止两天的作业
+    expired_ids = []
+    for homework in load_homework_data()['homework']:
+        deadline = parse_deadline(homework['deadline'])
+        if deadline is not None and deadline.date() <= two_days_ago:
+            expired_ids.append(homework['id'])
+
+    # 先移除作业记录，再删除作业目录
+    for homework_id in expired_ids:
+        repo.delete_homework(homework_id)
+    purge_homework_dirs_job(progress, expired_ids)
+    progress(len(expired_ids), len(expired_ids), f'已清理 {len(expired_ids)} 个作业')
+    return {'homework': expired_ids}
+
 @app.route('/api/clear-cache', methods=['POST'])
 def clear_cache():
     try:
-        today = datetime.now().date()
-        two_days_ago = today - timedelta(days=2)
-        
-        # 清理请假记录
-        leave_data = load_leave_data()
-        old_leaves = [leave for leave in leave_data['leaves'] 
-                     if datetime.strptime(leave['submitTime'], '%Y-%m-%d %H:%M:%S').date() < today]
-        
-  
-        
-        # 更新请假记录
-        leave_data['leaves'] = [
-            leave for leave in leave_data['leaves']
-            if datetime.strptime(leave['submitTime'], '%Y-%m-%d %H:%M:%S').date() >= today
-        ]
-        save_leave_data(leave_data)
-        
-        # 清理作业记录
-        homework_data = load_homework_data()
-        for homework in homework_data['homework'][:]:
-            try:
-                deadline = datetime.strptime(homework['deadline'], '%Y-%m-%d %H:%M')
-                if deadline.date() <= two_days_ago:
-                    # 删除作业目录
-                    homework_dir = os.path.join(UPLOAD_FOLDER, f"homework_{homework['id']}")
-                    if os.path.exists(homework_dir):
-                        shutil.rmtree(homework_dir)
-                    # 从列表中移除
-                    homework_data['homework'].remove(homework)
-            except ValueError:
-                try:
-                    deadline = datetime.fromisoformat(homework['deadline'].replace('Z', '+00:00'))
-                    if deadline.date() <= two_days_ago:
-                        # 删除作业目录
-                        homework_dir = os.path.join(UPLOAD_FOLDER, f"homework_{homework['id']}")
-                        if os.path.exists(homework_dir):
-                            shutil.rmtree(homework_dir)
-                        # 从列表中移除
-                        homework_data['homework'].remove(homework)
-                except ValueError:
-                    continue
-        
-        save_homework_data(homework_data)
-        
-        return jsonify({'success': True, 'message': '缓存清理成功'})
+        job = jobs.submit('清理缓存', clear_cache_job)
+        return jsonify({'success': True, 'message': '清理任务已提交', 'jobId': job['id']}), 202
     except Exception as e:
         print(f"清理缓存错误: {str(e)}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+# 后台任务 API
+@app.route('/api/jobs', methods=['GET'])
+def get_jobs():
+    return jsonify({'success': True, 'jobs': jobs.list()})
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': '任务不存在'}), 404
+    return jsonify({'success': True, 'job': job})
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    if not METRICS_PUBLIC and not is_local_request():
+        return jsonify({'success': False, 'message': '只允许本机访问'}), 403
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/update-notice', methods=['GET'])
 def get_update_notice():
     try:
-        with open('update_notice.txt', 'r', encoding='utf-8') as f:
-            notice = f.read()
-        return jsonify({'success': True, 'notice': notice})
-    except FileNotFoundError:
-        return jsonify({'success': True, 'notice': ''})
+        try:
+            version = os.stat(UPDATE_NOTICE_FILE).st_mtime_ns
+        except FileNotFoundError:
+            return jsonify({'success': True, 'notice': ''})
+
+        def build():
+            with open(UPDATE_NOTICE_FILE, 'r', encoding='utf-8') as f:
+                return {'success': True, 'notice': f.read()}
+
+        return cached_json_response('update-notice', version, build)
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+def build_submission_matrix(course, all_courses_when_empty=False):
+    # 学生 × 作业提交矩阵，作业按课程筛选
+    students = load_students_data()['students']
+    homework_list = load_homework_data()['homework']
+    if course:
+        homework_list = [h for h in homework_list if h['course_name'] == course]
+    elif not all_courses_when_empty:
+        homework_list = []
+    submitted = repo.submitted_student_ids_by_homework([h['id'] for h in homework_list])
+    return SubmissionMatrix(students, homework_list, submitted)
+
 @app.route('/api/missing-submissions', methods=['GET'])
 def get_missing_submissions():
     course = request.args.get('course', '')
     
-    # 加载所有学生数据
-    students_data = load_students_data()
-    all_students = {s['studentId']: s['name'] for s in students_data['students']}
+    # format=matrix 时返回紧凑的学生 × 作业矩阵，未指定课程时包含全部作业
+    if request.args.get('format') == 'matrix':
+        return jsonify(build_submission_matrix(course, all_courses_when_empty=True).to_dict())
     
-    # 加载相关作业
-    homework_data = load_homework_data()
-    relevant_homework = [h for h in homework_data['homework'] if h['course_name'] == course] if course else []
-    
-    missing_data = []
-    
-    for hw in relevant_homework:
-        # 获取已提交学生ID
-        submitted_ids = set()
-        homework_dir = os.path.join(UPLOAD_FOLDER, f"homework_{hw['id']}")
-        if os.path.exists(homework_dir):
-            for entry in os.listdir(homework_dir):
-                if '_' in entry:
-                    student_id = entry.split('_')[0]
-                    submitted_ids.add(student_id)
-        
-        # 对比未提交学生
-        for student_id, name in all_students.items():
-            if student_id not in submitted_ids:
-                missing_data.append({
-                    'course_name': hw['course_name'],
-                    'title': hw['title'],
-                    'student_id': student_id,
-                    'student_name': name,
-                    'deadline': hw['deadline']
-                })
+    missing_data = [{
+        'course_name': hw['course_name'],
+        'title': hw['title'],
+        'student_id': student['studentId'],
+        'student_name': student['name'],
+        'deadline': hw['deadline']
+    } for hw, student in build_submission_matrix(course).missing_pairs()]
     
     return jsonify({'missing': missing_data})
 
+@app.route('/api/missing-submissions/export', methods=['GET'])
+def export_missing_submissions():
+    try:
+        course = request.args.get('course', '')
+        export_format = request.args.get('format', 'csv')
+        if export_format not in ('csv', 'xlsx'):
+            return jsonify({'success': False, 'message': '导出格式只支持 csv 或 xlsx'}), 400
+        
+        matrix = build_submission_matrix(course, all_courses_when_empty=True)
+        download_name = f"{course or '全部课程'}_提交情况.{export_format}"
+        if export_format == 'csv':
+            response = Response(matrix.iter_csv(), mimetype='text/csv')
+            response.headers['Content-Disposition'] = f"attachment; filename=submissions.csv; filename*=UTF-8''{quote(download_name)}"
+            return response
+        
+        try:
+            xlsx_file = matrix.write_xlsx()
+        except RuntimeError as e:
+            return jsonify({'success': False, 'message': str(e)}), 501
+        return send_file(xlsx_file, as_attachment=True, download_name=download_name,
+                         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @app.route('/api/query', methods=['GET'])
 def get_query():
     try:
         # 获取查询参数
         student_id = request.args.get('studentId')
-        student_name = request.args.get('studentName')
-        
-        # 加载所有学生数据
-        students_data = load_students_data()
-        all_students = {s['studentId']: s['name'] for s in students_data['students']}
+        # 只查询单个学生自己的提交，不提供学号时不返回任何人的记录
+        if not student_id:
+            return jsonify({'success': False, 'message': '需要提供学号'}), 400
         
         # 加载所有作业数据
         homework_data = load_homework_data()
-        all_homework = {h['id']: h['title'] for h in homework_data['homework']}
-        
-        # 构建查询结果
-        results = []    
-        
-        # 遍历所有作业
-        for homework in homework_data['homework']:
-            # 获取作业提交记录
-            homework_dir = os.path.join(UPLOAD_FOLDER, f"homework_{homework['id']}")
-            if os.path.exists(homework_dir):
-                for entry in os.listdir(homework_dir):  
-                    if '_' in entry:
-                        student_ID = entry.split('_')[0]
-                        if student_ID == student_id:
-                            # 获取提交记录
-                            submissions_file = os.path.join(homework_dir, entry, 'submissions.json')
-                            if os.path.exists(submissions_file):
-                                with open(submissions_file, 'r', encoding='utf-8') as f:
-                                    submissions = json.load(f)
-                                    for submission in submissions:
-                                        # 添加作业标题和课程名称和所提交的作业文件名
-                                        submission['homeworkTitle'] = homework['title']
-                                        submission['courseName'] = homework['course_name']
-                                        submission['submitTime'] = datetime.strptime(submission['submit_time'], '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d %H:%M:%S')
-                                        submission['files'] = submission['filenames']
-                                        results.append(submission)
-        
-        # 根据学生ID排序
-        results.sort(key=lambda x: x['submitTime']) 
+        all_homework = {str(h['id']): h for h in homework_data['homework']}
+
+        # 按学号维护的提交列表，已按提交时间排序
+        submissions = repo.list_student_submissions(student_id)
+
+        # 构建查询结果，添加作业标题和课程名称和所提交的作业文件名
+        results = []
+        for submission in submissions:
+            homework = all_homework.get(str(submission['homework_id']))
+            if homework is None:
+                continue
+            results.append(dict(submission, homeworkTitle=homework['title'], courseName=homework['course_name'],
+                                submitTime=submission['submit_time'], files=submission['filenames']))
         
         return jsonify({
             'success': True,
@@ -802,19 +1467,13 @@ def delete_submission(homework_id, student_id):
             return jsonify({'success': False, 'message': '需要提供学生姓名'}), 400
 
         # 验证学生身份
-        students_data = load_students_data()
-        student = next((s for s in students_data['students'] 
-                      if s['studentId'] == student_id and s['name'] == student_name), None)
+        student = repo.find_student(student_id, student_name)
         if not student:
             return jsonify({'success': False, 'message': '学生信息验证失败'}), 403
 
-        # 构建目录路径
-        homework_dir = os.path.join(UPLOAD_FOLDER, f"homework_{homework_id}")
-        student_dir = os.path.join(homework_dir, f"{student_id}_{student_name}")
-        
         # 删除目录及内容
-        if os.path.exists(student_dir):
-            shutil.rmtree(student_dir)
+        repo.delete_submissions(homework_id, student_id, student_name)
+        if remove_stored_dir(submission_key(homework_id, student_id, student_name)):
             return jsonify({'success': True, 'message': '历史提交已清除'})
         
         return jsonify({'success': True, 'message': '无历史提交记录'})
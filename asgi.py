@@ -0,0 +1,228 @@
+"""生产环境的 ASGI 入口：uvicorn asgi:application
+
+Flask 路由保持不变，由 WsgiBridge 在有限大小的线程池中执行。小请求体先由事件循环
+异步接收，收完之后才占用工作线程；大请求体（上传文件）边接收边交给路由读取，
+路由可以在读取之前或读取过程中拒绝（迟交、限流、超过大小上限），文件内容也只在
+解析表单时保存一次。上传期间会占用一个工作线程，ASGI_WORKER_THREADS 需要按
+同时上传的人数设置。响应按块在线程池中读取后异步发送。
+"""
+import io
+import os
+import sys
+import asyncio
+import argparse
+import json
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app
+from datastore import flush_all
+
+# 执行 Flask 路由的线程数
+ASGI_WORKER_THREADS = int(os.environ.get('ASGI_WORKER_THREADS', 16))
+# 不超过这个大小的请求体先在事件循环中收完，更大的边接收边交给路由读取
+BODY_BUFFER_SIZE = 1024 * 1024
+# 每次从响应中读取并发送的数据量
+RESPONSE_BLOCK_SIZE = 64 * 1024
+
+
+class ReceiveStream(io.RawIOBase):
+    """流式请求体（wsgi.input）：工作线程读取时才从事件循环接收下一段数据"""
+
+    def __init__(self, receive, loop, first):
+        self._receive = receive
+        self._loop = loop
+        self._buffer = bytearray(first.get('body', b''))
+        self._more = first.get('more_body', False)
+
+    def readable(self):
+        return True
+
+    def _fill(self):
+        message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+        if message['type'] == 'http.disconnect':
+            # 返回空数据，werkzeug 按客户端断开处理
+            self._more = False
+            return
+        self._buffer += message.get('body', b'')
+        self._more = message.get('more_body', False)
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            while self._more:
+                self._fill()
+            size = len(self._buffer)
+        while not self._buffer and self._more:
+            self._fill()
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+class WsgiBridge:
+    """把 WSGI 应用包装为 ASGI 应用。"""
+
+    def __init__(self, wsgi_app, max_workers=ASGI_WORKER_THREADS, max_content_length=None):
+        self.wsgi_app = wsgi_app
+        # 与 Flask 的 MAX_CONTENT_LENGTH 一致，声明的长度超过时不接收请求体直接返回 413
+        self.max_content_length = max_content_length
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise RuntimeError(f"不支持的连接类型：{scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # 退出前把延迟写回的数据写入磁盘
+                await asyncio.get_running_loop().run_in_executor(self.executor, flush_all)
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    def _content_length(scope):
+        for name, value in scope.get('headers', []):
+            if name.lower() == b'content-length':
+                try:
+                    return int(value)
+                except ValueError:
+                    return None
+        return None
+
+    async def _read_body(self, receive, content_length):
+        """返回 (wsgi.input, 长度)；大请求体返回 ReceiveStream 和声明的长度（可能为 None）"""
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None, 0
+        if message.get('more_body', False) and (content_length is None or content_length > BODY_BUFFER_SIZE):
+            return ReceiveStream(receive, asyncio.get_running_loop(), message), content_length
+        chunks = [message.get('body', b'')]
+        while message.get('more_body', False):
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None, 0
+            chunks.append(message.get('body', b''))
+        body = b''.join(chunks)
+        return io.BytesIO(body), len(body)
+
+    async def _reject_too_large(self, send):
+        body = json.dumps({'success': False, 'message': '请求体超过大小上限'}, ensure_ascii=False).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': 413,
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length', str(len(body)).encode('latin-1'))]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    def _environ(self, scope, body, size):
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+            # 没有 Content-Length 时请求体读到结束为止
+            'wsgi.input_terminated': True
+        }
+        if size is not None:
+            environ['CONTENT_LENGTH'] = str(size)
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+                continue
+            if name == 'CONTENT_LENGTH':
+                continue
+            key = f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
+
+    def _start(self, environ):
+        # 在工作线程中执行路由，返回 (状态码, 响应头, WSGI 返回值, 响应体迭代器)
+        started = {}
+        written = []
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+            return written.append
+
+        result = self.wsgi_app(environ, start_response)
+        return started['status'], started['headers'], result, itertools.chain(written, result)
+
+    def _next_block(self, chunks):
+        # 在工作线程中读取响应，凑够一块再交给事件循环发送
+        block = []
+        size = 0
+        for part in chunks:
+            block.append(part)
+            size += len(part)
+            if size >= RESPONSE_BLOCK_SIZE:
+                break
+        return b''.join(block)
+
+    async def _http(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        content_length = self._content_length(scope)
+        if self.max_content_length is not None and content_length is not None \
+                and content_length > self.max_content_length:
+            await self._reject_too_large(send)
+            return
+        body, size = await self._read_body(receive, content_length)
+        if body is None:
+            return
+        try:
+            status, headers, result, chunks = await loop.run_in_executor(
+                self.executor, self._start, self._environ(scope, body, size))
+            try:
+                await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+                while True:
+                    block = await loop.run_in_executor(self.executor, self._next_block, chunks)
+                    if not block:
+                        break
+                    await send({'type': 'http.response.body', 'body': block, 'more_body': True})
+                await send({'type': 'http.response.body', 'body': b''})
+            finally:
+                if hasattr(result, 'close'):
+                    await loop.run_in_executor(self.executor, result.close)
+        finally:
+            body.close()
+
+
+application = WsgiBridge(app.wsgi_app, max_content_length=app.config['MAX_CONTENT_LENGTH'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='以 ASGI 方式启动作业提交系统（需要安装 uvicorn）')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(application, host=args.host, port=args.port)
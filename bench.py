@@ -0,0 +1,369 @@
+"""截止前集中提交场景的压测脚本。
+
+在临时目录中生成学生名单、作业和已有的 uploads/ 提交目录，然后模拟全班在
+截止前十分钟内集中上传，同时管理员和学生在查询提交情况、未交名单和请假列表。
+每个接口统计延迟分位数、吞吐量和内存峰值，用于比较改动前后的性能：
+
+    python bench.py --students 300 --homeworks 8 --files 2 --file-size 200000
+    python bench.py --storage sqlite --server --json result.json
+
+默认通过 Flask 测试客户端调用路由；--server 时启动本地 HTTP 服务，经过真实的
+套接字和 werkzeug 多线程服务器。脚本不会修改当前目录下的数据。
+"""
+import os
+import sys
+import io
+import json
+import time
+import uuid
+import shutil
+import random
+import argparse
+import tempfile
+import threading
+import tracemalloc
+import urllib.request
+import urllib.error
+from urllib.parse import urlencode
+from datetime import datetime, timedelta
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    # Windows 没有 resource 模块，只统计 tracemalloc 峰值
+    resource = None
+
+# 分位数
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class TestClient:
+    """通过 Flask 测试客户端调用路由，每个线程一个客户端"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, query=None, json_body=None, form=None, files=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        data = None
+        if form is not None or files:
+            data = dict(form or {})
+            for field, (filename, content) in (files or {}).items():
+                data[field] = (io.BytesIO(content), filename)
+        response = client.open(path, method=method, query_string=query, json=json_body, data=data,
+                               content_type='multipart/form-data' if data is not None else None)
+        body = response.get_data()
+        response.close()
+        return response.status_code, len(body)
+
+
+class HttpClient:
+    """通过本地 HTTP 服务调用路由"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    @staticmethod
+    def _multipart(form, files):
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in form.items():
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8'))
+        for name, (filename, content) in files.items():
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                         f'Content-Type: application/octet-stream\r\n\r\n'.encode('utf-8'))
+            parts.append(content)
+            parts.append(b'\r\n')
+        parts.append(f'--{boundary}--\r\n'.encode('utf-8'))
+        return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+    def request(self, method, path, query=None, json_body=None, form=None, files=None):
+        url = self.base_url + path + (f'?{urlencode(query)}' if query else '')
+        headers = {}
+        data = None
+        if json_body is not None:
+            data = json.dumps(json_body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        elif form is not None or files:
+            data, headers['Content-Type'] = self._multipart(form or {}, files or {})
+        req = urllib.request.Request(url, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, len(e.read())
+
+
+class EndpointStats:
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.errors = 0
+        self.bytes = 0
+        self.wall = 0.0
+        self.peak_memory = 0
+
+    def record(self, seconds, status, size):
+        self.latencies.append(seconds)
+        self.bytes += size
+        if status >= 400:
+            self.errors += 1
+
+    def to_dict(self):
+        values = sorted(self.latencies)
+        result = {
+            'endpoint': self.name,
+            'requests': len(values),
+            'errors': self.errors,
+            'throughput': len(values) / self.wall if self.wall else 0.0,
+            'maxMs': values[-1] * 1000 if values else 0.0,
+            'meanMs': sum(values) / len(values) * 1000 if values else 0.0,
+            'peakMemoryMB': self.peak_memory / 1024 / 1024,
+            'responseBytes': self.bytes
+        }
+        for p in PERCENTILES:
+            result[f'p{p}Ms'] = percentile(values, p) * 1000
+        return result
+
+
+class DeadlineRushBenchmark:
+    def __init__(self, client, repo, args):
+        self.client = client
+        self.repo = repo
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.students = []
+        self.homework = []
+        self.courses = []
+        self.pending_uploads = []
+        self.results = []
+
+    def call(self, stats, method, path, **kwargs):
+        start = time.perf_counter()
+        status, size = self.client.request(method, path, **kwargs)
+        stats.record(time.perf_counter() - start, status, size)
+        return status
+
+    @staticmethod
+    def build(kwargs):
+        # 上传请求的文件内容在执行前才生成，避免全部请求体同时占用内存
+        return kwargs() if callable(kwargs) else kwargs
+
+    def file_content(self):
+        return os.urandom(self.args.file_size)
+
+    def upload_request(self, homework_id, student):
+        files = {}
+        for k in range(self.args.files):
+            filename = f"{student['studentId']}_{student['name']}_实验{homework_id}_{k + 1}.docx"
+            files[f'file{k}'] = (filename, self.file_content())
+        form = {
+            'studentId': student['studentId'],
+            'studentName': student['name'],
+            'homeworkId': str(homework_id),
+            'description': '压测提交',
+            'fileCount': str(self.args.files)
+        }
+        return {'form': form, 'files': files}
+
+    def seed(self):
+        """生成名单、作业和已有提交，不计入统计"""
+        args = self.args
+        self.courses = [f'课程{i + 1}' for i in range(args.courses)]
+        self.students = [s for s in self.repo.insert_students([
+            {'studentId': f'2026{i:05d}', 'name': f'学生{i:05d}'} for i in range(args.students)
+        ]) if s is not None]
+        # 截止时间在十分钟后，与真实的截止前高峰一致
+        deadline = (datetime.now() + timedelta(minutes=10)).strftime('%Y-%m-%dT%H:%M')
+        stats = EndpointStats('seed')
+        for i in range(args.homeworks):
+            self.call(stats, 'POST', '/api/homework', json_body={
+                'courseName': self.courses[i % len(self.courses)],
+                'title': f'实验{i + 1}',
+                'requirements': '压测作业',
+                'deadline': deadline,
+                'fileNameFormats': ['{学号}_{姓名}_实验{作业编号}_*.docx']
+            })
+        self.homework = self.repo.load_homework()['homework']
+
+        # 一部分学生已经提交，其余在高峰期间提交
+        pairs = [(h['id'], s) for h in self.homework for s in self.students]
+        self.random.shuffle(pairs)
+        prefilled = int(len(pairs) * args.prefilled)
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            list(pool.map(lambda pair: self.call(stats, 'POST', '/api/homework/upload',
+                                                 **self.upload_request(*pair)), pairs[:prefilled]))
+        self.pending_uploads = pairs[prefilled:prefilled + args.uploads] if args.uploads else pairs[prefilled:]
+        if stats.errors:
+            print(f'生成数据时有 {stats.errors} 个请求失败', file=sys.stderr)
+        print(f'已生成 {len(self.students)} 名学生、{len(self.homework)} 个作业、{prefilled} 份提交'
+              f'（{prefilled * args.files} 个文件），高峰期上传 {len(self.pending_uploads)} 份')
+
+    def run_phase(self, name, tasks):
+        """tasks 为 [(method, path, kwargs)]，按 --concurrency 个线程并发执行"""
+        stats = EndpointStats(name)
+        if self.args.memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(self.args.concurrency) as pool:
+            list(pool.map(lambda task: self.call(stats, task[0], task[1], **self.build(task[2])), tasks))
+        stats.wall = time.perf_counter() - start
+        if self.args.memory:
+            stats.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self.results.append(stats.to_dict())
+        return stats
+
+    def read_tasks(self, count):
+        homework = self.homework
+        for _ in range(count):
+            h = self.random.choice(homework)
+            yield ('GET', '/api/submissions', {'query': {'course': h['course_name'], 'homeworkId': h['id'],
+                                                         'limit': 50}})
+
+    def run(self):
+        args = self.args
+        rnd = self.random
+        # 高峰期上传（每个学生每个作业只能提交一次）
+        self.run_phase('upload_homework', [
+            ('POST', '/api/homework/upload', partial(self.upload_request, homework_id, student))
+            for homework_id, student in self.pending_uploads
+        ])
+        self.run_phase('get_submissions', list(self.read_tasks(args.reads)))
+        self.run_phase('get_query', [
+            ('GET', '/api/query', {'query': {'studentId': rnd.choice(self.students)['studentId']}})
+            for _ in range(args.reads)
+        ])
+        self.run_phase('get_missing_submissions', [
+            ('GET', '/api/missing-submissions', {'query': {'course': rnd.choice(self.courses)}})
+            for _ in range(args.reads)
+        ])
+        # 每个学生每天只能请一次假
+        leave_students = rnd.sample(self.students, min(args.leaves, len(self.students)))
+        self.run_phase('submit_leave', [
+            ('POST', '/api/leave', {
+                'form': {'studentId': s['studentId'], 'studentName': s['name'], 'leaveType': '病假',
+                         'reason': '压测请假'},
+                'files': {'leaveImages': (f"{s['studentId']}.jpg", self.file_content())} if args.leave_images else {}
+            })
+            for s in leave_students
+        ])
+        self.run_phase('get_leave_list', [
+            ('GET', '/api/leave/list', {'query': {'limit': 50}}) for _ in range(args.reads)
+        ])
+        # 高峰期的混合负载：上传已经结束，学生反复查询自己的提交，管理员刷新未交名单
+        mixed = []
+        for _ in range(args.reads):
+            mixed.append(rnd.choice([
+                ('GET', '/api/query', {'query': {'studentId': rnd.choice(self.students)['studentId']}}),
+                ('GET', '/api/missing-submissions', {'query': {'course': rnd.choice(self.courses)}}),
+                next(self.read_tasks(1))
+            ]))
+        self.run_phase('mixed_reads', mixed)
+
+    def report(self):
+        header = (f"{'接口':<26}{'请求数':>8}{'失败':>6}{'req/s':>10}"
+                  + ''.join(f"{f'p{p}(ms)':>10}" for p in PERCENTILES)
+                  + f"{'max(ms)':>10}{'峰值内存(MB)':>14}")
+        print(header)
+        for r in self.results:
+            print(f"{r['endpoint']:<26}{r['requests']:>8}{r['errors']:>6}{r['throughput']:>10.1f}"
+                  + ''.join(f"{r[f'p{p}Ms']:>10.2f}" for p in PERCENTILES)
+                  + f"{r['maxMs']:>10.2f}{r['peakMemoryMB']:>14.2f}")
+        if resource is not None:
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # Linux 上单位为 KB，macOS 上为字节
+            rss_mb = rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+            print(f'进程最大常驻内存：{rss_mb:.1f} MB')
+
+
+def start_server(app):
+    from werkzeug.serving import make_server, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        # 不逐条打印访问日志
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模拟截止前集中提交，统计各接口的延迟、吞吐量和内存峰值')
+    parser.add_argument('--students', type=int, default=200, help='学生人数')
+    parser.add_argument('--homeworks', type=int, default=5, help='作业数')
+    parser.add_argument('--courses', type=int, default=2, help='课程数')
+    parser.add_argument('--files', type=int, default=1, help='每份提交的文件数')
+    parser.add_argument('--file-size', type=int, default=64 * 1024, help='每个文件的字节数')
+    parser.add_argument('--prefilled', type=float, default=0.5, help='开始前已经提交的比例（0~1）')
+    parser.add_argument('--uploads', type=int, default=0, help='高峰期上传份数上限，0 表示全部剩余')
+    parser.add_argument('--reads', type=int, default=200, help='每个查询接口的请求数')
+    parser.add_argument('--leaves', type=int, default=100, help='请假申请数')
+    parser.add_argument('--leave-images', action='store_true', help='请假申请附带图片')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发线程数')
+    parser.add_argument('--storage', choices=('json', 'sqlite'), default='json', help='存储方式')
+    parser.add_argument('--server', action='store_true', help='通过本地 HTTP 服务而不是测试客户端调用')
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help='不统计内存峰值（tracemalloc 会拖慢请求）')
+    parser.add_argument('--seed', type=int, default=1, help='随机数种子')
+    parser.add_argument('--workdir', help='数据目录，默认使用临时目录并在结束后删除')
+    parser.add_argument('--json', dest='json_path', help='把结果写入 JSON 文件，便于比较')
+    args = parser.parse_args()
+
+    # app 使用相对路径保存数据，导入前切换到压测目录
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    workdir = args.workdir or tempfile.mkdtemp(prefix='homework-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    json_path = os.path.abspath(args.json_path) if args.json_path else None
+    os.environ['STORAGE_ENGINE'] = args.storage
+    # 压测请求都来自本机，默认关闭限流和并发上限，需要测量时通过环境变量开启
+    for name in ('RATE_LIMIT_STUDENT_PER_MINUTE', 'RATE_LIMIT_IP_PER_MINUTE', 'MAX_CONCURRENT_UPLOADS'):
+        os.environ.setdefault(name, '0')
+    os.chdir(workdir)
+    sys.path.insert(0, source_dir)
+
+    from app import app, repo
+    from datastore import flush_all
+
+    server = None
+    try:
+        if args.server:
+            server = start_server(app)
+            client = HttpClient(f'http://127.0.0.1:{server.server_port}')
+        else:
+            client = TestClient(app)
+        bench = DeadlineRushBenchmark(client, repo, args)
+        bench.seed()
+        bench.run()
+        bench.report()
+        if json_path:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump({'args': vars(args), 'results': bench.results}, f, ensure_ascii=False, indent=2)
+    finally:
+        if server is not None:
+            server.shutdown()
+        flush_all()
+        os.chdir(source_dir)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
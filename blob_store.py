@@ -0,0 +1,123 @@
+import os
+import uuid
+import shutil
+import hashlib
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 上没有 fcntl，导出时直接复制
+    fcntl = None
+
+from datastore import JsonDataStore, register_store
+
+READ_BUFFER_SIZE = 64 * 1024
+# Linux 的 FICLONE ioctl：在 Btrfs、XFS 等文件系统上创建共享数据块的副本（reflink）
+FICLONE = 0x40049409
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            buf = f.read(READ_BUFFER_SIZE)
+            if not buf:
+                break
+            h.update(buf)
+    return h.hexdigest()
+
+
+class BlobStore:
+    """按 SHA-256 去重存储上传文件。
+
+    文件内容只在 blobs/ 下保存一份，学生目录中的文件是指向它的硬链接；
+    引用表记录每个学生目录中文件对应的摘要，删除目录后硬链接计数降为 1
+    （只剩存储区自身）的内容会被回收。
+    """
+
+    def __init__(self, folder, refs_file, shared=False):
+        self.folder = folder
+        # {学生目录: {文件名: 摘要}}
+        self.refs = register_store(JsonDataStore(refs_file, lambda: {'dirs': {}}, shared=shared))
+        # 硬链接、引用表和回收使用引用表的锁，多进程部署时同样互斥
+        self._lock = self.refs.lock
+        os.makedirs(folder, exist_ok=True)
+
+    def blob_path(self, digest):
+        return os.path.join(self.folder, digest[:2], digest)
+
+    def adopt(self, path, digest=None):
+        """把刚写入的文件纳入存储：内容已存在则换成硬链接，否则登记为新内容，返回摘要。
+
+        上传时已经算好摘要的可以直接传入 digest，不必再读一遍文件。
+        """
+        digest = digest or file_sha256(path)
+        blob = self.blob_path(digest)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        with self._lock:
+            try:
+                os.link(path, blob)
+            except FileExistsError:
+                # 相同内容已存在，用指向它的硬链接替换刚写入的文件
+                tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+                os.link(blob, tmp_path)
+                os.replace(tmp_path, path)
+            data = self.refs.load()
+            directory, filename = os.path.split(path)
+            data['dirs'].setdefault(directory, {})[filename] = digest
+            self.refs.save(data)
+        return digest
+
+    def export(self, src, dst):
+        """把上传区中的文件导出到上传区之外。
+
+        不能用硬链接：导出的文件会一直占着存储区内容的链接计数，删除提交后也无法回收，
+        修改导出的文件还会改掉存储区中的内容。文件系统支持时使用 reflink，否则复制。
+        """
+        # 先删除目标：以前导出的可能是指向存储区的硬链接，直接覆盖写会改掉共享的内容
+        if os.path.lexists(dst):
+            os.remove(dst)
+        if fcntl is not None:
+            try:
+                with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                    fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                shutil.copystat(src, dst)
+                return
+            except OSError:
+                pass
+        shutil.copy2(src, dst)
+
+    def release(self, directory):
+        """删除 directory（学生目录或作业目录）及其子目录下文件的引用，并回收无人引用的内容"""
+        prefix = directory.rstrip(os.sep) + os.sep
+        with self._lock:
+            data = self.refs.load()
+            released = [d for d in data['dirs'] if d == directory or d.startswith(prefix)]
+            digests = set()
+            for d in released:
+                digests.update(data['dirs'].pop(d).values())
+            if released:
+                self.refs.save(data)
+        return self.reclaim(digests)
+
+    def reclaim(self, digests):
+        """回收硬链接计数只剩 1 的内容，返回释放的字节数"""
+        freed = 0
+        with self._lock:
+            for digest in digests:
+                blob = self.blob_path(digest)
+                try:
+                    st = os.stat(blob)
+                except FileNotFoundError:
+                    continue
+                if st.st_nlink <= 1:
+                    os.remove(blob)
+                    freed += st.st_size
+        return freed
+
+    def collect(self):
+        """全量扫描存储区，回收所有无人引用的内容"""
+        digests = []
+        for root, _, files in os.walk(self.folder):
+            digests.extend(files)
+        return self.reclaim(digests)
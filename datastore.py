@@ -0,0 +1,788 @@
+import os
+import json
+import threading
+import atexit
+from datetime import datetime
+from functools import lru_cache
+
+from metrics import json_load_seconds, json_save_seconds, directory_walks
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 没有 fcntl，文件锁退化为进程内的线程锁
+    fcntl = None
+
+
+def write_json_atomic(path, data):
+    """先写临时文件再重命名，其他进程只会读到完整的旧文件或新文件"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with json_save_seconds.time(file=os.path.basename(path)):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+
+class ProcessLock:
+    """可重入的读-改-写锁，同时在线程之间和进程之间互斥（fcntl.flock）。"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+        self._pid = None
+
+    def acquire(self):
+        self._lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            # fork 出来的子进程要重新打开文件，共用同一个文件描述符时 flock 互不排斥
+            if self._pid != os.getpid():
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                self._pid = os.getpid()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        self._depth += 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# 追加日志累计多少条后合并为新的快照
+JOURNAL_COMPACT_EVERY = 500
+# 数据文件中保存内部元数据（id 计数器等）的键，加载时取出，不出现在返回给调用方的数据中
+META_KEY = '_meta'
+# 旧版本直接放在数据顶层的元数据
+LEGACY_META_KEYS = ('next_id', 'journal_seq')
+# 学生目录下的提交记录：旧版本整体重写的 submissions.json，现在每次提交追加一行到 submissions.jsonl
+STUDENT_SUBMISSIONS_FILE = 'submissions.json'
+STUDENT_SUBMISSIONS_LOG = 'submissions.jsonl'
+
+
+def append_json_line(path, record):
+    line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+    with open(path, 'a+b') as f:
+        # 上次崩溃时最后一行只写了一半：从新的一行开始写，不与残缺的内容连在一起
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                line = b'\n' + line
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_json_lines(f):
+    """逐行读取 JSON 记录，跳过无法解析的行（崩溃时写了一半的行），之后的记录照常读取"""
+    for line in f:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
+
+
+def read_student_submissions(student_dir):
+    """读取学生目录下的全部提交记录（兼容旧的 submissions.json）"""
+    submissions = []
+    legacy_file = os.path.join(student_dir, STUDENT_SUBMISSIONS_FILE)
+    if os.path.exists(legacy_file):
+        with open(legacy_file, 'r', encoding='utf-8') as f:
+            submissions.extend(json.load(f))
+    log_file = os.path.join(student_dir, STUDENT_SUBMISSIONS_LOG)
+    if os.path.exists(log_file):
+        with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
+            submissions.extend(read_json_lines(f))
+    return submissions
+
+
+class JsonDataStore:
+    """单个 JSON 数据文件的内存缓存。
+
+    读取时只在文件 mtime 变化后才重新解析；写入先标记为脏数据，
+    由定时器或脏写次数达到阈值时批量落盘，进程退出时统一刷新。
+    shared=True 时用于多进程部署：lock 同时是跨进程的文件锁，每次修改立即落盘。
+
+    指定 apply_entry 时启用追加日志：单条修改用 append() 写入 <文件>.journal
+    （每行一条 JSON），不再重写整个文件；日志条数达到 compact_every 或落盘时
+    合并为新的快照。加载时读取快照再重放快照之后的日志，进程崩溃后也能恢复。
+
+    内部元数据保存在 meta 中，与数据一起写入文件（META_KEY 键），但不属于 load() 返回的数据。
+    """
+
+    def __init__(self, path, default, flush_interval=2.0, dirty_threshold=20, on_load=None, shared=False,
+                 apply_entry=None, compact_every=JOURNAL_COMPACT_EVERY):
+        self.path = path
+        self.default = default
+        # 每次从磁盘（重新）加载后调用 on_load(data, meta)，用于重建索引
+        self.on_load = on_load
+        self.flush_interval = flush_interval
+        self.dirty_threshold = dirty_threshold
+        self.shared = shared
+        self.lock = ProcessLock(f"{path}.lock") if shared else threading.RLock()
+        # apply_entry(data, entry) 把一条日志应用到数据上，实时修改和重放共用
+        self.apply_entry = apply_entry
+        self.journal_path = f"{path}.journal" if apply_entry else None
+        self.compact_every = compact_every
+        self._data = None
+        self.meta = {}
+        self._mtime = None
+        self._dirty = 0
+        self._timer = None
+        # 快照之后尚未合并的日志条数，以及最后一条日志的序号
+        self._journal_count = 0
+        self._seq = 0
+        # 数据版本号，每次重新加载或修改后递增，用于响应缓存和 ETag
+        self.version = 0
+
+    def _file_mtime(self):
+        # 其他进程重命名写入的新文件 inode 不同，mtime 相同时也能发现；
+        # 启用日志时日志文件的变化同样需要重新加载
+        signature = []
+        for path in (self.path, self.journal_path):
+            try:
+                st = os.stat(path) if path else None
+            except FileNotFoundError:
+                st = None
+            signature.append((st.st_mtime_ns, st.st_ino, st.st_size) if st else None)
+        return tuple(signature)
+
+    def _reload(self):
+        mtime = self._file_mtime()
+        if os.path.exists(self.path):
+            with json_load_seconds.time(file=os.path.basename(self.path)), \
+                    open(self.path, 'r', encoding='utf-8') as f:
+                self._data = json.load(f)
+        else:
+            self._data = self.default()
+        self.meta = self._data.pop(META_KEY, {})
+        for key in LEGACY_META_KEYS:
+            if key in self._data:
+                self.meta.setdefault(key, self._data.pop(key))
+        self._mtime = mtime
+        self.version += 1
+        if self.on_load is not None:
+            self.on_load(self._data, self.meta)
+        self._journal_count = 0
+        self._seq = self.meta.get('journal_seq', 0)
+        if self.journal_path:
+            self._replay()
+
+    def _replay(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'r', encoding='utf-8', errors='replace') as f:
+            for entry in read_json_lines(f):
+                # 快照已包含的日志（合并后来不及清空日志时崩溃）跳过
+                if entry['seq'] <= self._seq:
+                    continue
+                self.apply_entry(self._data, entry)
+                self._seq = entry['seq']
+                self._journal_count += 1
+
+    def load(self):
+        with self.lock:
+            # 有未落盘的修改时以内存为准，否则文件被外部修改过才重新加载
+            if self._data is None or (not self._dirty and self._file_mtime() != self._mtime):
+                self._reload()
+            return self._data
+
+    def save(self, data):
+        with self.lock:
+            self._data = data
+            self._dirty += 1
+            self.version += 1
+            if self.shared or self._dirty >= self.dirty_threshold:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def append(self, entry):
+        """把一条修改写入日志并应用到内存数据，返回 apply_entry 的结果"""
+        with self.lock:
+            data = self.load()
+            # 先让快照包含之前整体保存的修改，重放时日志总是接在快照之后
+            if self._dirty:
+                self.flush()
+            entry = dict(entry, seq=self._seq + 1)
+            result = self.apply_entry(data, entry)
+            self._seq = entry['seq']
+            append_json_line(self.journal_path, entry)
+            self._mtime = self._file_mtime()
+            self._journal_count += 1
+            self.version += 1
+            if self._journal_count >= self.compact_every:
+                self.flush()
+            return result
+
+    def flush(self):
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._data is None:
+                return
+            if not self._dirty:
+                # 合并日志前确认内存数据包含其他进程追加的日志
+                self.load()
+            if not self._dirty and not self._journal_count:
+                return
+            if self.journal_path:
+                # 快照的元数据记录已包含的最后一条日志，之后清空日志文件
+                self.meta['journal_seq'] = self._seq
+            write_json_atomic(self.path, dict(self._data, **{META_KEY: self.meta}) if self.meta else self._data)
+            if self.journal_path and os.path.exists(self.journal_path):
+                open(self.journal_path, 'w').close()
+                self._journal_count = 0
+            self._mtime = self._file_mtime()
+            self._dirty = 0
+
+
+_stores = []
+
+
+def register_store(store):
+    _stores.append(store)
+    return store
+
+
+def flush_all():
+    for store in _stores:
+        try:
+            store.flush()
+        except Exception as e:
+            print(f"数据落盘失败 {store.path}: {str(e)}")
+
+
+atexit.register(flush_all)
+
+
+@lru_cache(maxsize=1024)
+def parse_deadline(deadline):
+    """把作业截止时间统一解析为本地时间（不带时区），格式错误时返回 None。
+
+    同一字符串只解析一次，上传和清理缓存时不再重复解析。
+    """
+    try:
+        parsed = datetime.fromisoformat(deadline.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        try:
+            parsed = datetime.strptime(deadline, '%Y-%m-%d %H:%M')
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def leave_date(leave):
+    # submitTime 格式为 'YYYY-MM-DD HH:MM:SS'，前 10 位即日期
+    return leave['submitTime'][:10]
+
+
+class CollectionIndex:
+    """列表型数据集的 id → 下标索引，以及保存在数据文件元数据中的单调递增 id 计数器。"""
+
+    def __init__(self, key):
+        self.key = key
+        self.positions = {}
+        self.meta = {}
+
+    def rebuild(self, data, meta):
+        records = data[self.key]
+        self.positions = {r['id']: i for i, r in enumerate(records)}
+        # next_id 只增不减，删除记录后也不会复用旧编号
+        self.meta = meta
+        meta['next_id'] = max(meta.get('next_id', 1), max(self.positions, default=0) + 1)
+
+    def get(self, data, record_id):
+        pos = self.positions.get(record_id)
+        return data[self.key][pos] if pos is not None else None
+
+    def append(self, data, record):
+        record = dict(id=self.meta['next_id'], **record)
+        self.meta['next_id'] += 1
+        self.positions[record['id']] = len(data[self.key])
+        data[self.key].append(record)
+        return record
+
+    def remove(self, data, record_id):
+        pos = self.positions.pop(record_id, None)
+        if pos is None:
+            return None
+        records = data[self.key]
+        record = records.pop(pos)
+        for i in range(pos, len(records)):
+            self.positions[records[i]['id']] = i
+        return record
+
+
+class JsonRepository:
+    """基于 JSON 文件的数据仓库，提供与 SqliteStore 相同的单条记录操作。
+
+    学号、(学号, 姓名) 和各数据集的 id 都有哈希索引，查找与编号分配均为 O(1)。
+    """
+
+    def __init__(self, homework_file, students_file, leave_file, upload_folder, submission_index_file,
+                 flush_interval=2.0, dirty_threshold=20, shared=False):
+        self.upload_folder = upload_folder
+        # submission_index_file 为 None 时只读写学生、作业和请假数据（导入数据库时使用）
+        self.submission_index = SubmissionIndex(submission_index_file, upload_folder,
+                                                flush_interval, dirty_threshold, shared) \
+            if submission_index_file else None
+        self.homework_index = CollectionIndex('homework')
+        self.students_index = CollectionIndex('students')
+        self.leaves_index = CollectionIndex('leaves')
+        self.student_by_sid = {}
+        self.student_by_identity = {}
+        self.leaves_by_date = {}
+        self.leave_by_student_date = {}
+        self.homework = register_store(JsonDataStore(homework_file, lambda: {'homework': []},
+                                                     flush_interval, dirty_threshold,
+                                                     self.homework_index.rebuild, shared))
+        self.students = register_store(JsonDataStore(students_file, lambda: {'students': []},
+                                                     flush_interval, dirty_threshold,
+                                                     self._rebuild_student_index, shared))
+        # 新增请假和审批写入追加日志，不再重写整个 leave_data.json
+        self.leaves = register_store(JsonDataStore(leave_file, lambda: {'leaves': []},
+                                                   flush_interval, dirty_threshold,
+                                                   self._rebuild_leave_index, shared,
+                                                   self._apply_leave_entry))
+
+    def version(self, name):
+        """数据集当前版本号，name 为 students / homework / leaves"""
+        store = {'students': self.students, 'homework': self.homework, 'leaves': self.leaves}[name]
+        with store.lock:
+            store.load()
+            return store.version
+
+    # 学生
+    def _rebuild_student_index(self, data, meta):
+        self.students_index.rebuild(data, meta)
+        self.student_by_sid = {s['studentId']: s for s in data['students']}
+        self.student_by_identity = {(s['studentId'], s['name']): s for s in data['students']}
+
+    def _index_student(self, student):
+        self.student_by_sid[student['studentId']] = student
+        self.student_by_identity[(student['studentId'], student['name'])] = student
+
+    def _unindex_student(self, student):
+        self.student_by_sid.pop(student['studentId'], None)
+        self.student_by_identity.pop((student['studentId'], student['name']), None)
+
+    def load_students(self):
+        return self.students.load()
+
+    def find_student(self, student_id, name=None):
+        with self.students.lock:
+            self.students.load()
+            if name is None:
+                return self.student_by_sid.get(student_id)
+            return self.student_by_identity.get((student_id, name))
+
+    def insert_student(self, record):
+        """添加学生，学号已存在时不添加并返回 None；查重和写入在同一把锁内"""
+        with self.students.lock:
+            data = self.students.load()
+            if record['studentId'] in self.student_by_sid:
+                return None
+            student = self.students_index.append(data, record)
+            self._index_student(student)
+            self.students.save(data)
+            return student
+
+    def insert_students(self, records):
+        """批量添加，一次加载、一次保存。
+
+        返回与 records 一一对应的列表，学号已存在（包括同一批中前面的记录）的位置为 None。
+        """
+        with self.students.lock:
+            data = self.students.load()
+            students = []
+            for record in records:
+                if record['studentId'] in self.student_by_sid:
+                    students.append(None)
+                    continue
+                student = self.students_index.append(data, record)
+                self._index_student(student)
+                students.append(student)
+            if any(students):
+                self.students.save(data)
+            return students
+
+    def update_student(self, student_id, fields):
+        with self.students.lock:
+            data = self.students.load()
+            student = self.students_index.get(data, student_id)
+            if student is None:
+                return False
+            self._unindex_student(student)
+            student.update(fields)
+            self._index_student(student)
+            self.students.save(data)
+            return True
+
+    def delete_student(self, student_id):
+        with self.students.lock:
+            data = self.students.load()
+            student = self.students_index.remove(data, student_id)
+            if student is not None:
+                self._unindex_student(student)
+                self.students.save(data)
+
+    # 作业
+    def load_homework(self):
+        return self.homework.load()
+
+    def get_homework(self, homework_id):
+        try:
+            homework_id = int(homework_id)
+        except (TypeError, ValueError):
+            return None
+        with self.homework.lock:
+            return self.homework_index.get(self.homework.load(), homework_id)
+
+    def insert_homework(self, record):
+        with self.homework.lock:
+            data = self.homework.load()
+            homework = self.homework_index.append(data, record)
+            self.homework.save(data)
+            return homework
+
+    def update_homework(self, homework_id, fields):
+        with self.homework.lock:
+            data = self.homework.load()
+            homework = self.homework_index.get(data, homework_id)
+            if homework is None:
+                return False
+            homework.update(fields)
+            self.homework.save(data)
+            return True
+
+    def delete_homework(self, homework_id):
+        with self.homework.lock:
+            data = self.homework.load()
+            if self.homework_index.remove(data, homework_id) is not None:
+                self.homework.save(data)
+        # 只读写基本数据的仓库（导入数据库时）没有提交索引
+        if self.submission_index is not None:
+            self.submission_index.remove_homework(homework_id)
+
+    # 请假
+    def _rebuild_leave_index(self, data, meta):
+        self.leaves_index.rebuild(data, meta)
+        self.leaves_by_date = {}
+        self.leave_by_student_date = {}
+        for leave in data['leaves']:
+            self._index_leave(leave)
+
+    def _index_leave(self, leave):
+        date = leave_date(leave)
+        self.leaves_by_date.setdefault(date, []).append(leave)
+        self.leave_by_student_date.setdefault((leave['studentId'], date), leave)
+
+    def _apply_leave_entry(self, data, entry):
+        if entry['op'] == 'insert':
+            leave = self.leaves_index.append(data, entry['record'])
+            self._index_leave(leave)
+            return leave
+        if entry['op'] == 'status':
+            leave = self.leaves_index.get(data, entry['id'])
+            if leave is not None:
+                leave['status'] = entry['status']
+            return leave
+        if entry['op'] == 'status_batch':
+            for leave_id in entry['ids']:
+                leave = self.leaves_index.get(data, leave_id)
+                if leave is not None:
+                    leave['status'] = entry['status']
+            return entry['ids']
+        raise ValueError(f"未知的日志操作：{entry['op']}")
+
+    def load_leaves(self):
+        return self.leaves.load()
+
+    def list_leaves(self, date=None):
+        with self.leaves.lock:
+            data = self.leaves.load()
+            if date is None:
+                return data['leaves']
+            return list(self.leaves_by_date.get(date, []))
+
+    def query_leaves(self, date_from=None, date_to=None, status=None, student_id=None):
+        """按日期区间（含两端）、状态和学号过滤，日期条件只访问区间内的日期桶"""
+        with self.leaves.lock:
+            data = self.leaves.load()
+            if date_from is None and date_to is None:
+                leaves = data['leaves']
+            else:
+                leaves = sorted((leave for date, bucket in self.leaves_by_date.items()
+                                 if (date_from is None or date >= date_from) and (date_to is None or date <= date_to)
+                                 for leave in bucket), key=lambda leave: leave['id'])
+            return [leave for leave in leaves
+                    if (status is None or leave.get('status') == status)
+                    and (student_id is None or leave['studentId'] == student_id)]
+
+    def find_leave(self, student_id, date):
+        with self.leaves.lock:
+            self.leaves.load()
+            return self.leave_by_student_date.get((student_id, date))
+
+    def insert_leave(self, record):
+        """添加请假记录，该学生当天已有请假时不添加并返回 None；查重和写日志在同一把锁内"""
+        with self.leaves.lock:
+            self.leaves.load()
+            if (record['studentId'], leave_date(record)) in self.leave_by_student_date:
+                return None
+            return self.leaves.append({'op': 'insert', 'record': record})
+
+    def set_leave_status(self, leave_id, status):
+        with self.leaves.lock:
+            data = self.leaves.load()
+            if self.leaves_index.get(data, leave_id) is None:
+                return False
+            self.leaves.append({'op': 'status', 'id': leave_id, 'status': status})
+            return True
+
+    def set_leave_statuses(self, leave_ids, status):
+        """批量修改状态，整批只写一条日志，返回实际修改的 id 列表"""
+        with self.leaves.lock:
+            data = self.leaves.load()
+            found = [i for i in dict.fromkeys(leave_ids) if self.leaves_index.get(data, i) is not None]
+            if found:
+                self.leaves.append({'op': 'status_batch', 'ids': found, 'status': status})
+            return found
+
+    def delete_leaves_before(self, date):
+        # date 为 'YYYY-MM-DD'，整天的记录按日期分桶一起删除
+        with self.leaves.lock:
+            data = self.leaves.load()
+            if not any(d < date for d in self.leaves_by_date):
+                return
+            data['leaves'] = [l for l in data['leaves'] if leave_date(l) >= date]
+            self._rebuild_leave_index(data, self.leaves.meta)
+            self.leaves.save(data)
+
+    # 作业提交记录：每个学生目录下的 submissions.jsonl（旧版本为 submissions.json）为原始记录，
+    # 查询走 SubmissionIndex
+    def _submissions_file(self, homework_id, student_id, student_name):
+        return os.path.join(self.upload_folder, f"homework_{homework_id}",
+                            f"{student_id}_{student_name}", STUDENT_SUBMISSIONS_LOG)
+
+    def get_submissions(self, homework_id, student_id, student_name):
+        return self.submission_index.get(homework_id, f"{student_id}_{student_name}")
+
+    def add_submission(self, homework_id, student_id, student_name, submission):
+        """添加提交记录，该学生已经提交过时不添加并返回 False。
+
+        检查和写入在索引的同一把锁内完成（多进程部署时是跨进程文件锁），同时提交只有一个成功。
+        """
+        # 学生目录下的记录只追加一行，与索引更新使用同一把锁
+        with self.submission_index.store.lock:
+            if self.submission_index.get(homework_id, f"{student_id}_{student_name}"):
+                return False
+            append_json_line(self._submissions_file(homework_id, student_id, student_name), submission)
+            self.submission_index.add(homework_id, f"{student_id}_{student_name}", submission)
+            return True
+
+    def delete_submissions(self, homework_id, student_id, student_name):
+        # 提交记录文件随学生目录一起删除，这里只需更新索引
+        self.submission_index.remove(homework_id, f"{student_id}_{student_name}")
+
+    def list_submissions(self, homework_id, student_id=None):
+        return self.submission_index.list(homework_id, student_id)
+
+    def list_student_submissions(self, student_id):
+        """某个学生在所有作业中的提交记录，按提交时间排序"""
+        return self.submission_index.list_by_student(student_id)
+
+    def query_submissions(self, homework_ids, student_id=None, student_name=None, date_from=None, date_to=None):
+        if student_id:
+            # 查询某个学生时直接取按学号维护的列表，不再逐个作业查找
+            homework_ids = {str(h) for h in homework_ids}
+            student_name = student_name.lower() if student_name else None
+            return [s for s in self.submission_index.list_by_student(student_id)
+                    if s['homework_id'] in homework_ids
+                    and (student_name is None or s['student_name'].lower() == student_name)
+                    and (date_from is None or s['submit_time'][:10] >= date_from)
+                    and (date_to is None or s['submit_time'][:10] <= date_to)]
+        return [s for homework_id in homework_ids
+                for s in self.submission_index.query(homework_id, student_id, student_name, date_from, date_to)]
+
+    def submitted_student_ids(self, homework_id):
+        return self.submission_index.student_ids(homework_id)
+
+    def submitted_student_ids_by_homework(self, homework_ids):
+        """{作业 id（字符串）: 已提交的学号集合}"""
+        return self.submission_index.student_ids_by_homework(homework_ids)
+
+
+class SubmissionIndex:
+    """作业提交索引：作业 id → {学生目录名: 提交记录列表}。
+
+    常驻内存并持久化到磁盘，上传和删除时增量更新，查询时不再遍历 uploads/ 目录。
+    索引文件不存在时根据 uploads/ 目录重建。另外维护每个作业已提交学号的集合，
+    统计未提交名单时直接做集合运算；以及按学号分组、按提交时间排序的提交列表，
+    学生查询自己的提交时只需一次字典查找。
+    """
+
+    def __init__(self, path, upload_folder, flush_interval=2.0, dirty_threshold=20, shared=False):
+        self.upload_folder = upload_folder
+        # {作业 id: 已提交的学号集合}
+        self.submitted = {}
+        # {学号: [(提交时间, 作业 id, 学生目录名, 提交记录), ...]}，按提交时间排序
+        self.by_student = {}
+        # 新增和删除提交写入追加日志，不再重写整个索引文件
+        self.store = register_store(JsonDataStore(path, lambda: {'homework': {}},
+                                                  flush_interval, dirty_threshold,
+                                                  self._rebuild_views, shared, self._apply_entry))
+        if not os.path.exists(path):
+            self.rebuild()
+
+    def rebuild(self):
+        index = {}
+        if os.path.exists(self.upload_folder):
+            directory_walks.inc(source='rebuild_index')
+            for homework_dir_name in os.listdir(self.upload_folder):
+                if not homework_dir_name.startswith('homework_'):
+                    continue
+                homework_dir = os.path.join(self.upload_folder, homework_dir_name)
+                entries = index.setdefault(homework_dir_name[len('homework_'):], {})
+                directory_walks.inc(source='rebuild_index')
+                for student_dir_name in os.listdir(homework_dir):
+                    submissions = read_student_submissions(os.path.join(homework_dir, student_dir_name))
+                    if submissions:
+                        entries[student_dir_name] = submissions
+        with self.store.lock:
+            self.store.save({'homework': index})
+            self.store.flush()
+            self._rebuild_views(self.store.load())
+        return sum(len(entries) for entries in index.values())
+
+    def _rebuild_views(self, data, meta=None):
+        self.submitted = {homework_id: self._student_ids(entries)
+                          for homework_id, entries in data['homework'].items()}
+        self.by_student = {}
+        for homework_id, entries in data['homework'].items():
+            for name, submissions in entries.items():
+                for submission in submissions:
+                    self.by_student.setdefault(name.split('_')[0], []).append(
+                        (submission.get('submit_time', ''), homework_id, name, submission))
+        for items in self.by_student.values():
+            items.sort(key=self._student_order)
+
+    @staticmethod
+    def _student_order(item):
+        # 按提交时间排序，同一秒内按作业 id
+        homework_id = item[1]
+        return item[0], int(homework_id) if homework_id.isdigit() else 0
+
+    def _index_student(self, homework_id, student_dir_name, submission):
+        items = self.by_student.setdefault(student_dir_name.split('_')[0], [])
+        items.append((submission.get('submit_time', ''), homework_id, student_dir_name, submission))
+        # 新提交一般是最晚的，只有时间倒序时才需要重新排序
+        if len(items) > 1 and self._student_order(items[-2]) > self._student_order(items[-1]):
+            items.sort(key=self._student_order)
+
+    def _unindex_student(self, homework_id, student_dir_name):
+        student_id = student_dir_name.split('_')[0]
+        items = [item for item in self.by_student.get(student_id, ())
+                 if item[1] != homework_id or item[2] != student_dir_name]
+        if items:
+            self.by_student[student_id] = items
+        else:
+            self.by_student.pop(student_id, None)
+
+    @staticmethod
+    def _student_ids(entries):
+        return {name.split('_')[0] for name, submissions in entries.items() if submissions}
+
+    def _apply_entry(self, data, entry):
+        homework_id = str(entry['homework_id'])
+        if entry['op'] == 'add':
+            data['homework'].setdefault(homework_id, {}).setdefault(entry['dir'], []).append(entry['submission'])
+            self.submitted.setdefault(homework_id, set()).add(entry['dir'].split('_')[0])
+            self._index_student(homework_id, entry['dir'], entry['submission'])
+        elif entry['op'] == 'remove':
+            entries = data['homework'].get(homework_id, {})
+            entries.pop(entry['dir'], None)
+            # 同一学号可能还有其他姓名的目录，按该作业重新计算
+            self.submitted[homework_id] = self._student_ids(entries)
+            self._unindex_student(homework_id, entry['dir'])
+        elif entry['op'] == 'remove_homework':
+            for name in data['homework'].pop(homework_id, {}):
+                self._unindex_student(homework_id, name)
+            self.submitted.pop(homework_id, None)
+        else:
+            raise ValueError(f"未知的日志操作：{entry['op']}")
+
+    def get(self, homework_id, student_dir_name):
+        with self.store.lock:
+            entries = self.store.load()['homework'].get(str(homework_id), {})
+            return [dict(s) for s in entries.get(student_dir_name, [])]
+
+    def add(self, homework_id, student_dir_name, submission):
+        self.store.append({'op': 'add', 'homework_id': str(homework_id), 'dir': student_dir_name,
+                           'submission': submission})
+
+    def remove(self, homework_id, student_dir_name):
+        with self.store.lock:
+            if student_dir_name in self.store.load()['homework'].get(str(homework_id), {}):
+                self.store.append({'op': 'remove', 'homework_id': str(homework_id), 'dir': student_dir_name})
+
+    def remove_homework(self, homework_id):
+        with self.store.lock:
+            if str(homework_id) in self.store.load()['homework']:
+                self.store.append({'op': 'remove_homework', 'homework_id': str(homework_id)})
+
+    def list(self, homework_id, student_id=None):
+        # 返回副本，调用方会在记录上追加作业标题等展示字段
+        with self.store.lock:
+            entries = self.store.load()['homework'].get(str(homework_id), {})
+            return [dict(s) for name, submissions in entries.items()
+                    if student_id is None or name.split('_')[0] == student_id
+                    for s in submissions]
+
+    def query(self, homework_id, student_id=None, student_name=None, date_from=None, date_to=None):
+        """先按目录名（学号_姓名）筛选学生，再按提交日期筛选，只复制命中的记录"""
+        student_name = student_name.lower() if student_name else None
+        with self.store.lock:
+            entries = self.store.load()['homework'].get(str(homework_id), {})
+            result = []
+            for name, submissions in entries.items():
+                sid, _, sname = name.partition('_')
+                if student_id and sid != student_id or student_name and sname.lower() != student_name:
+                    continue
+                result.extend(dict(s) for s in submissions
+                              if (date_from is None or s['submit_time'][:10] >= date_from)
+                              and (date_to is None or s['submit_time'][:10] <= date_to))
+            return result
+
+    def list_by_student(self, student_id):
+        with self.store.lock:
+            self.store.load()
+            return [dict(s, homework_id=homework_id) for _, homework_id, _, s in self.by_student.get(student_id, ())]
+
+    def student_ids(self, homework_id):
+        with self.store.lock:
+            self.store.load()
+            return set(self.submitted.get(str(homework_id), ()))
+
+    def student_ids_by_homework(self, homework_ids):
+        with self.store.lock:
+            self.store.load()
+            return {str(h): set(self.submitted.get(str(h), ())) for h in homework_ids}
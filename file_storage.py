@@ -0,0 +1,201 @@
+import os
+import uuid
+import shutil
+from urllib.parse import quote
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:
+    # boto3 为可选依赖，只有使用 S3 存储时才需要
+    boto3 = None
+    ClientError = None
+
+READ_BUFFER_SIZE = 64 * 1024
+# 直接下载链接的有效期（秒）
+DOWNLOAD_URL_EXPIRES = 10 * 60
+
+
+def join_key(*parts):
+    """存储键统一使用 / 分隔，与本地目录结构一致"""
+    return '/'.join(part.strip('/') for part in parts if part)
+
+
+def content_disposition(filename):
+    return f"attachment; filename*=UTF-8''{quote(filename)}"
+
+
+class CountingReader:
+    """包装文件对象，统计读取的字节数"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.size = 0
+
+    def read(self, n=-1):
+        buf = self.stream.read(n)
+        self.size += len(buf)
+        return buf
+
+
+class LocalStorage:
+    """上传文件保存在本机目录下，键即相对于根目录的路径。
+
+    文件由应用自己发送（send_file），没有直接下载链接。
+    """
+
+    is_local = True
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def local_path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def put(self, key, stream):
+        """从文件对象流式写入，先写临时文件再重命名，返回写入的字节数"""
+        path = self.local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                shutil.copyfileobj(stream, f, READ_BUFFER_SIZE)
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return size
+
+    def put_file(self, key, path):
+        """把已经写好的本地文件纳入存储（移动到键对应的位置）"""
+        target = self.local_path(key)
+        if os.path.abspath(path) != os.path.abspath(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+
+    def stat(self, key):
+        """返回 (大小, 修改时间纳秒)，文件不存在时返回 None"""
+        try:
+            st = os.stat(self.local_path(key))
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def open(self, key):
+        return open(self.local_path(key), 'rb')
+
+    def iter_range(self, key, lo, hi):
+        with self.open(key) as f:
+            f.seek(lo)
+            remaining = hi - lo
+            while remaining > 0:
+                buf = f.read(min(READ_BUFFER_SIZE, remaining))
+                if not buf:
+                    break
+                remaining -= len(buf)
+                yield buf
+
+    def copy_to(self, key, path):
+        shutil.copy2(self.local_path(key), path)
+
+    def delete(self, key):
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete_prefix(self, prefix):
+        """删除某个目录（作业或学生）下的全部文件"""
+        path = self.local_path(prefix)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+
+    def download_url(self, key, filename=None):
+        return None
+
+
+class S3Storage:
+    """S3 兼容的对象存储（AWS S3、MinIO 等），需要安装 boto3。
+
+    上传和读取都是流式的；下载时生成带签名的临时链接，文件直接由对象存储
+    发送给浏览器，不经过应用进程。endpoint_url 指向本地 MinIO 即可在开发环境使用。
+    访问凭证按 boto3 的默认方式读取（AWS_ACCESS_KEY_ID 等环境变量）。
+    """
+
+    is_local = False
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None, url_expires=DOWNLOAD_URL_EXPIRES,
+                 client=None):
+        if client is None:
+            if boto3 is None:
+                raise RuntimeError('使用 S3 存储需要安装 boto3')
+            client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.url_expires = url_expires
+
+    def _key(self, key):
+        return join_key(self.prefix, key)
+
+    def local_path(self, key):
+        return None
+
+    def put(self, key, stream):
+        # upload_fileobj 按块读取，大文件自动分段上传
+        reader = CountingReader(stream)
+        self.client.upload_fileobj(reader, self.bucket, self._key(key))
+        return reader.size
+
+    def put_file(self, key, path):
+        self.client.upload_file(path, self.bucket, self._key(key))
+        os.remove(path)
+
+    def stat(self, key):
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return head['ContentLength'], int(head['LastModified'].timestamp() * 1e9)
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body']
+
+    def iter_range(self, key, lo, hi):
+        if lo >= hi:
+            return
+        body = self.client.get_object(Bucket=self.bucket, Key=self._key(key), Range=f'bytes={lo}-{hi - 1}')['Body']
+        try:
+            while True:
+                buf = body.read(READ_BUFFER_SIZE)
+                if not buf:
+                    break
+                yield buf
+        finally:
+            body.close()
+
+    def copy_to(self, key, path):
+        self.client.download_file(self.bucket, self._key(key), path)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def delete_prefix(self, prefix):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix) + '/'):
+            objects = [{'Key': item['Key']} for item in page.get('Contents', [])]
+            if objects:
+                # 每页最多 1000 个，正好是 delete_objects 的上限
+                self.client.delete_objects(Bucket=self.bucket, Delete={'Objects': objects, 'Quiet': True})
+
+    def download_url(self, key, filename=None):
+        """带签名的临时下载链接；指定 filename 时浏览器按附件下载"""
+        params = {'Bucket': self.bucket, 'Key': self._key(key)}
+        if filename:
+            params['ResponseContentDisposition'] = content_disposition(filename)
+        return self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=self.url_expires)
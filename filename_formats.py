@@ -0,0 +1,128 @@
+import re
+from string import Formatter
+from functools import lru_cache
+
+# 文件命名格式支持的占位符
+PLACEHOLDERS = ('学号', '姓名', '作业编号')
+# 以 re: 开头的格式按正则表达式匹配
+REGEX_PREFIX = 're:'
+DEFAULT_FILE_NAME_FORMATS = ['{学号}_{姓名}_实验{作业编号}.docx']
+
+
+# 正则格式中只有已知的占位符按字段处理，其余花括号（如 \d{2}）仍是正则的一部分
+_REGEX_FIELD = re.compile(r'\{(' + '|'.join(PLACEHOLDERS) + r')(?::([^{}]*))?\}')
+
+
+def _parse_regex(body):
+    """拆分正则格式，返回 [(字面文本, 占位符, 格式说明), ...]，与 Formatter().parse 的结果对应"""
+    parts = []
+    pos = 0
+    for m in _REGEX_FIELD.finditer(body):
+        parts.append((body[pos:m.start()], m.group(1), m.group(2) or ''))
+        pos = m.end()
+    if pos < len(body) or not parts:
+        parts.append((body[pos:], None, ''))
+    return parts
+
+
+def _glob_to_regex(text):
+    # 通配符：* 匹配任意字符，? 匹配单个字符，其余字符按原样匹配
+    return ''.join('.*' if c == '*' else '.' if c == '?' else re.escape(c) for c in text)
+
+
+@lru_cache(maxsize=4096)
+def _compile(pattern):
+    return re.compile(pattern, re.DOTALL)
+
+
+class FileNameTemplate:
+    """一条文件命名格式，创建时解析一次：精确匹配、通配符（* ?）或正则（re: 前缀）。"""
+
+    def __init__(self, source):
+        self.source = source
+        if source.startswith(REGEX_PREFIX):
+            self.kind = 'regex'
+            body = source[len(REGEX_PREFIX):]
+        elif '*' in source or '?' in source:
+            self.kind = 'glob'
+            body = source
+        else:
+            self.kind = 'exact'
+            body = source
+
+        # [(字面文本, 字面文本对应的正则, 占位符, 格式说明), ...]
+        self.parts = []
+        if self.kind == 'regex':
+            for literal, field, spec in _parse_regex(body):
+                # 以前的说明要求正则中的花括号写成 {{ }}，按原意还原，已保存的格式继续有效
+                literal = literal.replace('{{', '{').replace('}}', '}')
+                self.parts.append((literal, literal, field, spec))
+        else:
+            for literal, field, spec, _ in Formatter().parse(body):
+                if field is not None and field not in PLACEHOLDERS:
+                    raise ValueError(f'不支持的占位符：{{{field}}}')
+                literal_regex = _glob_to_regex(literal) if self.kind == 'glob' else None
+                self.parts.append((literal, literal_regex, field, spec or ''))
+
+        if self.kind == 'regex':
+            try:
+                _compile(self._pattern({p: p for p in PLACEHOLDERS}))
+            except re.error as e:
+                raise ValueError(f'正则表达式有误：{str(e)}')
+
+    def render(self, values):
+        return ''.join(literal + (format(values[field], spec) if field else '')
+                       for literal, _, field, spec in self.parts)
+
+    def _pattern(self, values):
+        return ''.join(literal_regex + (re.escape(format(values[field], spec)) if field else '')
+                       for _, literal_regex, field, spec in self.parts)
+
+    def match(self, filename, values):
+        if self.kind == 'exact':
+            return filename == self.render(values)
+        return _compile(self._pattern(values)).fullmatch(filename) is not None
+
+    def describe(self, values):
+        # 提示给学生的期望文件名
+        if self.kind == 'regex':
+            return f'符合正则 {self._pattern(values)} 的文件名'
+        return self.render(values)
+
+
+class FileNameMatcher:
+    """一个作业的全部文件命名格式，逐条匹配时同时生成格式示例，只需遍历一次。"""
+
+    def __init__(self, formats):
+        self.templates = []
+        self.errors = []
+        for source in formats:
+            try:
+                self.templates.append(FileNameTemplate(source))
+            except ValueError as e:
+                # 与原来的行为一致，无法解析的格式在匹配时跳过
+                self.errors.append(f'{source}：{str(e)}')
+
+    def match(self, filename, student_id, student_name, homework_id):
+        """返回 (匹配到的格式, None) 或 (None, 期望的文件名列表)"""
+        values = {'学号': student_id, '姓名': student_name, '作业编号': str(homework_id)}
+        expected = []
+        for template in self.templates:
+            if template.match(filename, values):
+                return template.source, None
+            expected.append(template.describe(values))
+        return None, expected
+
+
+def normalize_formats(formats):
+    if formats is None:
+        return tuple(DEFAULT_FILE_NAME_FORMATS)
+    if isinstance(formats, str):
+        return (formats,)
+    return tuple(formats)
+
+
+@lru_cache(maxsize=256)
+def compile_formats(formats):
+    """按格式列表缓存编译结果，作业创建或修改时编译一次，之后每次上传直接复用"""
+    return FileNameMatcher(formats)
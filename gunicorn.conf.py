@@ -0,0 +1,16 @@
+# gunicorn 配置：gunicorn -c gunicorn.conf.py wsgi:application
+import os
+import multiprocessing
+
+# worker 共享数据文件，启用跨进程文件锁
+os.environ['MULTI_WORKER'] = '1'
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# 每个 worker 再开若干线程，慢速上传不会占满所有 worker
+worker_class = 'gthread'
+threads = int(os.environ.get('WORKER_THREADS', 4))
+# 大文件上传可能持续较长时间
+timeout = 300
+# 每个 worker 各自导入 app，文件锁和数据库连接不会在进程之间共用
+preload_app = False
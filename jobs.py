@@ -0,0 +1,106 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from datastore import JsonDataStore, register_store
+
+
+class JobRunner:
+    """本地后台任务队列。
+
+    耗时的管理操作（清理缓存、批量导出、删除作业目录等）提交到线程池执行，
+    请求立即返回任务 id，前端通过任务状态接口轮询进度。
+    指定 path 时任务状态同时保存到文件，多进程部署下任一进程都能查询。
+    """
+
+    def __init__(self, max_workers=2, keep_finished=100, path=None, shared=False):
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.store = register_store(JsonDataStore(path, lambda: {'jobs': {}}, shared=shared)) if path else None
+
+    def submit(self, name, fn, *args, **kwargs):
+        """提交任务，fn 的第一个参数为进度回调 progress(done, total, message=None)"""
+        job = {
+            'id': uuid.uuid4().hex,
+            'name': name,
+            'status': '排队中',
+            'done': 0,
+            'total': 0,
+            'message': '',
+            'result': None,
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'finished_at': None
+        }
+        with self._lock:
+            self._jobs[job['id']] = job
+            self._trim(self._jobs)
+            self._persist(job)
+
+        def progress(done, total, message=None):
+            with self._lock:
+                job['done'] = done
+                job['total'] = total
+                if message is not None:
+                    job['message'] = message
+                self._persist(job)
+
+        def run():
+            with self._lock:
+                job['status'] = '运行中'
+                self._persist(job)
+            try:
+                result = fn(progress, *args, **kwargs)
+                with self._lock:
+                    job['status'] = '已完成'
+                    job['result'] = result
+            except Exception as e:
+                print(f"后台任务 {name} 失败: {str(e)}")
+                with self._lock:
+                    job['status'] = '失败'
+                    job['message'] = str(e)
+            finally:
+                with self._lock:
+                    job['finished_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+                    self._persist(job)
+
+        self._executor.submit(run)
+        return dict(job)
+
+    def _trim(self, jobs):
+        # 只保留最近的若干个已结束任务
+        finished = [job_id for job_id, job in jobs.items() if job['finished_at']]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del jobs[job_id]
+
+    def _persist(self, job):
+        if self.store is None:
+            return
+        with self.store.lock:
+            data = self.store.load()
+            data['jobs'][job['id']] = dict(job)
+            self._trim(data['jobs'])
+            self.store.save(data)
+
+    def _all(self):
+        if self.store is None:
+            return self._jobs
+        with self.store.lock:
+            return self.store.load()['jobs']
+
+    def pending(self):
+        """本进程中排队或运行中的任务数"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job['finished_at'])
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._all().get(job_id)
+            return dict(job) if job else None
+
+    def list(self):
+        with self._lock:
+            return [dict(job) for job in reversed(list(self._all().values()))]
@@ -14,6 +14,10 @@ new Vue({
         showAddHomeworkModal: false,
         showEditHomeworkModal: false,
         showMissing: false,
+        // 提交情况分页加载
+        submissionOffset: 0,
+        submissionPageSize: 50,
+        submissionTotal: 0,
         newStudent: {
             studentId: '',
             name: ''
@@ -24,11 +28,23 @@ new Vue({
             title: '',
             deadline: '',
             requirements: '',
-            fileNameFormats: ['{学号}_{姓名}_实验{作业编号}.docx']
+            fileNameFormats: ['{学号}_{姓名}_实验{作业编号}.docx'],
+            maxFileSizeMb: ''
         },
         editingHomework: null,
         apiBaseUrl: 'http://5.181.225.107:26754'
     },
+    computed: {
+        submissionPage() {
+            return Math.floor(this.submissionOffset / this.submissionPageSize) + 1;
+        },
+        submissionPageCount() {
+            return Math.max(1, Math.ceil(this.submissionTotal / this.submissionPageSize));
+        },
+        pendingLeaveIds() {
+            return this.leaveList.filter(leave => leave.status === '待审核').map(leave => leave.id);
+        }
+    },
     methods: {
         // 加载学生列表
         async loadStudents() {
@@ -87,6 +103,27 @@ new Vue({
                 alert(error.response?.data?.message || '添加学生失败');
             }
         },
+        // 批量导入学生名单
+        async importStudents(event) {
+            const file = event.target.files[0];
+            event.target.value = '';
+            if (!file) {
+                return;
+            }
+            try {
+                const formData = new FormData();
+                formData.append('file', file);
+                const response = await axios.post(`${this.apiBaseUrl}/api/students/import`, formData);
+                const problems = response.data.results
+                    .filter(r => r.status !== 'imported')
+                    .map(r => `第 ${r.row} 行 ${r.studentId} ${r.name}：${r.message}`);
+                this.loadStudents();
+                alert([response.data.message, ...problems].join('\n'));
+            } catch (error) {
+                console.error('导入学生失败:', error);
+                alert(error.response?.data?.message || '导入学生失败');
+            }
+        },
         // 加载作业列表
         async loadHomeworkList() {
             try {
@@ -139,6 +176,13 @@ new Vue({
             }
         },
         // 作业管理方法
+        megabytesToBytes(value) {
+            // 留空表示使用服务器默认上限
+            if (value === '' || value === null || value === undefined) {
+                return null;
+            }
+            return Math.round(Number(value) * 1024 * 1024);
+        },
         async submitHomework() {
             try {
                 const response = await axios.post(`${this.apiBaseUrl}/api/homework`, {
@@ -146,7 +190,8 @@ new Vue({
                     title: this.newHomework.title,
                     deadline: this.newHomework.deadline,
                     requirements: this.newHomework.requirements,
-                    fileNameFormats: this.newHomework.fileNameFormats
+                    fileNameFormats: this.newHomework.fileNameFormats,
+                    maxFileSize: this.megabytesToBytes(this.newHomework.maxFileSizeMb)
                 });
                 if (response.data.success) {
                     alert('发布作业成功');
@@ -157,7 +202,8 @@ new Vue({
                         title: '',
                         deadline: '',
                         requirements: '',
-                        fileNameFormats: ['{学号}_{姓名}_实验{作业编号}.docx']
+                        fileNameFormats: ['{学号}_{姓名}_实验{作业编号}.docx'],
+                        maxFileSizeMb: ''
                     };
                 }
             } catch (error) {
@@ -170,6 +216,7 @@ new Vue({
             this.editingHomework.courseName = homework.course_name;
             this.editingHomework.requirements = homework.description;
             this.editingHomework.fileNameFormats = homework.fileNameFormats || ['{学号}_{姓名}_实验{作业编号}.docx'];
+            this.editingHomework.maxFileSizeMb = homework.maxFileSize ? +(homework.maxFileSize / 1024 / 1024).toFixed(2) : '';
             this.showEditHomeworkModal = true;
         },
         async updateHomework() {
@@ -179,7 +226,8 @@ new Vue({
                     title: this.editingHomework.title,
                     deadline: this.editingHomework.deadline,
                     requirements: this.editingHomework.requirements,
-                    fileNameFormats: this.editingHomework.fileNameFormats
+                    fileNameFormats: this.editingHomework.fileNameFormats,
+                    maxFileSize: this.megabytesToBytes(this.editingHomework.maxFileSizeMb)
                 });
                 if (response.data.success) {
                     alert('更新作业成功');
@@ -274,29 +322,41 @@ new Vue({
                 alert(error.response?.data?.message || '拒绝请假失败');
             }
         },
-        async downloadAllSubmissions(homeworkId) {
+        async batchUpdateLeaves(action) {
+            const label = action === 'approve' ? '批准' : '拒绝';
+            if (!confirm(`确定要${label}当前列表中全部 ${this.pendingLeaveIds.length} 条待审核的请假申请吗？`)) {
+                return;
+            }
             try {
-                // 弹出输入框让用户输入保存路径
-                const savePath = prompt('请输入保存文件的目录路径：');
-                if (!savePath) {
-                    return; // 用户取消操作
-                }
-
-                // 发送请求复制文件
-                const response = await axios.post(`${this.apiBaseUrl}/api/homework/${homeworkId}/download-all`, {
-                    savePath: savePath
+                const response = await axios.post(`${this.apiBaseUrl}/api/leave/batch`, {
+                    action,
+                    ids: this.pendingLeaveIds
                 });
-                
-                if (response.data.success) {
-                    alert(response.data.message);
-                } else {
-                    throw new Error(response.data.message || '复制文件失败');
-                }
+                alert(response.data.message);
+                this.fetchLeaveList();
             } catch (error) {
-                console.error('复制文件失败:', error);
-                alert(error.response?.data?.message || '复制文件失败，请重试');
+                console.error(`批量${label}请假失败:`, error);
+                alert(error.response?.data?.message || `批量${label}请假失败`);
             }
         },
+        downloadAllSubmissions(homeworkId) {
+            // 服务端边打包边输出 ZIP，交给浏览器下载（支持断点续传）
+            const folders = confirm('是否按学生分文件夹打包？') ? 1 : 0;
+            const link = document.createElement('a');
+            link.href = `${this.apiBaseUrl}/api/homework/${homeworkId}/download-all.zip?folders=${folders}`;
+            document.body.appendChild(link);
+            link.click();
+            link.remove();
+        },
+        exportSubmissionReport() {
+            // 导出当前课程（未选择时为全部课程）的学生 × 作业提交情况表
+            const link = document.createElement('a');
+            const course = encodeURIComponent(this.selectedCourse);
+            link.href = `${this.apiBaseUrl}/api/missing-submissions/export?course=${course}&format=csv`;
+            document.body.appendChild(link);
+            link.click();
+            link.remove();
+        },
         async clearCache() {
             try {
                 if (!confirm('确定要清除缓存吗？这将删除今天之前的请假记录和已截止两天的作业记录。')) {
@@ -305,6 +365,10 @@ new Vue({
                 
                 const response = await axios.post(`${this.apiBaseUrl}/api/clear-cache`);
                 if (response.data.success) {
+                    const job = await this.waitForJob(response.data.jobId);
+                    if (job.status !== '已完成') {
+                        throw new Error(job.message || '清理缓存失败');
+                    }
                     alert('缓存清理成功');
                     // 刷新数据
                     this.loadHomeworkList();
@@ -317,24 +381,52 @@ new Vue({
                 alert(error.response?.data?.message || '清理缓存失败，请重试');
             }
         },
+        // 轮询后台任务状态，直到任务结束
+        async waitForJob(jobId, interval = 1000) {
+            while (true) {
+                const response = await axios.get(`${this.apiBaseUrl}/api/jobs/${jobId}`);
+                const job = response.data.job;
+                if (job.status === '已完成' || job.status === '失败') {
+                    return job;
+                }
+                await new Promise(resolve => setTimeout(resolve, interval));
+            }
+        },
         async toggleShowMissing() {
             this.showMissing = !this.showMissing;
             this.loadSubmissions();
         },
-        async loadSubmissions() {
+        changeSubmissionPage(step) {
+            this.submissionOffset = Math.max(0, this.submissionOffset + step * this.submissionPageSize);
+            this.loadSubmissions(false);
+        },
+        async loadSubmissions(resetPage = true) {
             try {
+                if (resetPage) {
+                    this.submissionOffset = 0;
+                }
                 let url = `${this.apiBaseUrl}/api/submissions`;
+                let params = {
+                    course: this.selectedCourse,
+                    offset: this.submissionOffset,
+                    limit: this.submissionPageSize,
+                    sort: 'submit_time',
+                    order: 'desc',
+                    fields: 'homework_id,homeworkTitle,student_id,student_name,submit_time,filenames'
+                };
                 if (this.showMissing) {
                     url = `${this.apiBaseUrl}/api/missing-submissions`;
+                    params = { course: this.selectedCourse };
                 }
                 
-                const response = await axios.get(url, {
-                    params: { course: this.selectedCourse }
-                });
+                const response = await axios.get(url, { params });
                 
                 this.submissions = this.showMissing 
                     ? response.data.missing
                     : response.data.submissions;
+                this.submissionTotal = this.showMissing
+                    ? this.submissions.length
+                    : response.data.total;
             } catch (error) {
                 console.error('加载失败:', error);
                 alert('加载数据失败');
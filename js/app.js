@@ -8,7 +8,10 @@ new Vue({
         apiBaseUrl: 'http://5.181.225.107:26754',
         homeworkList: [],
         selectedHomework: null,
-        homeworkDetailsModal: null
+        homeworkDetailsModal: null,
+        chunkedUploadThreshold: 8 * 1024 * 1024,
+        chunkConcurrency: 3,
+        chunkRetries: 3
     },
     methods: {
         // 获取作业列表
@@ -94,21 +97,41 @@ new Vue({
                     return;
                 }
                 
+                // 先只发送文件名和大小，身份、截止时间、命名或大小不符时不必上传文件内容
+                await axios.post(`${this.apiBaseUrl}/api/homework/upload/preflight`, {
+                    studentName: this.studentName,
+                    studentId: this.studentId,
+                    homeworkId: this.selectedHomework.id,
+                    files: this.selectedFiles.map(file => ({ filename: file.name, size: file.size }))
+                });
+                
+                // 大文件走分片续传接口，弱网下中断后只需重传失败的分片
+                const totalSize = this.selectedFiles.reduce((sum, file) => sum + file.size, 0);
+                if (totalSize > this.chunkedUploadThreshold) {
+                    await this.submitHomeworkInChunks();
+                    return;
+                }
+                
                 const formData = new FormData();
                 formData.append('studentName', this.studentName);
                 formData.append('studentId', this.studentId);
                 formData.append('homeworkId', this.selectedHomework.id);
                 formData.append('description', this.description);
                 
-                // 添加多个文件
-                this.selectedFiles.forEach((file, index) => {
+                // 添加多个文件，浏览器支持时附带 SHA-256 供服务器校验
+                for (const [index, file] of this.selectedFiles.entries()) {
+                    const sha256 = await this.sha256Hex(file);
+                    if (sha256) {
+                        formData.append(`file${index}Sha256`, sha256);
+                    }
                     formData.append(`file${index}`, file);
-                });
+                }
                 formData.append('fileCount', this.selectedFiles.length);
 
                 const response = await axios.post(`${this.apiBaseUrl}/api/homework/upload`, formData, {
                     headers: {
-                        'Content-Type': 'multipart/form-data'
+                        'Content-Type': 'multipart/form-data',
+                        ...this.uploadIdentityHeaders()
                     }
                 });
 
@@ -128,6 +151,86 @@ new Vue({
             }
         },
         
+        // 分片上传作业
+        async submitHomeworkInChunks() {
+            const init = await axios.post(`${this.apiBaseUrl}/api/homework/upload/init`, {
+                studentName: this.studentName,
+                studentId: this.studentId,
+                homeworkId: this.selectedHomework.id,
+                description: this.description,
+                files: this.selectedFiles.map(file => ({ filename: file.name, size: file.size }))
+            });
+            const { uploadId, chunkSize, files } = init.data;
+            
+            // 所有待上传分片组成队列，由多个并发任务依次领取
+            const queue = [];
+            files.forEach((file, fileIndex) => {
+                for (let chunkIndex = 0; chunkIndex < file.totalChunks; chunkIndex++) {
+                    queue.push({ fileIndex, chunkIndex });
+                }
+            });
+            
+            const uploadChunk = async ({ fileIndex, chunkIndex }) => {
+                const file = this.selectedFiles[fileIndex];
+                const blob = file.slice(chunkIndex * chunkSize, (chunkIndex + 1) * chunkSize);
+                const headers = { 'Content-Type': 'application/octet-stream' };
+                const sha256 = await this.sha256Hex(blob);
+                if (sha256) {
+                    headers['X-Chunk-Sha256'] = sha256;
+                }
+                for (let attempt = 1; ; attempt++) {
+                    try {
+                        await axios.put(`${this.apiBaseUrl}/api/homework/upload/${uploadId}/${fileIndex}/${chunkIndex}`, blob, { headers });
+                        return;
+                    } catch (error) {
+                        const status = error.response && error.response.status;
+                        const busy = status === 429 || status === 503;
+                        if (attempt >= this.chunkRetries || (status < 500 && !busy)) {
+                            throw error;
+                        }
+                        // 服务器繁忙时按 Retry-After 等待后再重试
+                        if (busy) {
+                            const seconds = Number(error.response.headers['retry-after']) || 1;
+                            await new Promise(resolve => setTimeout(resolve, seconds * 1000));
+                        }
+                    }
+                }
+            };
+            
+            const workers = Array.from({ length: this.chunkConcurrency }, async () => {
+                while (queue.length > 0) {
+                    await uploadChunk(queue.shift());
+                }
+            });
+            await Promise.all(workers);
+            
+            const response = await axios.post(`${this.apiBaseUrl}/api/homework/upload/${uploadId}/commit`);
+            if (response.data.success) {
+                alert('作业提交成功！');
+                this.backToHomeworkList();
+            } else {
+                alert(response.data.message || '提交作业失败，请重试。');
+            }
+        },
+        
+        // 身份信息同时放在请求头中，服务器在接收文件内容之前就能完成检查
+        uploadIdentityHeaders() {
+            return {
+                'X-Student-Id': this.studentId,
+                'X-Student-Name': encodeURIComponent(this.studentName),
+                'X-Homework-Id': this.selectedHomework.id
+            };
+        },
+        
+        // 计算文件或分片的 SHA-256，浏览器不支持（如非 HTTPS 页面）时返回 null
+        async sha256Hex(blob) {
+            if (!window.crypto || !window.crypto.subtle) {
+                return null;
+            }
+            const digest = await window.crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+            return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+        },
+        
         // 重置表单
         resetForm() {
             this.studentName = '';
@@ -0,0 +1,60 @@
+# 分页、字段投影与排序参数，供列表接口共用
+
+# 单页最多返回的记录数
+MAX_PAGE_SIZE = 500
+# 控制分页的查询参数，一个都没有时接口返回完整列表（兼容旧的前端）
+LIST_PARAMS = ('offset', 'limit', 'fields', 'sort', 'order')
+
+
+class ListQuery:
+    """列表接口的 offset/limit 分页、fields 字段投影和 sort/order 排序。"""
+
+    def __init__(self, offset=0, limit=None, fields=None, sort=None, desc=False):
+        self.offset = offset
+        self.limit = limit
+        self.fields = fields
+        self.sort = sort
+        self.desc = desc
+
+    @classmethod
+    def from_args(cls, args, sortable):
+        """从请求参数解析，参数不合法时抛出 ValueError"""
+        try:
+            offset = int(args.get('offset', 0))
+            limit = int(args['limit']) if args.get('limit') else None
+        except ValueError:
+            raise ValueError('offset 和 limit 必须是整数')
+        if offset < 0 or limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+            raise ValueError(f'offset 不能为负数，limit 的范围为 1~{MAX_PAGE_SIZE}')
+
+        fields = [f for f in args.get('fields', '').split(',') if f] or None
+        sort = args.get('sort') or None
+        if sort is not None and sort not in sortable:
+            raise ValueError(f"不支持按 {sort} 排序，可选：{', '.join(sortable)}")
+        order = args.get('order', 'asc')
+        if order not in ('asc', 'desc'):
+            raise ValueError('order 只能是 asc 或 desc')
+        return cls(offset, limit, fields, sort, order == 'desc')
+
+    @staticmethod
+    def requested(args):
+        return any(name in args for name in LIST_PARAMS)
+
+    def page(self, records):
+        """排序后截取当前页，返回 (总数, 当前页记录)"""
+        if self.sort:
+            # 缺少该字段的记录排在最后
+            present = [r for r in records if r.get(self.sort) is not None]
+            missing = [r for r in records if r.get(self.sort) is None]
+            records = sorted(present, key=lambda r: r[self.sort], reverse=self.desc) + missing
+        stop = None if self.limit is None else self.offset + self.limit
+        return len(records), records[self.offset:stop]
+
+    def project(self, record):
+        if self.fields is None:
+            return record
+        return {f: record[f] for f in self.fields if f in record}
+
+    def meta(self, total):
+        next_offset = self.offset + self.limit if self.limit and self.offset + self.limit < total else None
+        return {'total': total, 'offset': self.offset, 'limit': self.limit, 'nextOffset': next_offset}
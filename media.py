@@ -0,0 +1,112 @@
+import io
+import os
+import threading
+
+from file_storage import join_key
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    # Pillow 为可选依赖，未安装时不生成缩略图，直接返回原图
+    Image = None
+
+# 尺寸规格：(最长边像素, JPEG 质量)
+IMAGE_VARIANTS = {
+    'thumb': (320, 70),
+    'web': (1600, 82)
+}
+VARIANTS_FOLDER = '.variants'
+
+
+class MediaPipeline:
+    """请假图片的缩略图与网页版生成。
+
+    原图保存在 storage 的 prefix/ 下。提交请假后由后台任务预先生成，请求到还没生成的
+    规格时再按需生成；生成结果作为本机缓存保存在 cache_folder/.variants/<规格>/ 中。
+    """
+
+    def __init__(self, storage, prefix, cache_folder):
+        self.storage = storage
+        self.prefix = prefix
+        self.cache_folder = cache_folder
+        self._lock = threading.Lock()
+        # 正在生成的文件，避免后台任务和请求同时生成同一张图
+        self._pending = {}
+
+    @property
+    def enabled(self):
+        return Image is not None
+
+    def source_key(self, filename):
+        return join_key(self.prefix, filename)
+
+    def variant_path(self, variant, filename):
+        return os.path.join(self.cache_folder, VARIANTS_FOLDER, variant, f"{filename}.jpg")
+
+    def _open_source(self, filename):
+        key = self.source_key(filename)
+        path = self.storage.local_path(key)
+        if path is not None:
+            return Image.open(path)
+        # 对象存储的响应流不能 seek，先读入内存（请假图片一般只有几 MB）
+        body = self.storage.open(key)
+        try:
+            return Image.open(io.BytesIO(body.read()))
+        finally:
+            body.close()
+
+    def _render(self, filename, variant):
+        max_side, quality = IMAGE_VARIANTS[variant]
+        target = self.variant_path(variant, filename)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with self._open_source(filename) as image:
+            # 手机照片的方向保存在 EXIF 中
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_side, max_side))
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            image.save(tmp_path, 'JPEG', quality=quality, optimize=True, progressive=True)
+        os.replace(tmp_path, target)
+        return target
+
+    def get(self, filename, variant):
+        """返回指定规格的文件路径，无法生成时返回 None（由调用方返回原图）"""
+        if variant not in IMAGE_VARIANTS or not self.enabled:
+            return None
+        target = self.variant_path(variant, filename)
+        # 原图文件名带时间戳，不会被覆盖，生成过的规格一直有效
+        if os.path.exists(target):
+            return target
+
+        key = (filename, variant)
+        with self._lock:
+            event = self._pending.get(key)
+            owner = event is None
+            if owner:
+                event = self._pending[key] = threading.Event()
+        if not owner:
+            event.wait()
+            return target if os.path.exists(target) else None
+        try:
+            return self._render(filename, variant)
+        except Exception as e:
+            print(f"生成图片 {filename} 的 {variant} 版本失败: {str(e)}")
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            event.set()
+
+    def generate(self, progress, filenames):
+        """后台任务：为刚上传的图片生成全部规格"""
+        if not self.enabled:
+            return {'generated': 0, 'message': '未安装 Pillow，跳过'}
+        total = len(filenames) * len(IMAGE_VARIANTS)
+        done = 0
+        for filename in filenames:
+            for variant in IMAGE_VARIANTS:
+                self.get(filename, variant)
+                done += 1
+                progress(done, total)
+        return {'generated': done}
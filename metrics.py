@@ -0,0 +1,210 @@
+import os
+import time
+import threading
+import cProfile
+from contextlib import contextmanager
+
+try:
+    from pyinstrument import Profiler as InstrumentProfiler
+except ImportError:
+    # pyinstrument 为可选依赖，未安装时只能使用 cProfile
+    InstrumentProfiler = None
+
+# 延迟直方图的桶（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}'
+                                for key, value in items]
+
+
+class Gauge(Metric):
+    """当前值；指定 fn 时在输出时调用 fn() 取值"""
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labels=(), fn=None):
+        super().__init__(name, help_text, labels)
+        self.fn = fn
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self):
+        if self.fn is not None:
+            return self.header() + [f'{self.name} {_format_value(self.fn())}']
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}'
+                                for key, value in items]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # [各桶计数..., 总和, 次数]
+                entry = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, list(entry)) for key, entry in self._values.items())
+        lines = self.header()
+        for key, entry in items:
+            for bound, count in zip(self.buckets + (float('inf'),), entry[:len(self.buckets)] + [entry[-1]]):
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, key, [("le", _format_value(bound))])} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {_format_value(entry[-2])}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {entry[-1]}')
+        return lines
+
+
+class Registry:
+    """进程内的指标集合，按 Prometheus 文本格式输出。
+
+    多进程部署时每个进程各自统计，抓取到的是处理本次请求的进程的数据。
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=(), fn=None):
+        return self.register(Gauge(name, help_text, labels, fn))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+# 数据文件读写，datastore 中记录
+json_load_seconds = registry.histogram('homework_json_load_seconds', '从磁盘解析 JSON 数据文件的耗时', ('file',))
+json_save_seconds = registry.histogram('homework_json_save_seconds', '把 JSON 数据文件写入磁盘的耗时', ('file',))
+# 遍历上传目录的次数（listdir 调用），按调用位置区分
+directory_walks = registry.counter('homework_directory_walks_total', '遍历上传目录的次数', ('source',))
+
+
+class RequestProfiler:
+    """按请求头开启的单次请求性能分析，结果写入 folder。
+
+    同一时间只分析一个请求，其余请求照常处理不做分析。
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._busy = threading.Lock()
+
+    def start(self, kind):
+        if kind == 'pyinstrument' and InstrumentProfiler is None:
+            return None
+        if not self._busy.acquire(blocking=False):
+            return None
+        if kind == 'pyinstrument':
+            profiler = InstrumentProfiler()
+            profiler.start()
+        else:
+            kind = 'cprofile'
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return kind, profiler
+
+    def stop(self, session, name):
+        """结束分析并保存结果，返回文件路径"""
+        kind, profiler = session
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            stem = f"{time.strftime('%Y%m%d_%H%M%S')}_{int(time.time() * 1000) % 1000:03d}_{name}"
+            if kind == 'pyinstrument':
+                profiler.stop()
+                path = os.path.join(self.folder, f'{stem}.html')
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(profiler.output_html())
+            else:
+                profiler.disable()
+                # 用 python -m pstats 或 snakeviz 查看
+                path = os.path.join(self.folder, f'{stem}.prof')
+                profiler.dump_stats(path)
+            return path
+        finally:
+            self._busy.release()
@@ -0,0 +1,126 @@
+import math
+import time
+import threading
+
+try:
+    import redis
+except ImportError:
+    # redis 为可选依赖，只有多进程部署共用限流状态时才需要
+    redis = None
+
+# 客户端收到 503 后建议的重试间隔（秒）
+BUSY_RETRY_AFTER = 5
+# 进程内令牌桶的清理间隔（秒）
+PRUNE_INTERVAL = 60
+
+
+def retry_after_seconds(wait):
+    """Retry-After 头只接受整数秒"""
+    return max(1, math.ceil(wait))
+
+
+class TokenBucketLimiter:
+    """进程内令牌桶：每个键最多积累 burst 个令牌，每秒补充 rate 个。
+
+    多进程部署时每个进程各自计数，实际允许的速率是进程数倍。
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    def acquire(self, key, cost=1):
+        """取走 cost 个令牌，成功返回 0，否则返回还需等待的秒数"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            wait = 0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            if now - self._last_prune > PRUNE_INTERVAL:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now):
+        # 已经补满的桶和新建的桶没有区别，直接删除，避免学号和 IP 越积越多
+        full_after = self.burst / self.rate
+        self._buckets = {key: value for key, value in self._buckets.items() if now - value[1] < full_after}
+        self._last_prune = now
+
+
+# 读取、补充、扣减在一个脚本中完成，多个进程同时访问同一个键也不会多放行
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+def connect_redis(url):
+    if redis is None:
+        raise RuntimeError('使用 Redis 限流需要安装 redis')
+    return redis.Redis.from_url(url)
+
+
+class RedisTokenBucketLimiter:
+    """令牌桶状态保存在 Redis（或兼容的服务）中，所有进程共用。
+
+    Redis 暂时不可用时放行请求，不让限流本身成为故障点。
+    """
+
+    def __init__(self, client, name, rate, burst):
+        self.client = client
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def acquire(self, key, cost=1):
+        try:
+            wait = self._script(keys=[f'homework:ratelimit:{self.name}:{key}'],
+                                args=[self.rate, self.burst, time.time(), cost])
+        except redis.RedisError as e:
+            print(f"限流服务不可用，本次不限流: {str(e)}")
+            return 0
+        return float(wait)
+
+
+class ConcurrencyLimiter:
+    """限制同时处理的请求数，达到上限时不排队，由调用方直接拒绝"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self.active >= self.limit:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
@@ -0,0 +1,37 @@
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+
+class ResponseCache:
+    """按数据版本缓存序列化后的响应体。
+
+    版本号不变时直接复用上次序列化的结果和 ETag；数据被修改后版本号递增，
+    下一次请求时重新生成。
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, version, build):
+        """返回 (响应体, ETag, 最后修改时间)，build() 生成新的响应体（bytes）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version:
+                return entry[1:]
+        body = build()
+        etag = hashlib.sha1(body).hexdigest()
+        with self._lock:
+            entry = self._entries.get(key)
+            # 内容没变（例如文件被重新加载）时保留原来的修改时间
+            last_modified = entry[3] if entry and entry[2] == etag else datetime.now(timezone.utc)
+            self._entries[key] = (version, body, etag, last_modified)
+        return body, etag, last_modified
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,420 @@
+import os
+import json
+import sqlite3
+import argparse
+import threading
+from datetime import date as date_type, timedelta
+
+from datastore import JsonRepository, read_student_submissions
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS students (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    studentId TEXT NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_students_studentId ON students(studentId);
+
+CREATE TABLE IF NOT EXISTS homework (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    course_name TEXT,
+    title TEXT,
+    description TEXT,
+    deadline TEXT,
+    fileNameFormats TEXT,
+    status TEXT,
+    maxFileSize INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS leaves (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    studentName TEXT,
+    studentId TEXT NOT NULL,
+    leaveType TEXT,
+    reason TEXT,
+    leaveImages TEXT,
+    submitTime TEXT NOT NULL,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_leaves_studentId ON leaves(studentId, submitTime);
+CREATE INDEX IF NOT EXISTS idx_leaves_submitTime ON leaves(submitTime);
+
+CREATE TABLE IF NOT EXISTS submissions (
+    pk INTEGER PRIMARY KEY,
+    id INTEGER,
+    homework_id INTEGER NOT NULL,
+    student_id TEXT NOT NULL,
+    student_name TEXT,
+    description TEXT,
+    filenames TEXT,
+    submit_time TEXT,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_homework_id ON submissions(homework_id, student_id);
+CREATE INDEX IF NOT EXISTS idx_submissions_studentId ON submissions(student_id);
+CREATE INDEX IF NOT EXISTS idx_submissions_submitTime ON submissions(submit_time);
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+'''
+
+# 各表的数据版本号由触发器维护，多个进程写入同一个数据库时也能让响应缓存失效
+VERSIONED_TABLES = ('students', 'homework', 'leaves', 'submissions')
+for _table in VERSIONED_TABLES:
+    SCHEMA += f"INSERT OR IGNORE INTO data_versions (name, version) VALUES ('{_table}', 0);\n"
+    for _event in ('INSERT', 'UPDATE', 'DELETE'):
+        SCHEMA += (f"CREATE TRIGGER IF NOT EXISTS trg_{_table}_{_event.lower()} AFTER {_event} ON {_table} "
+                   f"BEGIN UPDATE data_versions SET version = version + 1 WHERE name = '{_table}'; END;\n")
+
+STUDENT_COLUMNS = ('id', 'studentId', 'name')
+HOMEWORK_COLUMNS = ('id', 'course_name', 'title', 'description', 'deadline', 'fileNameFormats', 'status',
+                    'maxFileSize')
+LEAVE_COLUMNS = ('id', 'studentName', 'studentId', 'leaveType', 'reason', 'leaveImages', 'submitTime', 'status')
+SUBMISSION_COLUMNS = ('id', 'student_name', 'student_id', 'homework_id', 'description', 'filenames',
+                      'submit_time', 'status')
+# 旧版本数据库中没有的列，打开时补上：{表名: [(列名, 类型), ...]}
+ADDED_COLUMNS = {'homework': [('maxFileSize', 'INTEGER')]}
+# 以 JSON 文本存储的列表字段
+JSON_COLUMNS = ('fileNameFormats', 'leaveImages', 'filenames')
+
+
+def _to_row(record, columns):
+    return tuple(json.dumps(record.get(c), ensure_ascii=False) if c in JSON_COLUMNS else record.get(c)
+                 for c in columns)
+
+
+def _to_record(row):
+    record = dict(row)
+    for c in JSON_COLUMNS:
+        if c in record and record[c] is not None:
+            record[c] = json.loads(record[c])
+    return record
+
+
+def _submission_record(row):
+    record = _to_record(row)
+    # 与 submissions.json 中的格式保持一致，homework_id 为字符串
+    record['homework_id'] = str(record['homework_id'])
+    return record
+
+
+def _day_range(date):
+    # 'YYYY-MM-DD' -> 当天 submitTime 的字符串区间 [date, 次日)
+    next_day = date_type.fromisoformat(date) + timedelta(days=1)
+    return date, next_day.isoformat()
+
+
+class SqliteStore:
+    """SQLite（WAL 模式）数据仓库，每个修改操作都是一个单行事务。"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+            for table, columns in ADDED_COLUMNS.items():
+                existing = {row['name'] for row in conn.execute(f'PRAGMA table_info({table})')}
+                for name, column_type in columns:
+                    if name not in existing:
+                        conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {column_type}')
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def version(self, name):
+        """数据集当前版本号，用于响应缓存和 ETag"""
+        row = self._conn().execute('SELECT version FROM data_versions WHERE name = ?', (name,)).fetchone()
+        return row['version']
+
+    def _insert(self, table, columns, record):
+        with self._conn() as conn:
+            cur = conn.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                _to_row(record, columns))
+        return dict(record, id=cur.lastrowid) if 'id' in columns else record
+
+    def _update(self, table, record_id, fields):
+        assignments = ', '.join(f"{c} = ?" for c in fields)
+        with self._conn() as conn:
+            cur = conn.execute(f"UPDATE {table} SET {assignments} WHERE id = ?",
+                               _to_row(fields, tuple(fields)) + (record_id,))
+        return cur.rowcount > 0
+
+    # 学生
+    def load_students(self):
+        rows = self._conn().execute('SELECT id, studentId, name FROM students ORDER BY id')
+        return {'students': [dict(r) for r in rows]}
+
+    def find_student(self, student_id, name=None):
+        if name is None:
+            row = self._conn().execute('SELECT id, studentId, name FROM students WHERE studentId = ?',
+                                       (student_id,)).fetchone()
+        else:
+            row = self._conn().execute('SELECT id, studentId, name FROM students WHERE studentId = ? AND name = ?',
+                                       (student_id, name)).fetchone()
+        return dict(row) if row else None
+
+    def insert_student(self, record):
+        """添加学生，学号已存在时返回 None（由 studentId 唯一索引保证）"""
+        return self.insert_students([record])[0]
+
+    def insert_students(self, records):
+        """整批在一个事务中插入，返回与 records 一一对应的列表，学号已存在的位置为 None"""
+        students = []
+        with self._conn() as conn:
+            for record in records:
+                cur = conn.execute('INSERT OR IGNORE INTO students (studentId, name) VALUES (?, ?)',
+                                   (record['studentId'], record['name']))
+                students.append(dict(record, id=cur.lastrowid) if cur.rowcount else None)
+        return students
+
+    def update_student(self, student_id, fields):
+        return self._update('students', student_id, fields)
+
+    def delete_student(self, student_id):
+        with self._conn() as conn:
+            conn.execute('DELETE FROM students WHERE id = ?', (student_id,))
+
+    # 作业
+    def load_homework(self):
+        rows = self._conn().execute(f"SELECT {', '.join(HOMEWORK_COLUMNS)} FROM homework ORDER BY id")
+        return {'homework': [_to_record(r) for r in rows]}
+
+    def get_homework(self, homework_id):
+        try:
+            homework_id = int(homework_id)
+        except (TypeError, ValueError):
+            return None
+        row = self._conn().execute(f"SELECT {', '.join(HOMEWORK_COLUMNS)} FROM homework WHERE id = ?",
+                                   (homework_id,)).fetchone()
+        return _to_record(row) if row else None
+
+    def insert_homework(self, record):
+        record = dict(id=None, **record)
+        return self._insert('homework', HOMEWORK_COLUMNS, record)
+
+    def update_homework(self, homework_id, fields):
+        return self._update('homework', homework_id, fields)
+
+    def delete_homework(self, homework_id):
+        with self._conn() as conn:
+            conn.execute('DELETE FROM submissions WHERE homework_id = ?', (homework_id,))
+            conn.execute('DELETE FROM homework WHERE id = ?', (homework_id,))
+
+    # 请假
+    def load_leaves(self):
+        rows = self._conn().execute(f"SELECT {', '.join(LEAVE_COLUMNS)} FROM leaves ORDER BY id")
+        return {'leaves': [_to_record(r) for r in rows]}
+
+    def list_leaves(self, date=None):
+        if date is None:
+            return self.load_leaves()['leaves']
+        # 按 submitTime 范围查询，使用 idx_leaves_submitTime 索引
+        rows = self._conn().execute(
+            f"SELECT {', '.join(LEAVE_COLUMNS)} FROM leaves WHERE submitTime >= ? AND submitTime < ? ORDER BY id",
+            _day_range(date))
+        return [_to_record(r) for r in rows]
+
+    def query_leaves(self, date_from=None, date_to=None, status=None, student_id=None):
+        conditions, params = [], []
+        if date_from is not None:
+            conditions.append('submitTime >= ?')
+            params.append(date_from)
+        if date_to is not None:
+            conditions.append('submitTime < ?')
+            params.append(_day_range(date_to)[1])
+        if status is not None:
+            conditions.append('status = ?')
+            params.append(status)
+        if student_id is not None:
+            conditions.append('studentId = ?')
+            params.append(student_id)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = self._conn().execute(f"SELECT {', '.join(LEAVE_COLUMNS)} FROM leaves{where} ORDER BY id", params)
+        return [_to_record(r) for r in rows]
+
+    def find_leave(self, student_id, date):
+        row = self._conn().execute(
+            f"SELECT {', '.join(LEAVE_COLUMNS)} FROM leaves "
+            "WHERE studentId = ? AND submitTime >= ? AND submitTime < ? LIMIT 1",
+            (student_id,) + _day_range(date)).fetchone()
+        return _to_record(row) if row else None
+
+    def insert_leave(self, record):
+        """添加请假记录，该学生当天已有请假时返回 None。
+
+        查重和插入在同一个写事务中（BEGIN IMMEDIATE），多个进程同时提交只有一个成功。
+        """
+        record = dict(id=None, **record)
+        conn = self._conn()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            exists = conn.execute('SELECT 1 FROM leaves WHERE studentId = ? AND submitTime >= ? AND submitTime < ? '
+                                  'LIMIT 1', (record['studentId'],) + _day_range(record['submitTime'][:10])).fetchone()
+            if exists:
+                return None
+            cur = conn.execute(f"INSERT INTO leaves ({', '.join(LEAVE_COLUMNS)}) "
+                               f"VALUES ({', '.join('?' * len(LEAVE_COLUMNS))})", _to_row(record, LEAVE_COLUMNS))
+        return dict(record, id=cur.lastrowid)
+
+    def set_leave_status(self, leave_id, status):
+        return self._update('leaves', leave_id, {'status': status})
+
+    def set_leave_statuses(self, leave_ids, status):
+        leave_ids = list(dict.fromkeys(leave_ids))
+        if not leave_ids:
+            return []
+        placeholders = ', '.join('?' * len(leave_ids))
+        with self._conn() as conn:
+            found = {r['id'] for r in conn.execute(f'SELECT id FROM leaves WHERE id IN ({placeholders})', leave_ids)}
+            conn.execute(f'UPDATE leaves SET status = ? WHERE id IN ({placeholders})', [status] + leave_ids)
+        return [i for i in leave_ids if i in found]
+
+    def delete_leaves_before(self, date):
+        with self._conn() as conn:
+            conn.execute('DELETE FROM leaves WHERE submitTime < ?', (date,))
+
+    # 作业提交记录
+    def get_submissions(self, homework_id, student_id, student_name):
+        rows = self._conn().execute(
+            f"SELECT {', '.join(SUBMISSION_COLUMNS)} FROM submissions "
+            "WHERE homework_id = ? AND student_id = ? AND student_name = ? ORDER BY pk",
+            (int(homework_id), student_id, student_name))
+        return [_submission_record(r) for r in rows]
+
+    def add_submission(self, homework_id, student_id, student_name, submission):
+        """添加提交记录，该学生已经提交过时不添加并返回 False。
+
+        检查和插入在同一个写事务中（BEGIN IMMEDIATE），多个进程同时提交只有一个成功。
+        """
+        record = dict(submission, homework_id=int(homework_id), student_id=student_id, student_name=student_name)
+        conn = self._conn()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            exists = conn.execute(
+                'SELECT 1 FROM submissions WHERE homework_id = ? AND student_id = ? AND student_name = ? LIMIT 1',
+                (int(homework_id), student_id, student_name)).fetchone()
+            if exists:
+                return False
+            conn.execute(f"INSERT INTO submissions ({', '.join(SUBMISSION_COLUMNS)}) "
+                         f"VALUES ({', '.join('?' * len(SUBMISSION_COLUMNS))})",
+                         _to_row(record, SUBMISSION_COLUMNS))
+        return True
+
+    def delete_submissions(self, homework_id, student_id, student_name):
+        with self._conn() as conn:
+            conn.execute('DELETE FROM submissions WHERE homework_id = ? AND student_id = ? AND student_name = ?',
+                         (int(homework_id), student_id, student_name))
+
+    def list_submissions(self, homework_id, student_id=None):
+        sql = f"SELECT {', '.join(SUBMISSION_COLUMNS)} FROM submissions WHERE homework_id = ?"
+        params = (int(homework_id),)
+        if student_id is not None:
+            sql += ' AND student_id = ?'
+            params += (student_id,)
+        rows = self._conn().execute(sql + ' ORDER BY pk', params)
+        return [_submission_record(r) for r in rows]
+
+    def list_student_submissions(self, student_id):
+        rows = self._conn().execute(
+            f"SELECT {', '.join(SUBMISSION_COLUMNS)} FROM submissions WHERE student_id = ? "
+            "ORDER BY submit_time, homework_id, pk",
+            (student_id,))
+        return [_submission_record(r) for r in rows]
+
+    def query_submissions(self, homework_ids, student_id=None, student_name=None, date_from=None, date_to=None):
+        homework_ids = [int(h) for h in homework_ids]
+        if not homework_ids:
+            return []
+        conditions = [f"homework_id IN ({', '.join('?' * len(homework_ids))})"]
+        params = list(homework_ids)
+        if student_id:
+            conditions.append('student_id = ?')
+            params.append(student_id)
+        if student_name:
+            conditions.append('lower(student_name) = lower(?)')
+            params.append(student_name)
+        if date_from is not None:
+            conditions.append('submit_time >= ?')
+            params.append(date_from)
+        if date_to is not None:
+            conditions.append('submit_time < ?')
+            params.append(_day_range(date_to)[1])
+        rows = self._conn().execute(
+            f"SELECT {', '.join(SUBMISSION_COLUMNS)} FROM submissions WHERE {' AND '.join(conditions)} ORDER BY pk", params)
+        # 与 JSON 存储一致，按作业列表的顺序返回
+        order = {h: i for i, h in enumerate(homework_ids)}
+        records = [_submission_record(r) for r in rows]
+        records.sort(key=lambda r: order[int(r['homework_id'])])
+        return records
+
+    def submitted_student_ids(self, homework_id):
+        rows = self._conn().execute('SELECT DISTINCT student_id FROM submissions WHERE homework_id = ?',
+                                    (int(homework_id),))
+        return {r['student_id'] for r in rows}
+
+    def submitted_student_ids_by_homework(self, homework_ids):
+        homework_ids = [int(h) for h in homework_ids]
+        result = {str(h): set() for h in homework_ids}
+        if homework_ids:
+            rows = self._conn().execute(
+                f"SELECT DISTINCT homework_id, student_id FROM submissions "
+                f"WHERE homework_id IN ({', '.join('?' * len(homework_ids))})", homework_ids)
+            for r in rows:
+                result[str(r['homework_id'])].add(r['student_id'])
+        return result
+
+
+def migrate_from_json(store, homework_file, students_file, leave_file, upload_folder):
+    """把现有 JSON 文件和 uploads/ 下学生目录中的提交记录一次性导入数据库"""
+    # 通过 JsonRepository 读取，请假数据会包含追加日志中尚未合并的修改
+    json_repo = JsonRepository(homework_file, students_file, leave_file, upload_folder, None)
+    students = json_repo.load_students()['students']
+    homework = json_repo.load_homework()['homework']
+    leaves = json_repo.load_leaves()['leaves']
+
+    submissions = []
+    if os.path.exists(upload_folder):
+        for homework_dir_name in os.listdir(upload_folder):
+            if not homework_dir_name.startswith('homework_'):
+                continue
+            homework_dir = os.path.join(upload_folder, homework_dir_name)
+            for student_dir_name in os.listdir(homework_dir):
+                for submission in read_student_submissions(os.path.join(homework_dir, student_dir_name)):
+                    submissions.append(dict(submission, homework_id=int(homework_dir_name[len('homework_'):])))
+
+    with store._conn() as conn:
+        for table, columns, records in (('students', STUDENT_COLUMNS, students),
+                                        ('homework', HOMEWORK_COLUMNS, homework),
+                                        ('leaves', LEAVE_COLUMNS, leaves),
+                                        ('submissions', SUBMISSION_COLUMNS, submissions)):
+            conn.execute(f"DELETE FROM {table}")
+            conn.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [_to_row(r, columns) for r in records])
+
+    return {'students': len(students), 'homework': len(homework),
+            'leaves': len(leaves), 'submissions': len(submissions)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='作业系统 SQLite 数据库工具')
+    parser.add_argument('command', choices=['migrate'], help='migrate: 从 JSON 文件和 uploads/ 导入数据')
+    parser.add_argument('--db', default='homework.db')
+    parser.add_argument('--homework', default='homework_data.json')
+    parser.add_argument('--students', default='students_data.json')
+    parser.add_argument('--leaves', default='leave_data.json')
+    parser.add_argument('--uploads', default='uploads')
+    args = parser.parse_args()
+
+    counts = migrate_from_json(SqliteStore(args.db), args.homework, args.students, args.leaves, args.uploads)
+    print('导入完成：' + '，'.join(f"{k} {v} 条" for k, v in counts.items()))
@@ -0,0 +1,115 @@
+import os
+import re
+import gzip
+import hashlib
+import mimetypes
+
+try:
+    import brotli
+except ImportError:
+    # brotli 为可选依赖，未安装时只提供 gzip 压缩版本
+    brotli = None
+
+# 只有超过这个大小的文件才值得压缩
+COMPRESS_MIN_SIZE = 1024
+# 单个文件超过这个大小不放入内存，仍从磁盘读取
+MEMORY_MAX_SIZE = 4 * 1024 * 1024
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+# 页面中引用的 js/css 路径，例如 ../js/vue.min.js
+ASSET_REF_RE = re.compile(r'''((?:src|href)=["'])((?:\.\./|/)?)(js|css)/([^"'?#]+)(["'])''')
+
+
+class StaticAsset:
+    def __init__(self, path, data):
+        self.path = path
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.data = data
+        self.etag = hashlib.sha1(data).hexdigest()
+        self.mtime = os.path.getmtime(path)
+        # {编码: 压缩后的内容}，压缩后反而更大的编码不保留
+        self.encoded = {}
+        if len(data) >= COMPRESS_MIN_SIZE and self.mimetype.startswith(COMPRESSIBLE_TYPES):
+            candidates = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                candidates['br'] = brotli.compress(data, quality=11)
+            for encoding, body in candidates.items():
+                if len(body) < len(data):
+                    self.encoded[encoding] = body
+
+    def fingerprinted_name(self, filename):
+        # vue.min.js -> vue.min.1a2b3c4d5e.js
+        stem, ext = os.path.splitext(filename)
+        return f'{stem}.{self.etag[:10]}{ext}'
+
+
+class StaticAssets:
+    """生产环境的静态资源服务。
+
+    启动时把 js/css/pages 目录下的文件读入内存并预先压缩（gzip，装有 brotli
+    时另加 br），按客户端的 Accept-Encoding 返回压缩版本。js/css 文件名附加
+    内容摘要后可以长期缓存，页面中的引用在加载时改写为带摘要的文件名。
+    """
+
+    def __init__(self, root, folders=('js', 'css', 'pages')):
+        self.root = root
+        # {(目录, 文件名): StaticAsset}，带摘要的文件名也指向同一个对象
+        self.assets = {}
+        # {(目录, 原文件名): 带摘要的文件名}
+        self.fingerprints = {}
+        # 先加载 js/css，页面中的引用才能改写为带摘要的文件名
+        for folder in folders:
+            if folder == 'pages':
+                continue
+            base = os.path.join(root, folder)
+            for dirpath, _, files in os.walk(base):
+                for name in files:
+                    path = os.path.join(dirpath, name)
+                    data = self._read(path)
+                    if data is not None:
+                        filename = os.path.relpath(path, base).replace(os.sep, '/')
+                        self._add(folder, filename, path, data)
+        if 'pages' in folders:
+            base = os.path.join(root, 'pages')
+            for name in os.listdir(base) if os.path.isdir(base) else []:
+                path = os.path.join(base, name)
+                data = self._read(path) if os.path.isfile(path) else None
+                if data is not None:
+                    if name.endswith('.html'):
+                        data = self.rewrite_refs(data.decode('utf-8')).encode('utf-8')
+                    self.assets[('pages', name)] = StaticAsset(path, data)
+
+    def _read(self, path):
+        if os.path.getsize(path) > MEMORY_MAX_SIZE:
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def _add(self, folder, filename, path, data):
+        asset = StaticAsset(path, data)
+        fingerprinted = asset.fingerprinted_name(filename)
+        self.assets[(folder, filename)] = asset
+        self.assets[(folder, fingerprinted)] = asset
+        self.fingerprints[(folder, filename)] = fingerprinted
+
+    def rewrite_refs(self, html):
+        def replace(m):
+            prefix, root, folder, filename, quote = m.groups()
+            fingerprinted = self.fingerprints.get((folder, filename))
+            if fingerprinted is None:
+                return m.group(0)
+            return f'{prefix}{root}{folder}/{fingerprinted}{quote}'
+        return ASSET_REF_RE.sub(replace, html)
+
+    def is_fingerprinted(self, folder, filename):
+        return folder != 'pages' and (folder, filename) in self.assets \
+            and (folder, filename) not in self.fingerprints
+
+    def get(self, folder, filename):
+        return self.assets.get((folder, filename))
+
+    def choose_encoding(self, asset, accept_encodings):
+        """按 Accept-Encoding 选择压缩版本，优先 br，返回 (编码, 内容)"""
+        for encoding in ('br', 'gzip'):
+            if encoding in asset.encoded and accept_encodings[encoding] > 0:
+                return encoding, asset.encoded[encoding]
+        return None, asset.data
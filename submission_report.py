@@ -0,0 +1,98 @@
+import io
+import csv
+import tempfile
+
+try:
+    from openpyxl import Workbook
+except ImportError:
+    # openpyxl 为可选依赖，未安装时只能导出 CSV
+    Workbook = None
+
+SUBMITTED_MARK = '已交'
+MISSING_MARK = '未交'
+
+
+class SubmissionMatrix:
+    """学生 × 作业的提交矩阵。
+
+    每个作业的已提交学生用一个整数位图表示（第 i 位对应第 i 个学生），
+    未提交名单由全体位图与已提交位图按位运算得到，多个作业一次算完。
+    """
+
+    def __init__(self, students, homework_list, submitted_by_homework):
+        # students: [{'studentId', 'name'}]，submitted_by_homework: {作业 id（字符串）: 学号集合}
+        self.students = students
+        self.homework = homework_list
+        position = {s['studentId']: i for i, s in enumerate(students)}
+        self.all_mask = (1 << len(students)) - 1
+        self.masks = []
+        for homework in homework_list:
+            mask = 0
+            for student_id in submitted_by_homework.get(str(homework['id']), ()):
+                i = position.get(student_id)
+                if i is not None:
+                    mask |= 1 << i
+            self.masks.append(mask)
+        self.missing_masks = [self.all_mask & ~mask for mask in self.masks]
+
+    @staticmethod
+    def _bits(mask):
+        # 依次取出为 1 的位的序号
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def missing_counts(self):
+        return [bin(mask).count('1') for mask in self.missing_masks]
+
+    def missing_pairs(self):
+        """逐个返回 (作业, 学生)，顺序与原来的未提交列表一致"""
+        for homework, mask in zip(self.homework, self.missing_masks):
+            for i in self._bits(mask):
+                yield homework, self.students[i]
+
+    def rows(self):
+        """每个学生一行 '1'/'0' 字符串，第 j 位表示是否提交了第 j 个作业"""
+        for i in range(len(self.students)):
+            yield ''.join('1' if mask >> i & 1 else '0' for mask in self.masks)
+
+    def to_dict(self):
+        return {
+            'homework': [{'id': h['id'], 'title': h['title'], 'course_name': h['course_name'],
+                          'deadline': h['deadline']} for h in self.homework],
+            'students': [{'studentId': s['studentId'], 'name': s['name']} for s in self.students],
+            'matrix': list(self.rows()),
+            'missingCounts': self.missing_counts()
+        }
+
+    def _table(self):
+        yield ['学号', '姓名'] + [h['title'] for h in self.homework] + ['未交数']
+        for student, row in zip(self.students, self.rows()):
+            yield ([student['studentId'], student['name']]
+                   + [SUBMITTED_MARK if c == '1' else MISSING_MARK for c in row]
+                   + [row.count('0')])
+
+    def iter_csv(self):
+        """逐行生成 CSV，带 BOM 以便 Excel 正确识别 UTF-8"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        yield '\ufeff'.encode('utf-8')
+        for row in self._table():
+            writer.writerow(row)
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+    def write_xlsx(self):
+        """写入临时文件并返回（需要 openpyxl），使用只写模式逐行输出"""
+        if Workbook is None:
+            raise RuntimeError('导出 XLSX 需要安装 openpyxl')
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('提交情况')
+        for row in self._table():
+            sheet.append(row)
+        tmp = tempfile.TemporaryFile()
+        workbook.save(tmp)
+        tmp.seek(0)
+        return tmp
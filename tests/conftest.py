@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# app 使用相对路径保存数据，导入前切换到临时目录；限流单独测试，其余测试不受影响
+WORKDIR = tempfile.mkdtemp(prefix='homework-test-')
+os.chdir(WORKDIR)
+for name in ('RATE_LIMIT_STUDENT_PER_MINUTE', 'RATE_LIMIT_IP_PER_MINUTE', 'MAX_CONCURRENT_UPLOADS'):
+    os.environ.setdefault(name, '0')
+
+
+@pytest.fixture(scope='session', autouse=True)
+def flush_in_workdir():
+    yield
+    # 数据文件使用相对路径，pytest 结束时会还原工作目录，atexit 中再写回就会写到仓库目录
+    from datastore import flush_all
+    os.chdir(WORKDIR)
+    flush_all()
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def make_homework(client, app_module):
+    """发布一个作业并返回其 id"""
+    def make(**fields):
+        data = {'courseName': '课程', 'title': '作业', 'requirements': '要求', 'deadline': '2099-01-01T10:00',
+                'fileNameFormats': ['*.docx']}
+        data.update(fields)
+        assert client.post('/api/homework', json=data).get_json()['success']
+        return app_module.repo.load_homework()['homework'][-1]['id']
+    return make
+
+
+@pytest.fixture
+def make_student(client):
+    def make(student_id, name):
+        client.post('/api/students', json={'studentId': student_id, 'name': name})
+        return student_id, name
+    return make
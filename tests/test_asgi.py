@@ -0,0 +1,82 @@
+import io
+import json
+import asyncio
+from urllib.parse import quote
+
+from werkzeug.test import EnvironBuilder
+
+CHUNK = 64 * 1024
+
+
+def multipart(fields):
+    environ = EnvironBuilder(method='POST', data=fields).get_environ()
+    return environ['CONTENT_TYPE'], environ['wsgi.input'].read()
+
+
+def call(bridge, path, body, headers=(), method='POST'):
+    """用假的 receive/send 调用 ASGI 应用，返回 (状态码, 响应体, 已接收的消息数)"""
+    chunks = [body[i:i + CHUNK] for i in range(0, len(body), CHUNK)] or [b'']
+    received = []
+    sent = []
+
+    async def receive():
+        index = len(received)
+        received.append(index)
+        if index >= len(chunks):
+            return {'type': 'http.disconnect'}
+        return {'type': 'http.request', 'body': chunks[index], 'more_body': index < len(chunks) - 1}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'',
+             'headers': [(b'content-length', str(len(body)).encode())] +
+                        [(k.lower().encode(), v.encode('latin-1')) for k, v in headers],
+             'client': ('127.0.0.1', 1234), 'server': ('localhost', 80)}
+    asyncio.run(bridge(scope, receive, send))
+    status = sent[0]['status']
+    payload = b''.join(m.get('body', b'') for m in sent[1:])
+    return status, payload, len(received)
+
+
+def make_bridge(app_module, **kwargs):
+    from asgi import WsgiBridge
+    return WsgiBridge(app_module.app.wsgi_app, max_workers=2, **kwargs)
+
+
+def test_streamed_upload(app_module, make_student, make_homework):
+    homework_id = make_homework()
+    make_student('70001', '钱七')
+    content_type, body = multipart({'studentId': '70001', 'studentName': '钱七', 'homeworkId': str(homework_id),
+                                    'file0': (io.BytesIO(b'x' * (3 * 1024 * 1024)), 'a.docx')})
+    status, payload, _ = call(make_bridge(app_module), '/api/homework/upload', body, [('Content-Type', content_type)])
+    assert status == 200, payload
+    assert app_module.repo.get_submissions(homework_id, '70001', '钱七')[0]['filenames'] == ['a.docx']
+    key = app_module.submission_key(homework_id, '70001', '钱七', 'a.docx')
+    assert app_module.storage.stat(key)[0] == 3 * 1024 * 1024
+
+
+def test_rejected_upload_is_not_received(app_module, make_homework):
+    homework_id = make_homework()
+    content_type, body = multipart({'studentId': '70002', 'studentName': '孙八', 'homeworkId': str(homework_id),
+                                    'file0': (io.BytesIO(b'x' * (3 * 1024 * 1024)), 'a.docx')})
+    headers = [('Content-Type', content_type), ('X-Student-Id', '70002'), ('X-Student-Name', quote('孙八')),
+               ('X-Homework-Id', str(homework_id))]
+    status, payload, received = call(make_bridge(app_module), '/api/homework/upload', body, headers)
+    # 学生不存在，请求头检查后直接拒绝，请求体只接收了第一段
+    assert status == 400
+    assert received == 1
+
+
+def test_declared_length_over_limit(app_module):
+    status, payload, received = call(make_bridge(app_module, max_content_length=1024), '/api/homework/upload',
+                                     b'x' * 4096, [('Content-Type', 'application/octet-stream')])
+    assert status == 413
+    assert json.loads(payload)['success'] is False
+    assert received == 0
+
+
+def test_small_json_body(app_module):
+    body = json.dumps({'studentId': '70003', 'name': '周九'}).encode()
+    status, payload, _ = call(make_bridge(app_module), '/api/students', body, [('Content-Type', 'application/json')])
+    assert status == 200, payload
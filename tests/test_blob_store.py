@@ -0,0 +1,56 @@
+import os
+import shutil
+
+import pytest
+
+from blob_store import BlobStore
+
+
+@pytest.fixture
+def blobs(tmp_path):
+    return BlobStore(str(tmp_path / 'blobs'), str(tmp_path / 'blob_refs.json'))
+
+
+def put(blobs, directory, filename, content):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, filename)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path, blobs.adopt(path)
+
+
+def test_blob_reclaimed_after_both_copies_deleted(blobs, tmp_path):
+    first = str(tmp_path / 'uploads' / 'homework_1' / '1_甲')
+    second = str(tmp_path / 'uploads' / 'homework_1' / '2_乙')
+    path, digest = put(blobs, first, 'a.docx', b'same content')
+    other, other_digest = put(blobs, second, 'b.docx', b'same content')
+    assert digest == other_digest
+    assert os.path.samefile(path, other)
+
+    # 还有一份引用时不能回收
+    shutil.rmtree(first)
+    assert blobs.release(first) == 0
+    assert os.path.exists(blobs.blob_path(digest))
+
+    shutil.rmtree(second)
+    assert blobs.release(second) == len(b'same content')
+    assert not os.path.exists(blobs.blob_path(digest))
+
+
+def test_export_does_not_pin_blob(blobs, tmp_path):
+    directory = str(tmp_path / 'uploads' / 'homework_1' / '1_甲')
+    path, digest = put(blobs, directory, 'a.docx', b'exported')
+    export_dir = tmp_path / 'export'
+    export_dir.mkdir()
+    dst = str(export_dir / 'a.docx')
+    # 以前导出的硬链接会被替换，而不是覆盖写入共享的内容
+    os.link(path, dst)
+    blobs.export(path, dst)
+    assert not os.path.samefile(path, dst)
+    with open(dst, 'rb') as f:
+        assert f.read() == b'exported'
+
+    shutil.rmtree(directory)
+    assert blobs.release(directory) == len(b'exported')
+    assert not os.path.exists(blobs.blob_path(digest))
+    assert os.path.exists(dst)
@@ -0,0 +1,77 @@
+import hashlib
+import os
+
+import pytest
+
+from upload_sessions import UploadSessionManager
+
+
+@pytest.fixture
+def small_chunks(app_module, monkeypatch):
+    monkeypatch.setattr(app_module.upload_sessions, 'chunk_size', 4)
+
+
+def init(client, homework_id, student_id, name, files):
+    response = client.post('/api/homework/upload/init', json={
+        'studentId': student_id, 'studentName': name, 'homeworkId': homework_id, 'files': files})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def put(client, upload_id, file_index, chunk_index, data, sha256=None):
+    headers = {'X-Chunk-Sha256': sha256} if sha256 else {}
+    return client.put(f'/api/homework/upload/{upload_id}/{file_index}/{chunk_index}', data=data, headers=headers)
+
+
+def test_out_of_order_chunks(client, app_module, make_student, make_homework, small_chunks):
+    homework_id = make_homework()
+    make_student('85001', '甲一')
+    content = b'0123456789'
+    session = init(client, homework_id, '85001', '甲一', [{'filename': 'a.docx', 'size': len(content)}])
+    assert session['files'][0]['totalChunks'] == 3
+    for index in (2, 0, 1):
+        chunk = content[index * 4:(index + 1) * 4]
+        assert put(client, session['uploadId'], 0, index, chunk, hashlib.sha256(chunk).hexdigest()).status_code == 200
+    assert client.post(f"/api/homework/upload/{session['uploadId']}/commit").status_code == 200
+
+    key = app_module.submission_key(homework_id, '85001', '甲一', 'a.docx')
+    with app_module.storage.open(key) as f:
+        assert f.read() == content
+    assert app_module.repo.get_submissions(homework_id, '85001', '甲一')[0]['filenames'] == ['a.docx']
+
+
+def test_chunk_hash_mismatch_and_missing_chunks(client, make_student, make_homework, small_chunks):
+    homework_id = make_homework()
+    make_student('85002', '乙二')
+    session = init(client, homework_id, '85002', '乙二', [{'filename': 'a.docx', 'size': 8}])
+    upload_id = session['uploadId']
+
+    response = put(client, upload_id, 0, 0, b'abcd', '0' * 64)
+    assert response.status_code == 400
+    assert put(client, upload_id, 0, 1, b'efgh').status_code == 200
+    assert client.get(f'/api/homework/upload/{upload_id}').get_json()['missing'] == {'0': [0]}
+
+    response = client.post(f'/api/homework/upload/{upload_id}/commit')
+    assert response.status_code == 409
+    assert response.get_json()['missing'] == {'0': [0]}
+
+    assert put(client, upload_id, 0, 0, b'abcd').status_code == 200
+    assert client.post(f'/api/homework/upload/{upload_id}/commit').status_code == 200
+
+
+def test_expired_sessions_remove_part_files(tmp_path):
+    manager = UploadSessionManager(str(tmp_path / 'sessions.json'), chunk_size=4, expire_seconds=60)
+    student_dir = tmp_path / 'homework_1' / '1_甲'
+    student_dir.mkdir(parents=True)
+    session = manager.create(str(student_dir), {'homework_id': '1'}, [{'filename': 'a.docx', 'size': 10}])
+    part = student_dir / f".upload_{session['id']}_0.part"
+    # 临时文件按文件大小预先分配
+    assert os.path.getsize(part) == 10
+
+    manager.purge_expired()
+    assert part.exists()
+
+    manager.expire_seconds = -1
+    manager.purge_expired()
+    assert not part.exists()
+    assert manager.get(session['id']) is None
@@ -0,0 +1,35 @@
+ORIGIN = 'http://frontend.example'
+
+
+def preflight(client, path, method, headers):
+    return client.options(path, headers={'Origin': ORIGIN, 'Access-Control-Request-Method': method,
+                                         'Access-Control-Request-Headers': ', '.join(headers)})
+
+
+def allowed_headers(response):
+    return {h.strip().lower() for h in response.headers.get('Access-Control-Allow-Headers', '').split(',')}
+
+
+def test_upload_preflight_allows_identity_headers(client):
+    headers = ['content-type', 'x-student-id', 'x-student-name', 'x-homework-id']
+    response = preflight(client, '/api/homework/upload', 'POST', headers)
+    assert response.status_code == 200
+    assert set(headers) <= allowed_headers(response)
+
+
+def test_chunk_preflight_allows_checksum_header(client):
+    headers = ['content-type', 'x-chunk-sha256']
+    response = preflight(client, '/api/homework/upload/abc/0/0', 'PUT', headers)
+    assert set(headers) <= allowed_headers(response)
+
+
+def test_retry_after_exposed(client):
+    response = client.get('/api/homework', headers={'Origin': ORIGIN})
+    assert 'retry-after' in response.headers['Access-Control-Expose-Headers'].lower()
+
+
+def test_leave_preflight_allows_student_header(client):
+    headers = ['content-type', 'x-student-id']
+    response = preflight(client, '/api/leave', 'POST', headers)
+    assert response.status_code == 200
+    assert set(headers) <= allowed_headers(response)
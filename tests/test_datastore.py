@@ -0,0 +1,145 @@
+import json
+import multiprocessing
+
+from datastore import JsonDataStore, JsonRepository, flush_all, META_KEY
+
+
+def make_repo(tmp_path, shared=False):
+    return JsonRepository(str(tmp_path / 'homework.json'), str(tmp_path / 'students.json'),
+                          str(tmp_path / 'leaves.json'), str(tmp_path / 'uploads'),
+                          str(tmp_path / 'index.json'), shared=shared)
+
+
+def test_next_id_kept_out_of_returned_data(tmp_path):
+    repo = make_repo(tmp_path)
+    first = repo.insert_student({'studentId': '1', 'name': '甲'})
+    second = repo.insert_student({'studentId': '2', 'name': '乙'})
+    assert (first['id'], second['id']) == (1, 2)
+    assert list(repo.load_students()) == ['students']
+
+    repo.delete_student(second['id'])
+    flush_all()
+    saved = json.loads((tmp_path / 'students.json').read_text(encoding='utf-8'))
+    assert 'next_id' not in saved
+    assert saved[META_KEY]['next_id'] == 3
+
+    # 重新打开后删除过的编号也不会复用
+    repo = make_repo(tmp_path)
+    assert repo.insert_student({'studentId': '3', 'name': '丙'})['id'] == 3
+
+
+def test_legacy_top_level_next_id(tmp_path):
+    (tmp_path / 'homework.json').write_text(json.dumps({'homework': [{'id': 1, 'title': 'a'}], 'next_id': 7}),
+                                            encoding='utf-8')
+    repo = make_repo(tmp_path)
+    assert list(repo.load_homework()) == ['homework']
+    assert repo.insert_homework({'title': 'b'})['id'] == 7
+
+
+def test_api_lists_only_records(client, make_student, make_homework):
+    make_student('30001', '张三')
+    make_homework()
+    assert list(client.get('/api/students').get_json()) == ['students']
+    assert list(client.get('/api/homework').get_json()) == ['homework']
+
+
+def leave(reason):
+    # 每个学生每天只能请假一次，学号随 reason 变化
+    return {'studentName': '甲', 'studentId': reason, 'leaveType': '事假', 'reason': reason, 'leaveImages': [],
+            'submitTime': '2024-01-01 10:00:00', 'status': 'pending'}
+
+
+def reasons(repo):
+    return [l['reason'] for l in repo.load_leaves()['leaves']]
+
+
+def test_torn_journal_tail_does_not_hide_later_writes(tmp_path):
+    repo = make_repo(tmp_path)
+    for reason in ('1', '2', '3'):
+        repo.insert_leave(leave(reason))
+    journal = tmp_path / 'leaves.json.journal'
+    # 模拟追加最后一行时进程崩溃
+    journal.write_bytes(journal.read_bytes()[:-15])
+
+    repo = make_repo(tmp_path)
+    assert reasons(repo) == ['1', '2']
+    repo.insert_leave(leave('4'))
+    repo.insert_leave(leave('5'))
+
+    repo = make_repo(tmp_path)
+    assert reasons(repo) == ['1', '2', '4', '5']
+
+
+def test_torn_student_submissions_log(tmp_path):
+    from datastore import append_json_line, read_student_submissions, STUDENT_SUBMISSIONS_LOG
+    path = tmp_path / STUDENT_SUBMISSIONS_LOG
+    append_json_line(str(path), {'id': 1})
+    path.write_bytes(path.read_bytes() + b'{"id": 2, "fil')
+    append_json_line(str(path), {'id': 3})
+    assert read_student_submissions(str(tmp_path)) == [{'id': 1}, {'id': 3}]
+
+
+def test_journal_seq_kept_in_metadata(tmp_path):
+    repo = make_repo(tmp_path)
+    repo.insert_leave(leave('1'))
+    flush_all()
+    saved = json.loads((tmp_path / 'leaves.json').read_text(encoding='utf-8'))
+    assert 'journal_seq' not in saved
+    assert saved[META_KEY]['journal_seq'] == 1
+    assert list(make_repo(tmp_path).load_leaves()) == ['leaves']
+
+
+def test_delete_homework_without_submission_index(tmp_path):
+    repo = JsonRepository(str(tmp_path / 'homework.json'), str(tmp_path / 'students.json'),
+                          str(tmp_path / 'leaves.json'), str(tmp_path / 'uploads'), None)
+    homework = repo.insert_homework({'title': 'a'})
+    repo.delete_homework(homework['id'])
+    assert repo.load_homework()['homework'] == []
+
+
+def append_item(data, entry):
+    data['items'].append(entry['value'])
+
+
+def test_journal_compaction(tmp_path):
+    path = tmp_path / 'items.json'
+    journal = tmp_path / 'items.json.journal'
+    store = JsonDataStore(str(path), lambda: {'items': []}, apply_entry=append_item, compact_every=3)
+    store.append({'value': 1})
+    store.append({'value': 2})
+    assert len(journal.read_text(encoding='utf-8').splitlines()) == 2
+    assert not path.exists()
+
+    # 达到 compact_every 条后合并为快照并清空日志
+    store.append({'value': 3})
+    assert journal.read_text(encoding='utf-8') == ''
+    saved = json.loads(path.read_text(encoding='utf-8'))
+    assert saved['items'] == [1, 2, 3]
+    assert saved[META_KEY]['journal_seq'] == 3
+
+    store.append({'value': 4})
+    reopened = JsonDataStore(str(path), lambda: {'items': []}, apply_entry=append_item, compact_every=3)
+    assert reopened.load() == {'items': [1, 2, 3, 4]}
+
+
+def insert_in_other_process(tmp_path):
+    repo = make_repo(tmp_path, shared=True)
+    repo.insert_leave(leave('子进程'))
+    repo.insert_student({'studentId': '2', 'name': '乙'})
+
+
+def test_shared_repository_reloads_other_process_writes(tmp_path):
+    repo = make_repo(tmp_path, shared=True)
+    repo.insert_leave(leave('父进程'))
+    repo.insert_student({'studentId': '1', 'name': '甲'})
+
+    process = multiprocessing.get_context('fork').Process(target=insert_in_other_process, args=(tmp_path,))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+
+    # 另一个进程写入的请假（追加日志）和学生（整体保存）都能看到，编号也不冲突
+    assert reasons(repo) == ['父进程', '子进程']
+    assert repo.find_student('2')['name'] == '乙'
+    assert [s['id'] for s in repo.load_students()['students']] == [1, 2]
+    assert repo.insert_leave(leave('再次'))['id'] == 3
@@ -0,0 +1,72 @@
+import io
+import zipfile
+
+
+def submit(client, homework_id, student_id, name, filename='a.docx', content=b'content'):
+    response = client.post('/api/homework/upload', data={
+        'studentId': student_id, 'studentName': name, 'homeworkId': str(homework_id),
+        'file0': (io.BytesIO(content), filename)}, content_type='multipart/form-data')
+    assert response.get_json()['success'], response.get_json()
+
+
+def test_zip_range_requests(client, make_student, make_homework):
+    homework_id = make_homework()
+    make_student('60001', '赵六')
+    submit(client, homework_id, '60001', '赵六', content=b'x' * 100)
+    url = f'/api/homework/{homework_id}/download-all.zip'
+
+    full = client.get(url)
+    assert full.status_code == 200
+    size = len(full.data)
+
+    part = client.get(url, headers={'Range': 'bytes=0-9'})
+    assert part.status_code == 206
+    assert part.data == full.data[:10]
+    assert part.headers['Content-Range'] == f'bytes 0-9/{size}'
+
+    # 多个区间不支持，忽略 Range 返回完整归档
+    multi = client.get(url, headers={'Range': 'bytes=0-9,20-29'})
+    assert multi.status_code == 200
+    assert multi.data == full.data
+
+    assert client.get(url, headers={'Range': f'bytes={size + 10}-'}).status_code == 416
+
+
+def test_zip_streams_crc_without_extra_reads(client, make_student, make_homework, monkeypatch):
+    import zip_stream
+
+    homework_id = make_homework()
+    make_student('60002', '钱七')
+    submit(client, homework_id, '60002', '钱七', content=b'y' * 1000)
+    url = f'/api/homework/{homework_id}/download-all.zip'
+
+    # 完整下载时 CRC 边发送边计算，不应该事先把文件读一遍
+    def no_precompute(*args):
+        raise AssertionError('完整下载不应预先计算 CRC')
+    monkeypatch.setattr(zip_stream, '_file_crc', no_precompute)
+    full = client.get(url)
+    assert full.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(full.data)) as archive:
+        assert archive.testzip() is None
+        assert archive.read('a.docx') == b'y' * 1000
+    monkeypatch.undo()
+
+    # 从文件中间开始的 Range 请求使用预先计算的 CRC，结果与完整下载一致
+    zip_stream._crc_cache.clear()
+    tail = client.get(url, headers={'Range': 'bytes=100-', 'If-Range': full.headers['ETag']})
+    assert tail.status_code == 206
+    assert tail.data == full.data[100:]
+
+
+def test_zip_keeps_duplicate_filenames(client, make_student, make_homework):
+    homework_id = make_homework()
+    make_student('60003', '孙八')
+    make_student('60004', '李九')
+    submit(client, homework_id, '60003', '孙八', content=b'first')
+    submit(client, homework_id, '60004', '李九', content=b'second')
+
+    response = client.get(f'/api/homework/{homework_id}/download-all.zip')
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        contents = sorted(archive.read(name) for name in archive.namelist())
+        assert len(archive.namelist()) == 2
+    assert contents == [b'first', b'second']
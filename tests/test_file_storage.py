@@ -0,0 +1,180 @@
+import io
+import zipfile
+import datetime
+
+import pytest
+
+import file_storage
+from file_storage import LocalStorage, S3Storage
+
+
+class FakeClientError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {'Error': {'Code': code}}
+
+
+class FakeS3:
+    """内存中的 S3 客户端替身，只实现 S3Storage 用到的方法"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def upload_fileobj(self, f, bucket, key):
+        chunks = []
+        while True:
+            buf = f.read(8192)
+            if not buf:
+                break
+            chunks.append(buf)
+        self.objects[(bucket, key)] = (b''.join(chunks), datetime.datetime.now(datetime.timezone.utc))
+
+    def upload_file(self, path, bucket, key):
+        with open(path, 'rb') as f:
+            self.upload_fileobj(f, bucket, key)
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise FakeClientError('404')
+        data, modified = self.objects[(Bucket, Key)]
+        return {'ContentLength': len(data), 'LastModified': modified}
+
+    def get_object(self, Bucket, Key, Range=None):
+        if (Bucket, Key) not in self.objects:
+            raise FakeClientError('NoSuchKey')
+        data = self.objects[(Bucket, Key)][0]
+        if Range:
+            lo, hi = Range[len('bytes='):].split('-')
+            data = data[int(lo):int(hi) + 1]
+        return {'Body': io.BytesIO(data)}
+
+    def download_file(self, bucket, key, path):
+        with open(path, 'wb') as f:
+            f.write(self.objects[(bucket, key)][0])
+
+    def get_paginator(self, name):
+        objects = self.objects
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                yield {'Contents': [{'Key': k} for b, k in list(objects) if b == Bucket and k.startswith(Prefix)]}
+
+        return Paginator()
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def delete_objects(self, Bucket, Delete):
+        for item in Delete['Objects']:
+            self.objects.pop((Bucket, item['Key']), None)
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        disposition = Params.get('ResponseContentDisposition', '')
+        return f"http://s3.local/{Params['Bucket']}/{Params['Key']}?expires={ExpiresIn}&cd={disposition}"
+
+
+@pytest.fixture
+def fake_s3(monkeypatch):
+    monkeypatch.setattr(file_storage, 'ClientError', FakeClientError)
+    return FakeS3()
+
+
+@pytest.fixture(params=['local', 's3'])
+def storage(request, tmp_path, fake_s3):
+    if request.param == 'local':
+        return LocalStorage(str(tmp_path / 'files'))
+    return S3Storage('bucket', 'uploads', client=fake_s3)
+
+
+def test_put_stat_open_delete(storage):
+    data = b'0123456789' * 1000
+    assert storage.put('homework_1/1_甲/a.docx', io.BytesIO(data)) == len(data)
+    storage.put('homework_1/2_乙/b.docx', io.BytesIO(b'b'))
+    storage.put('homework_2/1_甲/c.docx', io.BytesIO(b'c'))
+
+    size, mtime_ns = storage.stat('homework_1/1_甲/a.docx')
+    assert size == len(data) and mtime_ns > 0
+    assert storage.stat('homework_1/1_甲/missing.docx') is None
+
+    body = storage.open('homework_1/1_甲/a.docx')
+    try:
+        assert body.read() == data
+    finally:
+        body.close()
+
+    storage.delete_prefix('homework_1')
+    assert storage.stat('homework_1/1_甲/a.docx') is None
+    assert storage.stat('homework_1/2_乙/b.docx') is None
+    assert storage.stat('homework_2/1_甲/c.docx') is not None
+
+    storage.delete('homework_2/1_甲/c.docx')
+    assert storage.stat('homework_2/1_甲/c.docx') is None
+    # 删除不存在的文件不报错
+    storage.delete('homework_2/1_甲/c.docx')
+
+
+def test_streaming_range_reads(storage):
+    data = bytes(range(256)) * 1024
+    storage.put('k/file.bin', io.BytesIO(data))
+    chunks = list(storage.iter_range('k/file.bin', 100, len(data) - 100))
+    # 按块读取，不一次读入整个文件
+    assert len(chunks) > 1
+    assert max(len(c) for c in chunks) <= file_storage.READ_BUFFER_SIZE
+    assert b''.join(chunks) == data[100:-100]
+    assert list(storage.iter_range('k/file.bin', 10, 10)) == []
+
+
+def test_put_file_and_copy_to(storage, tmp_path):
+    source = tmp_path / 'assembled.bin'
+    source.write_bytes(b'assembled')
+    storage.put_file('k/assembled.bin', str(source))
+    assert not source.exists()
+    target = tmp_path / 'copy.bin'
+    storage.copy_to('k/assembled.bin', str(target))
+    assert target.read_bytes() == b'assembled'
+
+
+def test_download_url(storage):
+    storage.put('k/报告.docx', io.BytesIO(b'x'))
+    url = storage.download_url('k/报告.docx', '报告.docx')
+    if storage.is_local:
+        assert url is None
+    else:
+        assert url.startswith('http://s3.local/bucket/uploads/k/')
+        assert "filename*=UTF-8''" in url
+
+
+def test_upload_and_zip_go_through_backend(client, app_module, make_student, make_homework, fake_s3, monkeypatch):
+    monkeypatch.setattr(app_module, 'storage', S3Storage('bucket', 'uploads', client=fake_s3))
+    homework_id = make_homework()
+    make_student('90001', '郑一')
+    response = client.post('/api/homework/upload', data={
+        'studentId': '90001', 'studentName': '郑一', 'homeworkId': str(homework_id),
+        'file0': (io.BytesIO(b'from s3'), 'a.docx')}, content_type='multipart/form-data')
+    assert response.status_code == 200, response.get_json()
+    assert ('bucket', f'uploads/homework_{homework_id}/90001_郑一/a.docx') in fake_s3.objects
+
+    archive = client.get(f'/api/homework/{homework_id}/download-all.zip')
+    assert archive.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(archive.data)) as zf:
+        assert zf.read('a.docx') == b'from s3'
+
+    # 单个文件重定向到对象存储的临时链接
+    single = client.get(f'/api/submissions/{homework_id}/90001/a.docx')
+    assert single.status_code in (302, 307)
+    assert single.headers['Location'].startswith('http://s3.local/bucket/uploads/')
+
+
+def test_chunked_upload_goes_through_backend(client, app_module, make_student, make_homework, fake_s3,
+                                             monkeypatch):
+    monkeypatch.setattr(app_module, 'storage', S3Storage('bucket', 'uploads', client=fake_s3))
+    homework_id = make_homework()
+    make_student('90002', '王二')
+    init = client.post('/api/homework/upload/init', json={
+        'studentId': '90002', 'studentName': '王二', 'homeworkId': homework_id,
+        'files': [{'filename': 'b.docx', 'size': 5}]}).get_json()
+    upload_id = init['uploadId']
+    assert client.put(f'/api/homework/upload/{upload_id}/0/0', data=b'hello').get_json()['success']
+    assert client.post(f'/api/homework/upload/{upload_id}/commit').get_json()['success']
+    data, _ = fake_s3.objects[('bucket', f'uploads/homework_{homework_id}/90002_王二/b.docx')]
+    assert data == b'hello'
@@ -0,0 +1,29 @@
+import pytest
+
+from filename_formats import FileNameTemplate, compile_formats
+
+VALUES = {'学号': '1001', '姓名': '张三', '作业编号': '3'}
+
+
+def test_regex_quantifier_braces():
+    template = FileNameTemplate(r're:{学号}_\d{2}\.txt')
+    assert template.match('1001_12.txt', VALUES)
+    assert not template.match('1001_1.txt', VALUES)
+    assert not template.match('1002_12.txt', VALUES)
+
+
+def test_regex_legacy_doubled_braces():
+    assert FileNameTemplate(r're:{学号}_\d{{2}}\.txt').match('1001_12.txt', VALUES)
+
+
+def test_unknown_placeholder_rejected_outside_regex():
+    with pytest.raises(ValueError):
+        FileNameTemplate('{foo}.docx')
+    assert compile_formats((r're:{学号}_[',)).errors
+
+
+def test_homework_accepts_regex_quantifier(client):
+    response = client.post('/api/homework', json={
+        'courseName': '课程', 'title': '正则', 'requirements': '要求', 'deadline': '2099-01-01T10:00',
+        'fileNameFormats': [r're:{学号}_\d{2}\.txt']})
+    assert response.status_code == 200, response.get_json()
@@ -0,0 +1,33 @@
+def add_leave(app_module, student_id, reason):
+    return app_module.repo.insert_leave({
+        'studentName': '请假', 'studentId': student_id, 'leaveType': '事假', 'reason': reason,
+        'leaveImages': [], 'submitTime': '2024-01-01 10:00:00', 'status': 'pending'})
+
+
+def leave_statuses(app_module, ids):
+    return {l['id']: l['status'] for l in app_module.repo.load_leaves()['leaves'] if l['id'] in ids}
+
+
+def test_batch_approve_reports_each_id(client, app_module):
+    first = add_leave(app_module, '18001', '1')['id']
+    second = add_leave(app_module, '18002', '2')['id']
+    missing = 10 ** 9
+
+    result = client.post('/api/leave/batch', json={'action': 'approve', 'ids': [first, missing, second]}).get_json()
+    assert result['success'] and result['updated'] == 2
+    assert result['results'] == [
+        {'id': first, 'status': '已批准', 'success': True, 'message': ''},
+        {'id': missing, 'status': None, 'success': False, 'message': '请假记录不存在'},
+        {'id': second, 'status': '已批准', 'success': True, 'message': ''},
+    ]
+    assert leave_statuses(app_module, {first, second}) == {first: '已批准', second: '已批准'}
+
+    result = client.post('/api/leave/batch', json={'action': 'reject', 'ids': [second]}).get_json()
+    assert result['updated'] == 1
+    assert leave_statuses(app_module, {first, second}) == {first: '已批准', second: '已拒绝'}
+
+
+def test_batch_rejects_bad_requests(client):
+    assert client.post('/api/leave/batch', json={'action': 'delete', 'ids': [1]}).status_code == 400
+    assert client.post('/api/leave/batch', json={'action': 'approve', 'ids': '1'}).status_code == 400
+    assert client.post('/api/leave/batch', json={'action': 'approve', 'ids': ['1']}).status_code == 400
@@ -0,0 +1,65 @@
+from rate_limit import TokenBucketLimiter, ConcurrencyLimiter
+
+
+def test_token_bucket():
+    limiter = TokenBucketLimiter(rate=1, burst=2)
+    assert limiter.acquire('a') == 0
+    assert limiter.acquire('a') == 0
+    assert 0 < limiter.acquire('a') <= 1
+    # 不同的键互不影响
+    assert limiter.acquire('b') == 0
+
+
+def test_concurrency_limiter():
+    slots = ConcurrencyLimiter(1)
+    assert slots.try_acquire()
+    assert not slots.try_acquire()
+    slots.release()
+    assert slots.try_acquire()
+
+
+def test_leave_rate_limited_by_student_header(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'student_limiter', TokenBucketLimiter(rate=1 / 60, burst=1))
+    headers = {'Origin': 'http://frontend.example', 'X-Student-Id': '95001'}
+    data = {'studentId': '95001', 'studentName': '无此人', 'leaveType': '事假', 'reason': '测试'}
+    first = client.post('/api/leave', data=data, headers=headers, content_type='multipart/form-data')
+    assert first.status_code == 400
+    second = client.post('/api/leave', data=data, headers=headers, content_type='multipart/form-data')
+    assert second.status_code == 429
+    assert int(second.headers['Retry-After']) >= 1
+    assert 'retry-after' in second.headers['Access-Control-Expose-Headers'].lower()
+
+
+def test_upload_slots_return_503(client, app_module, monkeypatch):
+    slots = ConcurrencyLimiter(1)
+    monkeypatch.setattr(app_module, 'upload_slots', slots)
+    assert slots.try_acquire()
+    response = client.post('/api/homework/upload', data={}, content_type='multipart/form-data')
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+    slots.release()
+    assert client.post('/api/homework/upload', data={}, content_type='multipart/form-data').status_code == 400
+    assert slots.active == 0
+
+
+def test_random_student_header_does_not_bypass_limit(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'student_limiter', TokenBucketLimiter(rate=1 / 60, burst=2))
+    data = {'studentId': '95002', 'studentName': '无此人', 'leaveType': '事假', 'reason': '测试'}
+
+    # 每次换一个请求头中的学号：与表单不一致直接拒绝，不会处理请求
+    for i in range(4):
+        response = client.post('/api/leave', data=data, headers={'X-Student-Id': f'random{i}'},
+                               content_type='multipart/form-data')
+        assert response.status_code == 400
+        assert response.get_json()['message'] == '请求头与表单中的学号不一致'
+
+    # 表单中的学号照常计数
+    statuses = [client.post('/api/leave', data=data, content_type='multipart/form-data').status_code
+                for _ in range(3)]
+    assert statuses == [400, 400, 429]
+
+    response = client.post('/api/homework/upload/preflight', json={
+        'studentId': '95003', 'studentName': '无此人', 'homeworkId': '1', 'files': [{'filename': 'a.docx'}]},
+        headers={'X-Student-Id': 'random'})
+    assert response.status_code == 400
+    assert response.get_json()['message'] == '请求头与表单中的学号不一致'
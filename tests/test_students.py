@@ -0,0 +1,61 @@
+import io
+
+
+def test_students_pagination_and_fields(client, make_student):
+    for i in range(5):
+        make_student(f'1300{i}', f'分页{i}')
+    full = client.get('/api/students').get_json()['students']
+
+    # 按页取完所有学生，结果与完整列表一致
+    pages, offset = [], 0
+    while offset is not None:
+        result = client.get(f'/api/students?offset={offset}&limit=2&sort=studentId&fields=studentId,name').get_json()
+        assert result['total'] == len(full)
+        assert result['limit'] == 2
+        assert len(result['students']) <= 2
+        pages.extend(result['students'])
+        offset = result['nextOffset']
+    assert all(set(s) == {'studentId', 'name'} for s in pages)
+    assert pages == sorted(({'studentId': s['studentId'], 'name': s['name']} for s in full),
+                           key=lambda s: s['studentId'])
+
+    desc = client.get('/api/students?sort=studentId&order=desc').get_json()['students']
+    ids = [s['studentId'] for s in desc]
+    assert ids == sorted(ids, reverse=True)
+
+
+def test_students_invalid_list_params(client):
+    for query in ('limit=0', 'limit=abc', 'offset=-1', 'sort=password', 'order=up'):
+        response = client.get(f'/api/students?{query}')
+        assert response.status_code == 400, query
+        assert response.get_json()['success'] is False
+
+
+def test_import_reports_each_row(client, make_student):
+    make_student('18101', '已有')
+    result = client.post('/api/students/import', json={'students': [
+        {'studentId': '18102', 'name': '新生'},
+        {'studentId': '18101', 'name': '已有'},
+        {'studentId': '18102', 'name': '重复'},
+        {'studentId': '', 'name': '无学号'},
+        'not a record',
+    ]}).get_json()
+    assert result['success'] and result['imported'] == 1
+    assert [(r['row'], r['status']) for r in result['results']] == [
+        (1, 'imported'), (2, 'skipped'), (3, 'skipped'), (4, 'error'), (5, 'error')]
+    assert result['results'][1]['message'] == '该学号已存在'
+    assert result['results'][2]['message'] == '与前面的记录学号重复'
+
+
+def test_import_csv_with_header(client, app_module):
+    csv_text = '姓名,学号\n表头,18201\n\n列序,18202\n'.encode('utf-8-sig')
+    result = client.post('/api/students/import', data={'file': (io.BytesIO(csv_text), 'roster.csv')},
+                         content_type='multipart/form-data').get_json()
+    assert result['imported'] == 2
+    assert app_module.repo.find_student('18201')['name'] == '表头'
+    assert app_module.repo.find_student('18202')['name'] == '列序'
+
+    bad = client.post('/api/students/import', data={'file': (io.BytesIO('学号\n1'.encode('gbk')), 'roster.csv')},
+                      content_type='multipart/form-data')
+    assert bad.status_code == 400
+    assert client.post('/api/students/import', json={}).status_code == 400
@@ -0,0 +1,176 @@
+import io
+import os
+import threading
+
+from datastore import JsonRepository
+from sqlite_store import SqliteStore
+
+SUBMISSION = {'id': 0, 'student_name': '甲', 'student_id': '1', 'homework_id': '1', 'description': '',
+              'filenames': ['a.docx'], 'submit_time': '2024-01-01 10:00:00', 'status': '已提交'}
+
+
+def json_workers(tmp_path, count):
+    # 多个 worker 进程各自创建仓库，共用同一组数据文件
+    os.makedirs(tmp_path / 'uploads' / 'homework_1' / '1_甲', exist_ok=True)
+    return [JsonRepository(str(tmp_path / 'homework.json'), str(tmp_path / 'students.json'),
+                           str(tmp_path / 'leaves.json'), str(tmp_path / 'uploads'),
+                           str(tmp_path / 'index.json'), shared=True) for _ in range(count)]
+
+
+def add_submission(repo):
+    return repo.add_submission('1', '1', '甲', SUBMISSION)
+
+
+def race(repos, action=add_submission):
+    barrier = threading.Barrier(len(repos))
+    results = []
+
+    def add(repo):
+        barrier.wait()
+        results.append(action(repo))
+
+    threads = [threading.Thread(target=add, args=(repo,)) for repo in repos]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_json_add_submission_once_across_workers(tmp_path):
+    repos = json_workers(tmp_path, 4)
+    assert sorted(race(repos)) == [False, False, False, True]
+    assert len(repos[0].get_submissions('1', '1', '甲')) == 1
+
+
+def test_sqlite_add_submission_once_across_connections(tmp_path):
+    path = str(tmp_path / 'homework.db')
+    repos = [SqliteStore(path) for _ in range(4)]
+    assert sorted(race(repos)) == [False, False, False, True]
+    assert len(repos[0].get_submissions('1', '1', '甲')) == 1
+
+
+def test_upload_rechecks_duplicate_when_saving(client, app_module, make_student, make_homework, monkeypatch):
+    homework_id = make_homework()
+    make_student('80001', '吴十')
+
+    def upload(content):
+        return client.post('/api/homework/upload', data={
+            'studentId': '80001', 'studentName': '吴十', 'homeworkId': str(homework_id),
+            'file0': (io.BytesIO(content), 'a.docx')}, content_type='multipart/form-data')
+
+    assert upload(b'first').status_code == 200
+    # 模拟两个 worker 同时通过了提前检查
+    monkeypatch.setattr(app_module.repo, 'get_submissions', lambda *args: [])
+    response = upload(b'second')
+    assert response.status_code == 400
+    monkeypatch.undo()
+
+    assert len(app_module.repo.get_submissions(homework_id, '80001', '吴十')) == 1
+    key = app_module.submission_key(homework_id, '80001', '吴十', 'a.docx')
+    with app_module.storage.open(key) as f:
+        assert f.read() == b'first'
+
+
+def test_query_requires_student_id(client, make_student, make_homework):
+    homework_id = make_homework()
+    make_student('80002', '冯十一')
+    client.post('/api/homework/upload', data={
+        'studentId': '80002', 'studentName': '冯十一', 'homeworkId': str(homework_id),
+        'file0': (io.BytesIO(b'x'), 'a.docx')}, content_type='multipart/form-data')
+
+    for query in ('', '?studentId=', '?studentName=冯十一'):
+        response = client.get(f'/api/query{query}')
+        assert response.status_code == 400
+        assert 'submissions' not in response.get_json()
+
+    submissions = client.get('/api/query?studentId=80002').get_json()['submissions']
+    assert [s['student_id'] for s in submissions] == ['80002']
+
+
+def test_upload_does_not_walk_directories(client, app_module, make_student, make_homework):
+    from metrics import directory_walks
+    homework_id = make_homework()
+    make_student('80003', '陈十二')
+    walks = directory_walks.render()
+    response = client.post('/api/homework/upload', data={
+        'studentId': '80003', 'studentName': '陈十二', 'homeworkId': str(homework_id), 'fileCount': '2',
+        'file0': (io.BytesIO(b'a'), 'a.docx'), 'file1': (io.BytesIO(b'b'), 'b.docx')},
+        content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert directory_walks.render() == walks
+    submission = app_module.repo.get_submissions(homework_id, '80003', '陈十二')[0]
+    assert submission['id'] == 2
+
+
+def sqlite_workers(tmp_path, count):
+    path = str(tmp_path / 'homework.db')
+    return [SqliteStore(path) for _ in range(count)]
+
+
+def insert_student(repo):
+    return repo.insert_student({'studentId': '1', 'name': '甲'}) is not None
+
+
+def insert_students(repo):
+    return [s is not None for s in repo.insert_students([{'studentId': '1', 'name': '甲'},
+                                                         {'studentId': '1', 'name': '甲'}])]
+
+
+def insert_leave(repo):
+    return repo.insert_leave({'studentName': '甲', 'studentId': '1', 'leaveType': '事假', 'reason': '病',
+                              'leaveImages': [], 'submitTime': '2024-01-01 10:00:00',
+                              'status': '待审核'}) is not None
+
+
+def test_insert_student_once_across_workers(tmp_path):
+    for repos in (json_workers(tmp_path / 'json', 4), sqlite_workers(tmp_path, 4)):
+        assert sorted(race(repos, insert_student)) == [False, False, False, True]
+        assert len(repos[0].load_students()['students']) == 1
+
+
+def test_insert_students_skips_existing_and_batch_duplicates(tmp_path):
+    for repos in (json_workers(tmp_path / 'json', 4), sqlite_workers(tmp_path, 4)):
+        results = race(repos, insert_students)
+        # 同一批中第二条总是重复；四批中只有一批的第一条写入成功
+        assert all(second is False for _, second in results)
+        assert sorted(first for first, _ in results) == [False, False, False, True]
+        assert len(repos[0].load_students()['students']) == 1
+
+
+def test_insert_leave_once_per_day_across_workers(tmp_path):
+    for repos in (json_workers(tmp_path / 'json', 4), sqlite_workers(tmp_path, 4)):
+        assert sorted(race(repos, insert_leave)) == [False, False, False, True]
+        assert len(repos[0].load_leaves()['leaves']) == 1
+
+
+def test_add_student_rechecks_duplicate_when_saving(client, app_module, monkeypatch):
+    assert client.post('/api/students', json={'studentId': '15001', 'name': '甲'}).get_json()['success']
+    monkeypatch.setattr(app_module.repo, 'find_student', lambda *args: None)
+    response = client.post('/api/students', json={'studentId': '15001', 'name': '乙'})
+    assert response.status_code == 400
+    assert response.get_json()['message'] == '该学号已存在'
+
+    result = client.post('/api/students/import', json={'students': [{'studentId': '15001', 'name': '乙'}]}).get_json()
+    assert result['imported'] == 0
+    assert result['results'][0]['status'] == 'skipped'
+
+
+def test_leave_rechecks_duplicate_and_removes_images(client, app_module, make_student, monkeypatch):
+    make_student('15002', '丙')
+
+    def submit():
+        return client.post('/api/leave', data={
+            'studentName': '丙', 'studentId': '15002', 'leaveType': '事假', 'reason': '病',
+            'leaveImages': (io.BytesIO(b'image'), 'note.png')}, content_type='multipart/form-data')
+
+    assert submit().get_json()['success']
+    # 模拟两个请求同时通过了提前检查
+    monkeypatch.setattr(app_module.repo, 'find_leave', lambda *args: None)
+    response = submit()
+    assert response.status_code == 400
+    images = [f for l in app_module.repo.load_leaves()['leaves'] if l['studentId'] == '15002'
+              for f in l['leaveImages']]
+    assert len(images) == 1
+    stored = os.listdir(app_module.LEAVE_IMAGE_FOLDER)
+    assert [f for f in stored if f.startswith('丙_15002_')] == images
@@ -0,0 +1,68 @@
+import re
+import hashlib
+import tempfile
+
+# 上传文件在内存中缓冲的上限，超过后转存到临时文件（与 werkzeug 默认一致）
+SPOOL_SIZE = 500 * 1024
+SHA256_PATTERN = re.compile(r'^[0-9a-fA-F]{64}$')
+
+
+class UploadTooLarge(Exception):
+    """上传文件超过大小上限（不继承 ValueError，werkzeug 解析表单时会吞掉 ValueError）"""
+
+    def __init__(self, limit):
+        super().__init__(f'文件大小超过上限 {format_size(limit)}')
+        self.limit = limit
+
+
+def format_size(size):
+    if size >= 1024 * 1024:
+        return f'{size / 1024 / 1024:.1f} MB'
+    return f'{size / 1024:.1f} KB'
+
+
+def normalize_sha256(value):
+    """校验客户端提供的 SHA-256，返回小写形式；为空时返回 None"""
+    if not value:
+        return None
+    if not SHA256_PATTERN.match(value):
+        raise ValueError('SHA-256 校验值格式错误')
+    return value.lower()
+
+
+class DigestingFile:
+    """解析上传请求时保存文件内容的临时文件。
+
+    werkzeug 每收到一段数据就调用 write，这里同时计算 SHA-256 并检查大小上限，
+    超过上限时立即抛出 UploadTooLarge，不再继续接收请求体；保存文件和校验
+    时直接使用已经算好的摘要，不需要再读一遍文件。
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._file = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size and self.size > self.max_size:
+            raise UploadTooLarge(self.max_size)
+        self._sha256.update(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._sha256.hexdigest()
+
+    def __getattr__(self, name):
+        # read、seek、tell、close 等交给临时文件
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._file.close()
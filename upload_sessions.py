@@ -0,0 +1,141 @@
+import os
+import time
+import uuid
+import hashlib
+
+from datastore import JsonDataStore, register_store
+
+# 默认分片大小 4MB
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+# 从请求体读取数据的缓冲区大小，保证单个分片的内存占用有上限
+COPY_BUFFER_SIZE = 64 * 1024
+# 未完成的上传会话保留时间（秒）
+SESSION_EXPIRE_SECONDS = 24 * 60 * 60
+
+
+class UploadSessionManager:
+    """分片续传上传会话。
+
+    每个会话对应一次作业提交，可包含多个文件。分片直接写入学生提交目录下的
+    临时文件（按偏移量写入，可并行上传），会话状态持久化到磁盘，服务重启后仍可续传。
+    """
+
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE, expire_seconds=SESSION_EXPIRE_SECONDS, shared=False):
+        self.chunk_size = chunk_size
+        self.expire_seconds = expire_seconds
+        self.store = register_store(JsonDataStore(path, lambda: {'sessions': {}}, shared=shared))
+
+    def _part_path(self, session, file_index):
+        return os.path.join(session['student_dir'], f".upload_{session['id']}_{file_index}.part")
+
+    def create(self, student_dir, info, files):
+        self.purge_expired()
+        session = dict(info, id=uuid.uuid4().hex, student_dir=student_dir, chunk_size=self.chunk_size,
+                       created_at=time.time(), files=[])
+        for f in files:
+            filename = os.path.basename(f.get('filename') or '')
+            size = int(f.get('size', -1))
+            if not filename or size < 0:
+                raise ValueError('文件信息不完整')
+            session['files'].append({
+                'filename': filename,
+                'size': size,
+                'total_chunks': max(1, -(-size // self.chunk_size)),
+                'received': []
+            })
+
+        # 预先创建临时文件，分片按偏移量写入
+        for i, f in enumerate(session['files']):
+            with open(self._part_path(session, i), 'wb') as part:
+                part.truncate(f['size'])
+
+        with self.store.lock:
+            data = self.store.load()
+            data['sessions'][session['id']] = session
+            self.store.save(data)
+        return session
+
+    def get(self, upload_id):
+        with self.store.lock:
+            return self.store.load()['sessions'].get(upload_id)
+
+    def missing_chunks(self, session):
+        missing = {}
+        for i, f in enumerate(session['files']):
+            chunks = sorted(set(range(f['total_chunks'])) - set(f['received']))
+            if chunks:
+                missing[str(i)] = chunks
+        return missing
+
+    def write_chunk(self, upload_id, file_index, chunk_index, stream, content_length, sha256=None):
+        """写入一个分片；指定 sha256 时边写边计算摘要，不一致的分片不计入已接收"""
+        session = self.get(upload_id)
+        if session is None:
+            raise ValueError('上传会话不存在或已过期')
+        if not 0 <= file_index < len(session['files']):
+            raise ValueError('文件序号错误')
+        f = session['files'][file_index]
+        if not 0 <= chunk_index < f['total_chunks']:
+            raise ValueError('分片序号错误')
+
+        offset = chunk_index * session['chunk_size']
+        expected = min(session['chunk_size'], f['size'] - offset)
+        if content_length is not None and content_length != expected:
+            raise ValueError(f'分片大小错误，应为 {expected} 字节')
+
+        written = 0
+        digest = hashlib.sha256()
+        with open(self._part_path(session, file_index), 'r+b') as part:
+            part.seek(offset)
+            while written < expected:
+                buf = stream.read(min(COPY_BUFFER_SIZE, expected - written))
+                if not buf:
+                    break
+                part.write(buf)
+                digest.update(buf)
+                written += len(buf)
+        if written != expected:
+            raise ValueError('分片数据不完整，请重新上传该分片')
+        if sha256 and digest.hexdigest() != sha256:
+            raise ValueError('分片校验失败，请重新上传该分片')
+
+        with self.store.lock:
+            data = self.store.load()
+            session = data['sessions'].get(upload_id)
+            if session is not None and chunk_index not in session['files'][file_index]['received']:
+                session['files'][file_index]['received'].append(chunk_index)
+                self.store.save(data)
+
+    def finish(self, upload_id):
+        """所有分片到齐后把临时文件重命名为正式文件名，返回文件名列表"""
+        with self.store.lock:
+            data = self.store.load()
+            session = data['sessions'].pop(upload_id, None)
+            if session is None:
+                raise ValueError('上传会话不存在或已过期')
+            self.store.save(data)
+        filenames = []
+        for i, f in enumerate(session['files']):
+            os.replace(self._part_path(session, i), os.path.join(session['student_dir'], f['filename']))
+            filenames.append(f['filename'])
+        return filenames
+
+    def abort(self, upload_id):
+        with self.store.lock:
+            data = self.store.load()
+            session = data['sessions'].pop(upload_id, None)
+            if session is None:
+                return
+            self.store.save(data)
+        for i in range(len(session['files'])):
+            part_path = self._part_path(session, i)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    def purge_expired(self):
+        now = time.time()
+        with self.store.lock:
+            expired = [upload_id for upload_id, session in self.store.load()['sessions'].items()
+                       if now - session['created_at'] > self.expire_seconds]
+        for upload_id in expired:
+            self.abort(upload_id)
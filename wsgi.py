@@ -0,0 +1,17 @@
+"""多进程部署的 WSGI 入口。
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+gunicorn.conf.py 会设置 MULTI_WORKER=1，所有 worker 共享同一份 JSON 数据文件
+（或 SQLite 数据库）。也可以用 uvicorn 启动 ASGI 入口：
+
+    MULTI_WORKER=1 uvicorn asgi:application --workers 4
+"""
+import os
+
+# 必须在导入 app 之前设置，数据仓库在导入时按这个环境变量创建
+os.environ.setdefault('MULTI_WORKER', '1')
+
+from app import app
+
+application = app
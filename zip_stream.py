@@ -0,0 +1,158 @@
+import time
+import zlib
+import struct
+import hashlib
+import threading
+
+# 普通 ZIP 格式（非 ZIP64）的大小与条目数上限
+ZIP_MAX_SIZE = 0xFFFFFFFF
+ZIP_MAX_ENTRIES = 0xFFFF
+# 文件名使用 UTF-8 编码
+FLAG_UTF8 = 0x0800
+# CRC 和大小写在文件内容之后的数据描述符中
+FLAG_DATA_DESCRIPTOR = 0x0008
+FLAGS = FLAG_UTF8 | FLAG_DATA_DESCRIPTOR
+LOCAL_HEADER_SIZE = 30
+DATA_DESCRIPTOR_SIZE = 16
+# 归档格式变化时修改，续传时旧的 ETag 不再匹配
+FORMAT_VERSION = b'2'
+
+_crc_cache = {}
+_crc_cache_lock = threading.Lock()
+CRC_CACHE_LIMIT = 10000
+
+
+def _cache_crc(cache_key, crc):
+    with _crc_cache_lock:
+        if len(_crc_cache) >= CRC_CACHE_LIMIT:
+            _crc_cache.clear()
+        _crc_cache[cache_key] = crc
+
+
+def _file_crc(storage, key, size, mtime_ns):
+    cache_key = (key, size, mtime_ns)
+    with _crc_cache_lock:
+        if cache_key in _crc_cache:
+            return _crc_cache[cache_key]
+    crc = 0
+    for buf in storage.iter_range(key, 0, size):
+        crc = zlib.crc32(buf, crc)
+    _cache_crc(cache_key, crc)
+    return crc
+
+
+def _dos_datetime(mtime):
+    t = time.localtime(mtime)
+    if t.tm_year < 1980:
+        return 0, (0 << 9) | (1 << 5) | 1
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+
+class ZipStream:
+    """边读边输出的 ZIP 归档（不压缩，STORED）。
+
+    归档中每一段的长度只取决于文件名和文件大小，因此总大小可以预先算出，
+    支持 Content-Length 和 HTTP Range 断点续传；输出过程中内存占用恒定，
+    不需要在服务器上生成临时文件。
+
+    每个文件的 CRC 写在内容之后的数据描述符中（标志位 3），完整下载时边发送边计算，
+    每个文件只读一次。只有 Range 请求从文件中间开始、又需要描述符或中央目录时，
+    才事先读取整个文件计算 CRC（有缓存）。
+    """
+
+    def __init__(self, entries, storage):
+        # entries: [(归档内路径, 存储键, (大小, 修改时间纳秒)), ...]，文件内容从 storage 读取
+        self.storage = storage
+        # 完整发送过的文件在发送时算出的 CRC，{条目序号: crc}
+        self._crcs = {}
+        self.entries = []
+        offset = 0
+        for arcname, key, (size, mtime_ns) in entries:
+            name = arcname.encode('utf-8')
+            self.entries.append({
+                'name': name,
+                'key': key,
+                'size': size,
+                'mtime_ns': mtime_ns,
+                'datetime': _dos_datetime(mtime_ns / 1e9),
+                'offset': offset
+            })
+            offset += LOCAL_HEADER_SIZE + len(name) + size + DATA_DESCRIPTOR_SIZE
+        self.central_dir_offset = offset
+        self.central_dir_size = sum(46 + len(e['name']) for e in self.entries)
+        self.size = self.central_dir_offset + self.central_dir_size + 22
+        if self.size > ZIP_MAX_SIZE or len(self.entries) > ZIP_MAX_ENTRIES:
+            raise ValueError('归档超过 4GB 或文件数过多，请分批下载')
+
+    def etag(self):
+        h = hashlib.sha1(FORMAT_VERSION)
+        for e in self.entries:
+            h.update(e['name'] + b'\0' + f"{e['size']}:{e['mtime_ns']}".encode() + b'\0')
+        return h.hexdigest()
+
+    def _crc(self, index):
+        crc = self._crcs.get(index)
+        if crc is None:
+            e = self.entries[index]
+            crc = _file_crc(self.storage, e['key'], e['size'], e['mtime_ns'])
+        return crc
+
+    def _local_header(self, e):
+        # 使用数据描述符时本地文件头中的 CRC 和大小为 0
+        dos_time, dos_date = e['datetime']
+        return struct.pack('<IHHHHHIIIHH', 0x04034b50, 20, FLAGS, 0, dos_time, dos_date,
+                           0, 0, 0, len(e['name']), 0) + e['name']
+
+    def _data_descriptor(self, index):
+        size = self.entries[index]['size']
+        return struct.pack('<IIII', 0x08074b50, self._crc(index), size, size)
+
+    def _central_directory(self):
+        records = []
+        for index, e in enumerate(self.entries):
+            dos_time, dos_date = e['datetime']
+            records.append(struct.pack('<IHHHHHHIIIHHHHHII', 0x02014b50, 20, 20, FLAGS, 0,
+                                       dos_time, dos_date, self._crc(index), e['size'], e['size'],
+                                       len(e['name']), 0, 0, 0, 0, 0, e['offset']) + e['name'])
+        records.append(struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, len(self.entries), len(self.entries),
+                                   self.central_dir_size, self.central_dir_offset, 0))
+        return b''.join(records)
+
+    def _parts(self):
+        # 每一段为 (长度, 读取函数)，读取函数返回该段 [lo, hi) 范围内的数据
+        def bytes_part(build):
+            def read(lo, hi):
+                yield build()[lo:hi]
+            return read
+
+        def file_part(index, e):
+            def read(lo, hi):
+                if lo > 0 or hi < e['size']:
+                    yield from self.storage.iter_range(e['key'], lo, hi)
+                    return
+                # 发送整个文件时顺便计算 CRC，供之后的数据描述符和中央目录使用
+                crc = 0
+                for buf in self.storage.iter_range(e['key'], 0, e['size']):
+                    crc = zlib.crc32(buf, crc)
+                    yield buf
+                self._crcs[index] = crc
+                _cache_crc((e['key'], e['size'], e['mtime_ns']), crc)
+            return read
+
+        for index, e in enumerate(self.entries):
+            yield LOCAL_HEADER_SIZE + len(e['name']), bytes_part(lambda e=e: self._local_header(e))
+            yield e['size'], file_part(index, e)
+            yield DATA_DESCRIPTOR_SIZE, bytes_part(lambda index=index: self._data_descriptor(index))
+        yield self.central_dir_size + 22, bytes_part(self._central_directory)
+
+    def iter_range(self, start=0, stop=None):
+        stop = self.size if stop is None else stop
+        pos = 0
+        for length, read in self._parts():
+            lo, hi = max(start - pos, 0), min(stop - pos, length)
+            if lo < hi:
+                yield from read(lo, hi)
+            pos += length
+            if pos >= stop:
+                break